@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Materialized achievements leaderboard and global statistics
+
+- `achievement_leaderboard`: one document per user holding a badge, with the
+  badge count, a rarity-weighted score, the date of the last badge and the
+  rarest badge held;
+- `badge_holder_counts`: one document per badge with the number of times it
+  was earned.
+
+Both are updated with `$inc` whenever badges are inserted into `user_badges`,
+so the achievements leaderboard and global stats are indexed reads instead of
+aggregations over every awarded badge.
+
+Usage:
+    python achievement_stats.py --rebuild   # recompute both collections from user_badges
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from pymongo import ReplaceOne, UpdateOne
+
+from database import db
+
+logger = logging.getLogger(__name__)
+
+LEADERBOARD_COLLECTION = "achievement_leaderboard"
+HOLDERS_COLLECTION = "badge_holder_counts"
+RARITY_ORDER = {"common": 0, "rare": 1, "epic": 2, "legendary": 3, "mythic": 4}
+# Roughly the inverse of the share of players expected to hold each rarity
+RARITY_WEIGHTS = {"common": 1, "rare": 2, "epic": 7, "legendary": 23, "mythic": 140}
+SORT_KEYS = {
+    "badges": ("badge_count", "last_badge"),
+    "score": ("score", "last_badge"),
+}
+REBUILD_CHUNK_SIZE = 1000
+
+# (user_id, badge_id, rarity)
+Award = Tuple[str, str, str]
+
+
+def _rarity(rarity: Any) -> str:
+    return getattr(rarity, "value", rarity)
+
+
+def _rarest(badge_id: str, rarity: str) -> Dict[str, Any]:
+    # Field order matters: $max compares embedded documents field by field
+    return {"rank": RARITY_ORDER.get(rarity, 0), "badge_id": badge_id}
+
+
+async def record_awards(awards: Iterable[Award], obtained_at: Optional[datetime] = None):
+    """Count badges just inserted into user_badges"""
+    obtained_at = obtained_at or datetime.utcnow()
+    users: Dict[str, Dict[str, Any]] = {}
+    holders: Dict[str, int] = {}
+    for user_id, badge_id, rarity in awards:
+        rarity = _rarity(rarity)
+        entry = users.setdefault(user_id, {"badge_count": 0, "score": 0, "rarest": None})
+        entry["badge_count"] += 1
+        entry["score"] += RARITY_WEIGHTS.get(rarity, 1)
+        rarest = _rarest(badge_id, rarity)
+        if entry["rarest"] is None or (rarest["rank"], badge_id) > (entry["rarest"]["rank"], entry["rarest"]["badge_id"]):
+            entry["rarest"] = rarest
+        holders[badge_id] = holders.get(badge_id, 0) + 1
+
+    if not users:
+        return
+    await db[LEADERBOARD_COLLECTION].bulk_write([
+        UpdateOne(
+            {"user_id": user_id},
+            {
+                "$inc": {"badge_count": entry["badge_count"], "score": entry["score"]},
+                "$max": {"last_badge": obtained_at, "rarest": entry["rarest"]},
+                "$set": {"updated_at": obtained_at},
+            },
+            upsert=True
+        )
+        for user_id, entry in users.items()
+    ], ordered=False)
+    await db[HOLDERS_COLLECTION].bulk_write([
+        UpdateOne({"badge_id": badge_id}, {"$inc": {"times_earned": count}}, upsert=True)
+        for badge_id, count in holders.items()
+    ], ordered=False)
+
+
+async def leaderboard(sort: str = "badges", limit: int = 50) -> List[Dict[str, Any]]:
+    """Top users by badge count (or score), most recent badge first on ties"""
+    primary, secondary = SORT_KEYS[sort]
+    return await db[LEADERBOARD_COLLECTION].find({}, {"_id": 0}).sort(
+        [(primary, -1), (secondary, -1)]
+    ).limit(limit).to_list(limit)
+
+
+async def user_position(user_id: str, sort: str = "badges") -> Optional[int]:
+    """1-based position of a user in leaderboard order (None without badges)"""
+    entry = await db[LEADERBOARD_COLLECTION].find_one({"user_id": user_id}, {"_id": 0})
+    if not entry:
+        return None
+    primary, secondary = SORT_KEYS[sort]
+    ahead = await db[LEADERBOARD_COLLECTION].count_documents({"$or": [
+        {primary: {"$gt": entry[primary]}},
+        {primary: entry[primary], secondary: {"$gt": entry[secondary]}},
+    ]})
+    return ahead + 1
+
+
+async def global_stats(top: int = 3) -> Dict[str, Any]:
+    """Totals over every awarded badge and the most earned badges"""
+    holders = await db[HOLDERS_COLLECTION].find({}, {"_id": 0}).sort("times_earned", -1).to_list(None)
+    return {
+        "total_badges_earned": sum(holder["times_earned"] for holder in holders),
+        "total_users_with_badges": await db[LEADERBOARD_COLLECTION].estimated_document_count(),
+        "most_earned": holders[:top],
+    }
+
+
+async def rebuild_achievement_stats(rarities: Dict[str, str]) -> Dict[str, int]:
+    """Recompute both collections from user_badges.
+
+    rarities maps each badge id to its rarity; unknown badges count as common.
+    """
+    users: Dict[str, Dict[str, Any]] = {}
+    holders: Dict[str, int] = {}
+    async for user_badge in db.user_badges.find({}, {"_id": 0, "user_id": 1, "badge_id": 1, "obtained_at": 1}):
+        badge_id = user_badge["badge_id"]
+        rarity = _rarity(rarities.get(badge_id, "common"))
+        entry = users.setdefault(user_badge["user_id"], {
+            "user_id": user_badge["user_id"], "badge_count": 0, "score": 0, "last_badge": None, "rarest": None
+        })
+        entry["badge_count"] += 1
+        entry["score"] += RARITY_WEIGHTS.get(rarity, 1)
+        obtained_at = user_badge.get("obtained_at")
+        if obtained_at and (entry["last_badge"] is None or obtained_at > entry["last_badge"]):
+            entry["last_badge"] = obtained_at
+        rarest = _rarest(badge_id, rarity)
+        if entry["rarest"] is None or (rarest["rank"], badge_id) > (entry["rarest"]["rank"], entry["rarest"]["badge_id"]):
+            entry["rarest"] = rarest
+        holders[badge_id] = holders.get(badge_id, 0) + 1
+
+    now = datetime.utcnow()
+    operations = [
+        ReplaceOne({"user_id": user_id}, {**entry, "updated_at": now}, upsert=True)
+        for user_id, entry in users.items()
+    ]
+    for start in range(0, len(operations), REBUILD_CHUNK_SIZE):
+        await db[LEADERBOARD_COLLECTION].bulk_write(operations[start:start + REBUILD_CHUNK_SIZE], ordered=False)
+    await db[LEADERBOARD_COLLECTION].delete_many({"user_id": {"$nin": list(users)}})
+
+    if holders:
+        await db[HOLDERS_COLLECTION].bulk_write([
+            ReplaceOne({"badge_id": badge_id}, {"badge_id": badge_id, "times_earned": count}, upsert=True)
+            for badge_id, count in holders.items()
+        ], ordered=False)
+    await db[HOLDERS_COLLECTION].delete_many({"badge_id": {"$nin": list(holders)}})
+
+    logger.info(f"✅ Achievement stats rebuilt: {len(users)} users, {len(holders)} badges")
+    return {"users": len(users), "badges": len(holders)}
+
+
+async def ensure_achievement_stats(rarities: Dict[str, str]):
+    """Backfill the collections on first start after deployment"""
+    if await db[HOLDERS_COLLECTION].estimated_document_count() == 0:
+        await rebuild_achievement_stats(rarities)
+
+
+async def _main() -> int:
+    from achievements import achievement_engine
+    from database import client
+
+    try:
+        result = await rebuild_achievement_stats(
+            {badge_id: badge.rarity for badge_id, badge in achievement_engine.badges_registry.items()}
+        )
+        print(f"✅ {result['users']} users and {result['badges']} badges counted")
+        return 0
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    sys.path.append(str(Path(__file__).parent))
+    parser = argparse.ArgumentParser(description="Achievements leaderboard and stats maintenance")
+    parser.add_argument("--rebuild", action="store_true", help="recompute both collections from user_badges")
+    args = parser.parse_args()
+    if not args.rebuild:
+        parser.print_help()
+        sys.exit(0)
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(asyncio.run(_main()))
@@ -7,6 +7,7 @@ from fastapi import HTTPException, Depends, status
 import os
 from motor.motor_asyncio import AsyncIOMotorClient
 from models import User, TokenData
+from cache import LocalCache
 
 # Security configuration
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-this-in-production")
@@ -19,6 +20,11 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 # Token bearer
 security = HTTPBearer()
 
+# Per-process cache of authenticated users keyed by token subject (email).
+# Local invalidation is immediate; other workers pick changes up within the TTL.
+AUTH_USER_CACHE_TTL = int(os.getenv("AUTH_USER_CACHE_TTL", "30"))
+auth_user_cache = LocalCache(int(os.getenv("AUTH_USER_CACHE_MAX_ENTRIES", "10000")))
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a plain password against its hash."""
     return pwd_context.verify(plain_password, hashed_password)
@@ -52,6 +58,22 @@ async def get_user_by_id(db, user_id: str) -> Optional[User]:
         return User(**user_data)
     return None
 
+async def get_user_by_subject(email: str) -> Optional[User]:
+    """Get the user behind a token subject, served from the per-process cache."""
+    entry = auth_user_cache.get(email)
+    if entry is not None:
+        return entry[0]
+    
+    from database import db
+    user = await get_user_by_email(db, email=email)
+    if user is not None:
+        auth_user_cache.set(email, user, AUTH_USER_CACHE_TTL, tags=[f"user:{user.id}"])
+    return user
+
+def invalidate_cached_user(user_id: str):
+    """Drop a user from the authentication cache after it changed."""
+    auth_user_cache.invalidate_tags([f"user:{user_id}"])
+
 async def authenticate_user(db, email: str, password: str) -> Optional[User]:
     """Authenticate user with email and password."""
     user = await get_user_by_email(db, email)
@@ -79,9 +101,7 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     except JWTError:
         raise credentials_exception
     
-    # Get database connection
-    from database import db
-    user = await get_user_by_email(db, email=token_data.email)
+    user = await get_user_by_subject(token_data.email)
     if user is None:
         raise credentials_exception
     return user
@@ -97,9 +117,7 @@ async def get_user_from_websocket_token(token: str) -> Optional[User]:
     except JWTError:
         return None
     
-    # Get database connection
-    from database import db
-    user = await get_user_by_email(db, email=token_data.email)
+    user = await get_user_by_subject(token_data.email)
     if user is None:
         return None
     return user
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Badge backfill job
+
+Badges added to (or whose criteria changed in) `AchievementEngine.load_all_badges`
+only reach existing users the next time an event triggers a badge check for
+them. This job evaluates those badges for every user:
+
+- users are streamed in batches ordered by id, with a bounded number of users
+  evaluated concurrently and an optional pause between batches so the API
+  keeps its share of the database;
+- each batch loads held badges and materialized counters in one query each,
+  then writes awards with one `user_badges.insert_many` and bulk reward updates;
+- progress is saved after every batch in `badge_backfill`, so an interrupted
+  run resumes after the last completed batch.
+
+The badges to evaluate are the ones whose fingerprint (criteria) differs from
+the catalog recorded by the last completed run, unless given explicitly. The
+first run only records the current catalog as the baseline: existing badges
+are not evaluated unless --badge or --all is given. Badges with an unmeasured
+or placeholder criterion (which would be met by every user) are never
+evaluated by this job.
+
+Usage:
+    python badge_backfill.py                      # new or changed badges
+    python badge_backfill.py --badge early_adopter
+    python badge_backfill.py --all --concurrency 4 --pause 0.5
+    python badge_backfill.py --restart            # discard an interrupted run
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from achievements import AchievementEngine, achievement_engine
+from database import db
+from user_counters import COUNTER_FIELDS, get_counters_many
+
+logger = logging.getLogger(__name__)
+
+COLLECTION = "badge_backfill"
+CATALOG_ID = "catalog"
+RUN_ID = "run"
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_CONCURRENCY = 8
+DEFAULT_PAUSE = 0.2
+USER_FIELDS = {"_id": 0, "hashed_password": 0}
+
+
+def badge_fingerprints(engine: AchievementEngine = achievement_engine) -> Dict[str, str]:
+    """Fingerprint of every badge's criteria, keyed by badge id"""
+    return {
+        badge_id: hashlib.sha1(json.dumps(badge.criteria, sort_keys=True, default=str).encode()).hexdigest()
+        for badge_id, badge in engine.badges_registry.items()
+    }
+
+
+async def changed_badges(engine: AchievementEngine = achievement_engine) -> List[str]:
+    """Badges new or changed since the last completed backfill.
+
+    Without a recorded catalog, the current one becomes the baseline and
+    nothing is reported.
+    """
+    fingerprints = badge_fingerprints(engine)
+    catalog = await db[COLLECTION].find_one({"_id": CATALOG_ID})
+    if catalog is None:
+        await db[COLLECTION].update_one(
+            {"_id": CATALOG_ID},
+            {"$setOnInsert": {"fingerprints": fingerprints, "updated_at": datetime.utcnow()}},
+            upsert=True
+        )
+        logger.info(f"Badge backfill: catalog baseline recorded ({len(fingerprints)} badges)")
+        return []
+    recorded = catalog.get("fingerprints", {})
+    return [badge_id for badge_id, fingerprint in fingerprints.items() if recorded.get(badge_id) != fingerprint]
+
+
+async def _evaluate_batch(
+    users: List[Dict[str, Any]],
+    badge_ids: List[str],
+    semaphore: asyncio.Semaphore,
+    engine: AchievementEngine
+) -> List[Tuple[str, str]]:
+    user_ids = [user["id"] for user in users]
+    held = {
+        (held_badge["user_id"], held_badge["badge_id"])
+        async for held_badge in db.user_badges.find(
+            {"user_id": {"$in": user_ids}, "badge_id": {"$in": badge_ids}}, {"_id": 0, "user_id": 1, "badge_id": 1}
+        )
+    }
+
+    criteria = {criterion for badge_id in badge_ids for criterion in engine.badges_registry[badge_id].criteria}
+    counters = await get_counters_many(user_ids) if criteria & set(COUNTER_FIELDS) else {}
+    badge_counts = {}
+    if "unique_badges" in criteria:
+        badge_counts = {
+            count["_id"]: count["badges"]
+            async for count in db.user_badges.aggregate([
+                {"$match": {"user_id": {"$in": user_ids}}},
+                {"$group": {"_id": "$user_id", "badges": {"$sum": 1}}}
+            ])
+        }
+
+    async def evaluate(user: Dict[str, Any]) -> List[Tuple[str, str]]:
+        user_id = user["id"]
+        criterion_values = {**counters.get(user_id, {}), "unique_badges": badge_counts.get(user_id, 0)}
+        awards = []
+        async with semaphore:
+            for badge_id in badge_ids:
+                if (user_id, badge_id) in held:
+                    continue
+                if await engine._check_badge_criteria(user_id, engine.badges_registry[badge_id], user, criterion_values):
+                    awards.append((user_id, badge_id))
+        return awards
+
+    results = await asyncio.gather(*(evaluate(user) for user in users))
+    return [award for awards in results for award in awards]
+
+
+async def run_backfill(
+    badge_ids: Optional[List[str]] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    pause: float = DEFAULT_PAUSE,
+    restart: bool = False,
+    engine: AchievementEngine = achievement_engine
+) -> Dict[str, Any]:
+    """Evaluate badge_ids (default: new or changed badges) for every user.
+
+    Resumes the saved run when there is one, unless restart is set.
+    """
+    state = db[COLLECTION]
+    run = None if restart else await state.find_one({"_id": RUN_ID})
+    if run:
+        badge_ids = [badge_id for badge_id in run["badges"] if badge_id in engine.badges_registry]
+        logger.info(f"Resuming badge backfill after user {run['last_user_id']} ({run['users_processed']} users done)")
+    else:
+        if badge_ids is None:
+            badge_ids = await changed_badges(engine)
+        unknown = [badge_id for badge_id in badge_ids if badge_id not in engine.badges_registry]
+        if unknown:
+            raise ValueError(f"Unknown badges: {', '.join(unknown)}")
+        unmeasured = [badge_id for badge_id in badge_ids if not engine.is_measured(engine.badges_registry[badge_id])]
+        if unmeasured:
+            logger.warning(f"Badge backfill: skipping badges with unmeasured criteria: {', '.join(unmeasured)}")
+            badge_ids = [badge_id for badge_id in badge_ids if badge_id not in unmeasured]
+        fingerprints = badge_fingerprints(engine)
+        run = {
+            "_id": RUN_ID,
+            "badges": badge_ids,
+            "fingerprints": {badge_id: fingerprints[badge_id] for badge_id in badge_ids},
+            "last_user_id": None,
+            "users_processed": 0,
+            "badges_awarded": 0,
+            "started_at": datetime.utcnow(),
+        }
+        await state.replace_one({"_id": RUN_ID}, run, upsert=True)
+
+    if not badge_ids:
+        await state.delete_one({"_id": RUN_ID})
+        logger.info("Badge backfill: no new or changed badges")
+        return {"badges": [], "users_processed": 0, "badges_awarded": 0}
+
+    total_users = await db.users.estimated_document_count()
+    semaphore = asyncio.Semaphore(concurrency)
+    last_user_id = run["last_user_id"]
+    processed, awarded = run["users_processed"], run["badges_awarded"]
+    started = time.perf_counter()
+    processed_now = 0
+
+    while True:
+        query = {"id": {"$gt": last_user_id}} if last_user_id else {}
+        users = await db.users.find(query, USER_FIELDS).sort("id", 1).limit(batch_size).to_list(batch_size)
+        if not users:
+            break
+
+        awards = await _evaluate_batch(users, badge_ids, semaphore, engine)
+        inserted = await engine.award_badges_bulk(awards, {"backfill": True})
+
+        last_user_id = users[-1]["id"]
+        processed += len(users)
+        processed_now += len(users)
+        awarded += inserted
+        await state.update_one({"_id": RUN_ID}, {"$set": {
+            "last_user_id": last_user_id,
+            "users_processed": processed,
+            "badges_awarded": awarded,
+            "updated_at": datetime.utcnow(),
+        }})
+
+        elapsed = time.perf_counter() - started
+        logger.info(
+            f"Badge backfill: {processed}/{total_users} users, {awarded} badges awarded, "
+            f"{processed_now / elapsed:.0f} users/s"
+        )
+        if pause:
+            await asyncio.sleep(pause)
+
+    # Completed: the evaluated fingerprints join the recorded catalog
+    await state.update_one(
+        {"_id": CATALOG_ID},
+        {"$set": {
+            **{f"fingerprints.{badge_id}": fingerprint for badge_id, fingerprint in run["fingerprints"].items()},
+            "updated_at": datetime.utcnow(),
+        }},
+        upsert=True
+    )
+    await state.delete_one({"_id": RUN_ID})
+
+    duration = time.perf_counter() - started
+    return {
+        "badges": badge_ids,
+        "users_processed": processed,
+        "badges_awarded": awarded,
+        "duration_seconds": round(duration, 1),
+        "users_per_second": round(processed_now / duration, 1) if duration else None,
+    }
+
+
+async def _main(args: argparse.Namespace) -> int:
+    from database import client
+
+    try:
+        result = await run_backfill(
+            badge_ids=list(achievement_engine.badges_registry) if args.all else args.badge,
+            batch_size=args.batch_size,
+            concurrency=args.concurrency,
+            pause=args.pause,
+            restart=args.restart,
+        )
+        print(
+            f"✅ {len(result['badges'])} badges evaluated for {result['users_processed']} users, "
+            f"{result['badges_awarded']} awarded"
+        )
+        return 0
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    sys.path.append(str(Path(__file__).parent))
+    parser = argparse.ArgumentParser(description="Award new or changed badges to existing users")
+    selection = parser.add_mutually_exclusive_group()
+    selection.add_argument("--badge", action="append", help="badge id to evaluate (repeatable)")
+    selection.add_argument("--all", action="store_true", help="evaluate every badge")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="users per batch")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="users evaluated at once")
+    parser.add_argument("--pause", type=float, default=DEFAULT_PAUSE, help="seconds to wait between batches")
+    parser.add_argument("--restart", action="store_true", help="discard an interrupted run instead of resuming it")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(asyncio.run(_main(args)))
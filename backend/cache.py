@@ -3,30 +3,58 @@ Redis Cache Configuration and Utilities
 """
 
 import redis
-import json
+import redis.asyncio as aioredis
 import os
 import logging
+from collections import OrderedDict
 from functools import wraps
-from typing import Any, Optional, Union
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple, Union
 from datetime import timedelta
 import asyncio
-import pickle
+import inspect
+import time
+
+from cache_codec import CacheCodec, CodecError, get_codec
 
 logger = logging.getLogger(__name__)
 
+# Delete every member of the given tag sets, then the sets themselves, in a
+# single atomic round-trip.
+_INVALIDATE_TAGS_SCRIPT = """
+local deleted = 0
+for _, tag_key in ipairs(KEYS) do
+    local members = redis.call('SMEMBERS', tag_key)
+    for i = 1, #members, 500 do
+        deleted = deleted + redis.call('DEL', unpack(members, i, math.min(i + 499, #members)))
+    end
+    redis.call('DEL', tag_key)
+end
+return deleted
+"""
+
 class RedisCache:
     """Redis cache manager with async support"""
     
-    def __init__(self):
+    def __init__(self, codec: Optional[CacheCodec] = None):
         self.redis_url = os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
         self.default_ttl = int(os.environ.get('CACHE_DEFAULT_TTL', '300'))  # 5 minutes
         self.enabled = os.environ.get('CACHE_ENABLED', 'true').lower() == 'true'
+        self.max_connections = int(os.environ.get('REDIS_MAX_CONNECTIONS', '50'))
+        # Tag sets outlive any entry they track so no member goes unreferenced
+        self.tag_ttl = int(os.environ.get('CACHE_TAG_TTL', '86400'))  # 24 hours
+        self.codec = codec or get_codec(
+            os.environ.get('CACHE_CODEC', 'msgpack'),
+            compress_threshold=int(os.environ.get('CACHE_COMPRESS_THRESHOLD', '1024')),  # bytes, 0 disables
+            compress_level=int(os.environ.get('CACHE_COMPRESS_LEVEL', '1'))
+        )
+        self.async_pool = None
+        self.async_client = None
         
         if self.enabled:
             try:
                 self.client = redis.from_url(
                     self.redis_url,
-                    decode_responses=True,
+                    decode_responses=False,
                     socket_connect_timeout=5,
                     socket_timeout=5,
                     retry_on_timeout=True
@@ -41,32 +69,46 @@ class RedisCache:
         else:
             logger.info("📝 Redis cache disabled via configuration")
             self.client = None
+        
+        if self.enabled:
+            # Non-blocking client used from async code paths. Connections are
+            # opened lazily on the running event loop, so building the pool
+            # at import time is safe.
+            self.async_pool = aioredis.ConnectionPool.from_url(
+                self.redis_url,
+                max_connections=self.max_connections,
+                decode_responses=False,
+                socket_connect_timeout=5,
+                socket_timeout=5,
+                retry_on_timeout=True
+            )
+            self.async_client = aioredis.Redis(connection_pool=self.async_pool)
+            self._invalidate_tags_async = self.async_client.register_script(_INVALIDATE_TAGS_SCRIPT)
+            self._invalidate_tags_sync = self.client.register_script(_INVALIDATE_TAGS_SCRIPT)
     
     def _serialize_key(self, key: str, prefix: str = "oupafamilly") -> str:
         """Generate cache key with prefix"""
         return f"{prefix}:{key}"
     
-    def _serialize_value(self, value: Any) -> str:
+    def _tag_key(self, tag: str) -> str:
+        """Generate the Redis key of a tag set"""
+        return self._serialize_key(f"tag:{tag}")
+    
+    def _serialize_value(self, value: Any) -> bytes:
         """Serialize value for storage"""
-        try:
-            if isinstance(value, (dict, list, tuple)):
-                return json.dumps(value, default=str)
-            return str(value)
-        except Exception as e:
-            logger.error(f"Cache serialization error: {str(e)}")
-            return str(value)
+        return self.codec.encode(value)
     
-    def _deserialize_value(self, value: str) -> Any:
-        """Deserialize value from storage"""
+    def _deserialize_value(self, value: bytes) -> Any:
+        """Deserialize value from storage (None for entries in another format)"""
         try:
-            # Try JSON first
-            return json.loads(value)
-        except (json.JSONDecodeError, TypeError):
-            # Return as string if JSON fails
-            return value
-    
-    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> bool:
-        """Set cache value with optional TTL"""
+            return self.codec.decode(value)
+        except CodecError as e:
+            # Written by an older format or codec: report a miss so it is refreshed
+            logger.debug(f"Cache entry ignored: {str(e)}")
+            return None
+    
+    def set(self, key: str, value: Any, ttl: Optional[int] = None, tags: Sequence[str] = ()) -> bool:
+        """Set cache value with optional TTL, registering it under each tag"""
         if not self.enabled or not self.client:
             return False
         
@@ -75,8 +117,13 @@ class RedisCache:
             serialized_value = self._serialize_value(value)
             ttl = ttl or self.default_ttl
             
-            result = self.client.setex(cache_key, ttl, serialized_value)
-            logger.debug(f"Cache SET: {cache_key} (TTL: {ttl}s)")
+            pipe = self.client.pipeline(transaction=False)
+            pipe.setex(cache_key, ttl, serialized_value)
+            for tag in tags:
+                pipe.sadd(self._tag_key(tag), cache_key)
+                pipe.expire(self._tag_key(tag), max(ttl, self.tag_ttl))
+            result = pipe.execute()[0]
+            logger.debug(f"Cache SET: {cache_key} (TTL: {ttl}s, tags: {list(tags)})")
             return result
         except Exception as e:
             logger.error(f"Cache SET error: {str(e)}")
@@ -116,13 +163,14 @@ class RedisCache:
             return False
     
     def delete_pattern(self, pattern: str) -> int:
-        """Delete multiple keys matching pattern"""
+        """Delete multiple keys matching pattern (prefer invalidate_tags)"""
         if not self.enabled or not self.client:
             return 0
         
         try:
             pattern_key = self._serialize_key(pattern)
-            keys = self.client.keys(pattern_key)
+            # SCAN walks the keyspace incrementally instead of blocking Redis like KEYS
+            keys = list(self.client.scan_iter(match=pattern_key, count=500))
             if keys:
                 result = self.client.delete(*keys)
                 logger.debug(f"Cache DELETE PATTERN: {pattern} ({result} keys)")
@@ -132,6 +180,32 @@ class RedisCache:
             logger.error(f"Cache DELETE PATTERN error: {str(e)}")
             return 0
     
+    def invalidate_tags(self, tags: Sequence[str]) -> int:
+        """Delete every entry registered under any of the tags"""
+        if not tags or not self.enabled or not self.client:
+            return 0
+        
+        try:
+            result = self._invalidate_tags_sync(keys=[self._tag_key(tag) for tag in tags])
+            logger.debug(f"Cache INVALIDATE TAGS: {list(tags)} ({result} keys)")
+            return int(result)
+        except Exception as e:
+            logger.error(f"Cache INVALIDATE TAGS error: {str(e)}")
+            return 0
+    
+    async def ainvalidate_tags(self, tags: Sequence[str]) -> int:
+        """Delete every entry registered under any of the tags, without blocking"""
+        if not tags or not self.enabled or not self.async_client:
+            return 0
+        
+        try:
+            result = await self._invalidate_tags_async(keys=[self._tag_key(tag) for tag in tags])
+            logger.debug(f"Cache AINVALIDATE TAGS: {list(tags)} ({result} keys)")
+            return int(result)
+        except Exception as e:
+            logger.error(f"Cache AINVALIDATE TAGS error: {str(e)}")
+            return 0
+    
     def exists(self, key: str) -> bool:
         """Check if key exists in cache"""
         if not self.enabled or not self.client:
@@ -144,6 +218,111 @@ class RedisCache:
             logger.error(f"Cache EXISTS error: {str(e)}")
             return False
     
+    async def aset(self, key: str, value: Any, ttl: Optional[int] = None, tags: Sequence[str] = ()) -> bool:
+        """Set cache value with optional TTL and tags without blocking the event loop"""
+        if not self.enabled or not self.async_client:
+            return False
+        
+        try:
+            cache_key = self._serialize_key(key)
+            serialized_value = self._serialize_value(value)
+            ttl = ttl or self.default_ttl
+            
+            async with self.async_client.pipeline(transaction=False) as pipe:
+                pipe.setex(cache_key, ttl, serialized_value)
+                for tag in tags:
+                    pipe.sadd(self._tag_key(tag), cache_key)
+                    pipe.expire(self._tag_key(tag), max(ttl, self.tag_ttl))
+                results = await pipe.execute()
+            logger.debug(f"Cache ASET: {cache_key} (TTL: {ttl}s, tags: {list(tags)})")
+            return bool(results[0])
+        except Exception as e:
+            logger.error(f"Cache ASET error: {str(e)}")
+            return False
+    
+    async def aget(self, key: str) -> Optional[Any]:
+        """Get cache value without blocking the event loop"""
+        if not self.enabled or not self.async_client:
+            return None
+        
+        try:
+            cache_key = self._serialize_key(key)
+            value = await self.async_client.get(cache_key)
+            
+            if value is None:
+                logger.debug(f"Cache MISS: {cache_key}")
+                return None
+            
+            logger.debug(f"Cache HIT: {cache_key}")
+            return self._deserialize_value(value)
+        except Exception as e:
+            logger.error(f"Cache AGET error: {str(e)}")
+            return None
+    
+    async def aget_with_ttl(self, key: str) -> Tuple[Optional[Any], Optional[float]]:
+        """Get cache value and its remaining TTL in seconds in one round-trip"""
+        if not self.enabled or not self.async_client:
+            return None, None
+        
+        try:
+            cache_key = self._serialize_key(key)
+            async with self.async_client.pipeline(transaction=False) as pipe:
+                pipe.get(cache_key)
+                pipe.pttl(cache_key)
+                value, pttl = await pipe.execute()
+            
+            if value is None:
+                logger.debug(f"Cache MISS: {cache_key}")
+                return None, None
+            
+            logger.debug(f"Cache HIT: {cache_key}")
+            remaining = pttl / 1000 if pttl and pttl > 0 else None
+            return self._deserialize_value(value), remaining
+        except Exception as e:
+            logger.error(f"Cache AGET error: {str(e)}")
+            return None, None
+    
+    async def amget(self, keys: List[str]) -> List[Optional[Any]]:
+        """Get several cache values in one round-trip (None for each miss)"""
+        if not keys:
+            return []
+        if not self.enabled or not self.async_client:
+            return [None] * len(keys)
+        
+        try:
+            cache_keys = [self._serialize_key(key) for key in keys]
+            values = await self.async_client.mget(cache_keys)
+            return [
+                self._deserialize_value(value) if value is not None else None
+                for value in values
+            ]
+        except Exception as e:
+            logger.error(f"Cache AMGET error: {str(e)}")
+            return [None] * len(keys)
+    
+    async def adelete(self, *keys: str) -> int:
+        """Delete one or more cache values without blocking the event loop"""
+        if not keys or not self.enabled or not self.async_client:
+            return 0
+        
+        try:
+            cache_keys = [self._serialize_key(key) for key in keys]
+            result = await self.async_client.delete(*cache_keys)
+            logger.debug(f"Cache ADELETE: {cache_keys}")
+            return int(result)
+        except Exception as e:
+            logger.error(f"Cache ADELETE error: {str(e)}")
+            return 0
+    
+    async def aclose(self):
+        """Release the async connection pool (application shutdown)"""
+        if self.async_client:
+            try:
+                await self.async_client.close()
+                await self.async_pool.disconnect()
+            except Exception as e:
+                logger.error(f"Cache pool close error: {str(e)}")
+    
     def clear_all(self) -> bool:
         """Clear all cache (development only)"""
         if not self.enabled or not self.client:
@@ -151,7 +330,7 @@ class RedisCache:
         
         try:
             # Only clear keys with our prefix
-            keys = self.client.keys("oupafamilly:*")
+            keys = list(self.client.scan_iter(match="oupafamilly:*", count=500))
             if keys:
                 result = self.client.delete(*keys)
                 logger.info(f"Cache CLEARED: {result} keys removed")
@@ -161,49 +340,233 @@ class RedisCache:
             logger.error(f"Cache CLEAR error: {str(e)}")
             return False
 
-# Global cache instance
+class LocalCache:
+    """Bounded in-process LRU cache (L1) sitting in front of Redis"""
+    
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        # key -> (value, fresh_until, stale_until, tags) on the monotonic clock
+        self._entries: "OrderedDict[str, Tuple[Any, float, float, Tuple[str, ...]]]" = OrderedDict()
+        self._tags: Dict[str, Set[str]] = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, key: str) -> Optional[Tuple[Any, bool]]:
+        """Return (value, is_stale) or None when absent or past its stale window"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        
+        value, fresh_until, stale_until, _ = entry
+        now = time.monotonic()
+        if now >= stale_until:
+            self._remove(key)
+            self.misses += 1
+            return None
+        
+        self._entries.move_to_end(key)
+        if now >= fresh_until:
+            self.stale_hits += 1
+            return value, True
+        
+        self.hits += 1
+        return value, False
+    
+    def _remove(self, key: str) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        for tag in entry[3]:
+            members = self._tags.get(tag)
+            if members is not None:
+                members.discard(key)
+                if not members:
+                    del self._tags[tag]
+        return True
+    
+    def set(self, key: str, value: Any, ttl: float, stale_ttl: float = 0, tags: Sequence[str] = ()):
+        """Store value, fresh for ttl seconds then served stale for stale_ttl more"""
+        self._remove(key)
+        now = time.monotonic()
+        self._entries[key] = (value, now + ttl, now + ttl + stale_ttl, tuple(tags))
+        for tag in tags:
+            self._tags.setdefault(tag, set()).add(key)
+        
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+    
+    def delete(self, key: str) -> bool:
+        """Drop a single entry"""
+        return self._remove(key)
+    
+    def invalidate_tags(self, tags: Sequence[str]) -> int:
+        """Drop every entry registered under any of the tags"""
+        keys = set()
+        for tag in tags:
+            keys.update(self._tags.get(tag, ()))
+        for key in keys:
+            self._remove(key)
+        return len(keys)
+    
+    def clear(self):
+        """Drop every entry"""
+        self._entries.clear()
+        self._tags.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counters for monitoring"""
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round((self.hits + self.stale_hits) / lookups, 4) if lookups else 0.0
+        }
+
+class SingleFlight:
+    """Collapse concurrent loads of the same key into one execution"""
+    
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.coalesced = 0
+    
+    def _forget(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception as retrieved when every waiter went away
+        if not task.cancelled():
+            task.exception()
+    
+    def start(self, key: str, loader: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        """Return the in-flight task for key, starting one if needed"""
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            return task
+        
+        task = asyncio.ensure_future(loader())
+        self._inflight[key] = task
+        task.add_done_callback(lambda t: self._forget(key, t))
+        return task
+    
+    async def run(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Await the shared load; a cancelled caller does not cancel the others"""
+        return await asyncio.shield(self.start(key, loader))
+
+# Global cache instances
 cache = RedisCache()
+local_cache = LocalCache(int(os.environ.get('CACHE_L1_MAX_ENTRIES', '1024')))
+single_flight = SingleFlight()
+
+def _build_cache_key(func, key_prefix: str, args, kwargs) -> str:
+    """Generate cache key from function name and scalar parameters"""
+    func_name = f"{func.__module__}.{func.__name__}"
+    args_key = "_".join(str(arg) for arg in args if isinstance(arg, (str, int, float)))
+    kwargs_key = "_".join(f"{k}_{v}" for k, v in sorted(kwargs.items()) if isinstance(v, (str, int, float)))
+    
+    return f"{key_prefix}_{func_name}_{args_key}_{kwargs_key}".strip("_")
 
-def cached(ttl: int = 300, key_prefix: str = ""):
+TagSpec = Union[str, Callable[[Any], Iterable[str]]]
+
+def _resolve_tags(tag_specs: Sequence[TagSpec], arguments: Dict[str, Any], result: Any) -> List[str]:
+    """Expand tag templates against call arguments and tag callables against the result"""
+    tags = []
+    for spec in tag_specs:
+        if callable(spec):
+            tags.extend(spec(result))
+        else:
+            tags.append(spec.format(**arguments))
+    return tags
+
+def cached(
+    ttl: int = 300,
+    key_prefix: str = "",
+    local: bool = False,
+    local_ttl: Optional[int] = None,
+    stale_ttl: int = 0,
+    tags: Sequence[TagSpec] = ()
+):
     """
     Decorator for caching function results
     
+    Coroutine functions go through the pooled asyncio client so a slow Redis
+    round-trip never blocks the event loop; plain functions keep using the
+    synchronous client. Concurrent coroutine calls for the same key share a
+    single Redis lookup and, on a miss, a single execution of the function.
+    
     Args:
         ttl: Time to live in seconds (default: 5 minutes)
         key_prefix: Optional prefix for cache key
+        local: Keep a copy in the in-process L1 cache (coroutines only)
+        local_ttl: L1 freshness in seconds (default: ttl, capped by Redis TTL)
+        stale_ttl: Serve an expired L1 entry for this many extra seconds while
+            it is refreshed in the background (implies local)
+        tags: Tags the entry is registered under for invalidate_tags. Strings
+            are formatted with the call arguments ("tournament:{tournament_id}"),
+            callables receive the result and return extra tags.
     """
+    use_local = local or stale_ttl > 0
+    
     def decorator(func):
+        signature = inspect.signature(func)
+        
+        def entry_tags(args, kwargs, result) -> List[str]:
+            if not tags:
+                return []
+            bound = signature.bind_partial(*args, **kwargs)
+            # Templates may name parameters the caller left at their default
+            bound.apply_defaults()
+            return _resolve_tags(tags, bound.arguments, result)
+        
         @wraps(func)
         async def async_wrapper(*args, **kwargs):
-            # Generate cache key from function name and parameters
             func_name = f"{func.__module__}.{func.__name__}"
-            args_key = "_".join(str(arg) for arg in args if isinstance(arg, (str, int, float)))
-            kwargs_key = "_".join(f"{k}_{v}" for k, v in sorted(kwargs.items()) if isinstance(v, (str, int, float)))
+            cache_key = _build_cache_key(func, key_prefix, args, kwargs)
             
-            cache_key = f"{key_prefix}_{func_name}_{args_key}_{kwargs_key}".strip("_")
-            
-            # Try to get from cache first
-            cached_result = cache.get(cache_key)
-            if cached_result is not None:
-                logger.debug(f"🎯 Cache hit for {func_name}")
-                return cached_result
+            async def load():
+                # Try to get from cache first
+                if use_local:
+                    cached_result, remaining = await cache.aget_with_ttl(cache_key)
+                else:
+                    cached_result, remaining = await cache.aget(cache_key), None
+                
+                if cached_result is not None:
+                    logger.debug(f"🎯 Cache hit for {func_name}")
+                    result = cached_result
+                    fresh_for = min(local_ttl or ttl, remaining or ttl)
+                else:
+                    # Execute function and cache result
+                    logger.debug(f"🔄 Cache miss for {func_name}, executing...")
+                    result = await func(*args, **kwargs)
+                    await cache.aset(cache_key, result, ttl, entry_tags(args, kwargs, result))
+                    fresh_for = local_ttl or ttl
+                
+                if use_local:
+                    local_cache.set(cache_key, result, fresh_for, stale_ttl, entry_tags(args, kwargs, result))
+                return result
             
-            # Execute function and cache result
-            logger.debug(f"🔄 Cache miss for {func_name}, executing...")
-            result = await func(*args, **kwargs) if asyncio.iscoroutinefunction(func) else func(*args, **kwargs)
+            if use_local:
+                entry = local_cache.get(cache_key)
+                if entry is not None:
+                    result, is_stale = entry
+                    if is_stale:
+                        logger.debug(f"♻️ Serving stale {func_name}, refreshing in background")
+                        single_flight.start(cache_key, load)
+                    return result
             
-            # Cache the result
-            cache.set(cache_key, result, ttl)
-            return result
+            return await single_flight.run(cache_key, load)
         
         @wraps(func)
         def sync_wrapper(*args, **kwargs):
-            # Same logic for synchronous functions
             func_name = f"{func.__module__}.{func.__name__}"
-            args_key = "_".join(str(arg) for arg in args if isinstance(arg, (str, int, float)))
-            kwargs_key = "_".join(f"{k}_{v}" for k, v in sorted(kwargs.items()) if isinstance(v, (str, int, float)))
-            
-            cache_key = f"{key_prefix}_{func_name}_{args_key}_{kwargs_key}".strip("_")
+            cache_key = _build_cache_key(func, key_prefix, args, kwargs)
             
             cached_result = cache.get(cache_key)
             if cached_result is not None:
@@ -212,7 +575,7 @@ def cached(ttl: int = 300, key_prefix: str = ""):
             
             logger.debug(f"🔄 Cache miss for {func_name}, executing...")
             result = func(*args, **kwargs)
-            cache.set(cache_key, result, ttl)
+            cache.set(cache_key, result, ttl, entry_tags(args, kwargs, result))
             return result
         
         return async_wrapper if asyncio.iscoroutinefunction(func) else sync_wrapper
@@ -223,28 +586,38 @@ class CacheInvalidator:
     """Utilities for cache invalidation"""
     
     @staticmethod
-    def invalidate_user_cache(user_id: str):
+    async def invalidate_tags(*tags: str) -> int:
+        """Invalidate exactly the entries registered under the given tags (Redis and L1)"""
+        removed = await cache.ainvalidate_tags(tags)
+        local_cache.invalidate_tags(tags)
+        logger.info(f"🗑️ Invalidated cache tags {list(tags)} ({removed} keys)")
+        return removed
+    
+    @staticmethod
+    async def invalidate_user_cache(user_id: str):
         """Invalidate all cache entries for a specific user"""
-        cache.delete_pattern(f"*user_{user_id}*")
-        logger.info(f"🗑️ Invalidated cache for user {user_id}")
+        await CacheInvalidator.invalidate_tags(f"user:{user_id}")
+    
+    @staticmethod
+    async def invalidate_team_cache(team_id: str = None):
+        """Invalidate team-related cache"""
+        if team_id:
+            await CacheInvalidator.invalidate_tags(f"team:{team_id}")
+        else:
+            await CacheInvalidator.invalidate_tags("teams")
     
     @staticmethod
-    def invalidate_tournament_cache(tournament_id: str = None):
+    async def invalidate_tournament_cache(tournament_id: str = None):
         """Invalidate tournament-related cache"""
         if tournament_id:
-            cache.delete_pattern(f"*tournament_{tournament_id}*")
-            logger.info(f"🗑️ Invalidated cache for tournament {tournament_id}")
+            await CacheInvalidator.invalidate_tags(f"tournament:{tournament_id}")
         else:
-            cache.delete_pattern("*tournament*")
-            logger.info("🗑️ Invalidated all tournament cache")
+            await CacheInvalidator.invalidate_tags("tournaments")
     
     @staticmethod
-    def invalidate_community_cache():
+    async def invalidate_community_cache():
         """Invalidate community-related cache (leaderboards, stats, etc.)"""
-        cache.delete_pattern("*community*")
-        cache.delete_pattern("*leaderboard*")
-        cache.delete_pattern("*stats*")
-        logger.info("🗑️ Invalidated community cache")
+        await CacheInvalidator.invalidate_tags("community")
 
 # Export cache utilities
 invalidate = CacheInvalidator()
\ No newline at end of file
@@ -0,0 +1,235 @@
+"""
+Cache value codecs
+
+Every payload starts with a small versioned header so entries written by an
+older format (or another codec) are detected on read and treated as a miss,
+which lets the cache refresh them transparently.
+"""
+
+import json
+import logging
+import uuid
+import zlib
+from datetime import date, datetime, time as dt_time, timedelta
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Dict
+
+import msgpack
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"OF"
+HEADER_SIZE = 5  # magic (2) + format version (1) + codec id (1) + flags (1)
+FLAG_COMPRESSED = 0x01
+
+# msgpack extension type codes
+EXT_DATETIME = 1
+EXT_DATE = 2
+EXT_TIME = 3
+EXT_TIMEDELTA = 4
+EXT_UUID = 5
+EXT_DECIMAL = 6
+EXT_ENUM = 7
+EXT_MODEL = 8
+EXT_SET = 9
+
+
+class CodecError(ValueError):
+    """Raised when a payload cannot be decoded by the active codec"""
+
+
+def _class_path(cls: type) -> str:
+    return f"{cls.__module__}:{cls.__qualname__}"
+
+
+# Classes allowed in cached payloads, keyed by module:qualname. Payloads only
+# name a class; they never cause a module to be imported.
+_registry: Dict[str, type] = {}
+
+
+def register_type(cls: type) -> type:
+    """Allow instances of an Enum or Pydantic model class in cached payloads.
+
+    Classes are also registered when first encoded, so a worker decodes what it
+    has cached itself; register up front the classes other workers may cache.
+    Usable as a class decorator.
+    """
+    if not (isinstance(cls, type) and issubclass(cls, (Enum, BaseModel))):
+        raise TypeError(f"{cls!r} is not an Enum or BaseModel subclass")
+    _registry[_class_path(cls)] = cls
+    return cls
+
+
+def _resolve_class(path: str, base: type) -> type:
+    """Look up a registered class by its module:qualname path, restricted to subclasses of base"""
+    cls = _registry.get(path)
+    if cls is None:
+        raise CodecError(f"{path} is not a registered cache type")
+    if not issubclass(cls, base):
+        raise CodecError(f"{path} is not a {base.__name__} subclass")
+    return cls
+
+
+class CacheCodec:
+    """Base class for cache codecs: encode to bytes with a versioned header"""
+
+    codec_id = 0
+    format_version = 1
+
+    def __init__(self, compress_threshold: int = 0, compress_level: int = 1):
+        # 0 disables compression
+        self.compress_threshold = compress_threshold
+        self.compress_level = compress_level
+
+    def _dumps(self, value: Any) -> bytes:
+        raise NotImplementedError
+
+    def _loads(self, payload: bytes) -> Any:
+        raise NotImplementedError
+
+    def encode(self, value: Any) -> bytes:
+        """Serialize value, compressing it when above the size threshold"""
+        payload = self._dumps(value)
+        flags = 0
+        if self.compress_threshold and len(payload) >= self.compress_threshold:
+            payload = zlib.compress(payload, self.compress_level)
+            flags |= FLAG_COMPRESSED
+        return MAGIC + bytes((self.format_version, self.codec_id, flags)) + payload
+
+    def decode(self, data: bytes) -> Any:
+        """Deserialize a payload, raising CodecError for foreign or outdated formats"""
+        if isinstance(data, str):
+            data = data.encode()
+        if len(data) < HEADER_SIZE or data[:2] != MAGIC:
+            raise CodecError("missing cache header")
+        version, codec_id, flags = data[2], data[3], data[4]
+        if version != self.format_version or codec_id != self.codec_id:
+            raise CodecError(f"unsupported cache format v{version}/codec {codec_id}")
+
+        payload = data[HEADER_SIZE:]
+        try:
+            if flags & FLAG_COMPRESSED:
+                payload = zlib.decompress(payload)
+            return self._loads(payload)
+        except CodecError:
+            raise
+        except Exception as e:
+            raise CodecError(f"corrupt cache payload: {str(e)}")
+
+
+class MsgpackCodec(CacheCodec):
+    """Compact binary codec that round-trips datetimes, UUIDs, enums and Pydantic models"""
+
+    codec_id = 1
+
+    def _default(self, obj: Any) -> Any:
+        if isinstance(obj, Enum):
+            return msgpack.ExtType(EXT_ENUM, self._pack([_class_path(register_type(type(obj))), obj.value]))
+        if isinstance(obj, BaseModel):
+            return msgpack.ExtType(EXT_MODEL, self._pack([_class_path(register_type(type(obj))), obj.model_dump()]))
+        if isinstance(obj, datetime):
+            return msgpack.ExtType(EXT_DATETIME, obj.isoformat().encode())
+        if isinstance(obj, date):
+            return msgpack.ExtType(EXT_DATE, obj.isoformat().encode())
+        if isinstance(obj, dt_time):
+            return msgpack.ExtType(EXT_TIME, obj.isoformat().encode())
+        if isinstance(obj, timedelta):
+            return msgpack.ExtType(EXT_TIMEDELTA, self._pack([obj.days, obj.seconds, obj.microseconds]))
+        if isinstance(obj, uuid.UUID):
+            return msgpack.ExtType(EXT_UUID, obj.bytes)
+        if isinstance(obj, Decimal):
+            return msgpack.ExtType(EXT_DECIMAL, str(obj).encode())
+        if isinstance(obj, (set, frozenset)):
+            return msgpack.ExtType(EXT_SET, self._pack(list(obj)))
+        # strict_types routes subclasses of builtins here; keep their base shape
+        if isinstance(obj, tuple):
+            return list(obj)
+        if isinstance(obj, dict):
+            return dict(obj)
+        if isinstance(obj, list):
+            return list(obj)
+        if isinstance(obj, str):
+            return str(obj)
+        if isinstance(obj, bool):
+            return bool(obj)
+        if isinstance(obj, int):
+            return int(obj)
+        if isinstance(obj, float):
+            return float(obj)
+        if isinstance(obj, bytes):
+            return bytes(obj)
+        raise TypeError(f"Cannot cache value of type {type(obj).__name__}")
+
+    def _ext_hook(self, code: int, data: bytes) -> Any:
+        if code == EXT_DATETIME:
+            return datetime.fromisoformat(data.decode())
+        if code == EXT_DATE:
+            return date.fromisoformat(data.decode())
+        if code == EXT_TIME:
+            return dt_time.fromisoformat(data.decode())
+        if code == EXT_TIMEDELTA:
+            days, seconds, microseconds = self._unpack(data)
+            return timedelta(days=days, seconds=seconds, microseconds=microseconds)
+        if code == EXT_UUID:
+            return uuid.UUID(bytes=data)
+        if code == EXT_DECIMAL:
+            return Decimal(data.decode())
+        if code == EXT_SET:
+            return set(self._unpack(data))
+        if code == EXT_ENUM:
+            path, value = self._unpack(data)
+            return _resolve_class(path, Enum)(value)
+        if code == EXT_MODEL:
+            path, fields = self._unpack(data)
+            return _resolve_class(path, BaseModel).model_validate(fields)
+        raise CodecError(f"unknown extension type {code}")
+
+    def _pack(self, value: Any) -> bytes:
+        return msgpack.packb(value, default=self._default, strict_types=True, use_bin_type=True)
+
+    def _unpack(self, payload: bytes) -> Any:
+        return msgpack.unpackb(payload, ext_hook=self._ext_hook, raw=False, strict_map_key=False)
+
+    def _dumps(self, value: Any) -> bytes:
+        return self._pack(value)
+
+    def _loads(self, payload: bytes) -> Any:
+        return self._unpack(payload)
+
+
+class JsonCodec(CacheCodec):
+    """Human-readable codec; lossy like the historical format (types become strings)"""
+
+    codec_id = 2
+
+    @staticmethod
+    def _default(obj: Any) -> Any:
+        if isinstance(obj, BaseModel):
+            return obj.model_dump(mode="json")
+        if isinstance(obj, (set, frozenset)):
+            return list(obj)
+        return str(obj)
+
+    def _dumps(self, value: Any) -> bytes:
+        return json.dumps(value, default=self._default, separators=(",", ":")).encode()
+
+    def _loads(self, payload: bytes) -> Any:
+        return json.loads(payload)
+
+
+CODECS = {
+    "msgpack": MsgpackCodec,
+    "json": JsonCodec,
+}
+
+
+def get_codec(name: str, compress_threshold: int = 0, compress_level: int = 1) -> CacheCodec:
+    """Build a codec by name (see CODECS)"""
+    try:
+        codec_class = CODECS[name]
+    except KeyError:
+        logger.warning(f"Unknown cache codec '{name}', falling back to msgpack")
+        codec_class = MsgpackCodec
+    return codec_class(compress_threshold=compress_threshold, compress_level=compress_level)
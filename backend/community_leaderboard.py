@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Materialized community leaderboard
+
+One `community_leaderboard` document per user who has won a tournament,
+holding victories per format and the resulting points. Documents are updated
+incrementally whenever a tournament winner is declared or withdrawn, so the
+community leaderboard is a single indexed read over every user.
+
+Usage:
+    python community_leaderboard.py --rebuild   # recompute from completed tournaments
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from pymongo import ReplaceOne
+
+logger = logging.getLogger(__name__)
+
+COLLECTION = "community_leaderboard"
+VICTORY_TYPES = ("1v1", "2v2", "5v5")
+VICTORY_POINTS = {
+    "1v1": 100,  # 100 points per 1v1 victory
+    "2v2": 150,  # 150 points per 2v2 victory
+    "5v5": 200,  # 200 points per 5v5 victory
+}
+USER_FIELDS = {"_id": 0, "id": 1, "username": 1, "role": 1, "created_at": 1}
+TOURNAMENT_FIELDS = {"_id": 0, "winner_id": 1, "title": 1, "max_participants": 1}
+
+
+def victory_type(tournament: Dict[str, Any]) -> str:
+    """Format of a tournament victory, from its title or max_participants"""
+    max_participants = tournament.get("max_participants", 2)
+    tournament_name = tournament.get("title", "").lower()
+
+    if "1v1" in tournament_name or max_participants <= 2:
+        return "1v1"
+    if "2v2" in tournament_name or max_participants <= 4:
+        return "2v2"
+    return "5v5"
+
+
+def _user_fields(user_data: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "username": user_data["username"],
+        "role": user_data.get("role"),
+        "created_at": user_data.get("created_at"),
+    }
+
+
+async def record_victory(db, tournament: Dict[str, Any], winner_id: str, count: int = 1):
+    """Add (or with a negative count, withdraw) one tournament victory for winner_id.
+
+    Team winners are not ranked on the community leaderboard, which lists users.
+    """
+    user_data = await db.users.find_one({"id": winner_id}, USER_FIELDS)
+    if not user_data:
+        return
+
+    kind = victory_type(tournament)
+    await db[COLLECTION].update_one(
+        {"user_id": winner_id},
+        {
+            "$inc": {
+                f"victories_{kind}": count,
+                "total_trophies": count,
+                "total_points": VICTORY_POINTS[kind] * count,
+            },
+            "$set": {**_user_fields(user_data), "updated_at": datetime.utcnow()},
+        },
+        upsert=True
+    )
+
+
+async def sync_tournament_winner(db, previous: Optional[Dict[str, Any]], winner_id: Optional[str]):
+    """Apply a tournament winner change to the leaderboard.
+
+    previous is the tournament document before the write and winner_id the
+    winner counted after it (None when the tournament is no longer completed),
+    so re-declaring the same winner is a no-op.
+    """
+    if not previous:
+        return
+    counted = previous.get("winner_id") if previous.get("status") == "completed" else None
+    if counted == winner_id:
+        return
+    if counted:
+        await record_victory(db, previous, counted, -1)
+    if winner_id:
+        await record_victory(db, previous, winner_id, 1)
+
+
+async def remove_user(db, user_id: str):
+    """Drop a deleted user from the leaderboard"""
+    await db[COLLECTION].delete_one({"user_id": user_id})
+
+
+def _leaderboard_entry(entry: Dict[str, Any], user_id: str) -> Dict[str, Any]:
+    return {
+        "user_id": user_id,
+        "username": entry.get("username"),
+        "total_points": entry.get("total_points", 0),
+        "total_trophies": entry.get("total_trophies", 0),
+        "victories_1v1": entry.get("victories_1v1", 0),
+        "victories_2v2": entry.get("victories_2v2", 0),
+        "victories_5v5": entry.get("victories_5v5", 0),
+        "role": entry.get("role"),
+        "created_at": entry.get("created_at"),
+    }
+
+
+async def get_top_players(db, limit: int = 50) -> List[Dict[str, Any]]:
+    """Top players by points, padded with trophy-less users when fewer have won"""
+    entries = await db[COLLECTION].find({}, {"_id": 0}).sort(
+        [("total_points", -1), ("created_at", 1)]
+    ).limit(limit).to_list(limit)
+    players = [_leaderboard_entry(entry, entry["user_id"]) for entry in entries]
+
+    if len(players) < limit:
+        ranked_ids = [player["user_id"] for player in players]
+        others = await db.users.find(
+            {"id": {"$nin": ranked_ids}}, USER_FIELDS
+        ).limit(limit - len(players)).to_list(limit - len(players))
+        players.extend(_leaderboard_entry(user_data, user_data["id"]) for user_data in others)
+
+    return players
+
+
+async def rebuild_leaderboard(db) -> Dict[str, int]:
+    """Recompute every leaderboard document from completed tournaments"""
+    tallies: Dict[str, Dict[str, int]] = {}
+    async for tournament in db.tournaments.find(
+        {"status": "completed", "winner_id": {"$ne": None}}, TOURNAMENT_FIELDS
+    ):
+        victories = tallies.setdefault(tournament["winner_id"], dict.fromkeys(VICTORY_TYPES, 0))
+        victories[victory_type(tournament)] += 1
+
+    users = await db.users.find({"id": {"$in": list(tallies)}}, USER_FIELDS).to_list(None)
+    now = datetime.utcnow()
+    operations = []
+    for user_data in users:
+        victories = tallies[user_data["id"]]
+        operations.append(ReplaceOne(
+            {"user_id": user_data["id"]},
+            {
+                "user_id": user_data["id"],
+                **_user_fields(user_data),
+                **{f"victories_{kind}": victories[kind] for kind in VICTORY_TYPES},
+                "total_trophies": sum(victories.values()),
+                "total_points": sum(VICTORY_POINTS[kind] * victories[kind] for kind in VICTORY_TYPES),
+                "updated_at": now,
+            },
+            upsert=True
+        ))
+
+    if operations:
+        await db[COLLECTION].bulk_write(operations, ordered=False)
+    removed = await db[COLLECTION].delete_many({"user_id": {"$nin": [user_data["id"] for user_data in users]}})
+
+    logger.info(f"✅ Community leaderboard rebuilt: {len(operations)} players")
+    return {"players": len(operations), "removed": removed.deleted_count}
+
+
+async def ensure_leaderboard(db):
+    """Backfill the leaderboard on first start after deployment"""
+    if await db[COLLECTION].estimated_document_count() == 0:
+        await rebuild_leaderboard(db)
+
+
+async def _main() -> int:
+    from database import db, client
+
+    try:
+        result = await rebuild_leaderboard(db)
+        print(f"✅ {result['players']} players ranked, {result['removed']} stale entries removed")
+        return 0
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    sys.path.append(str(Path(__file__).parent))
+    parser = argparse.ArgumentParser(description="Community leaderboard maintenance")
+    parser.add_argument("--rebuild", action="store_true", help="recompute from completed tournaments")
+    args = parser.parse_args()
+    if not args.rebuild:
+        parser.print_help()
+        sys.exit(0)
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(asyncio.run(_main()))
@@ -1,12 +1,37 @@
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReadPreference
 import os
 from pathlib import Path
 from dotenv import load_dotenv
+from db_metrics import command_listener, pool_listener
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+# Connection pool and timeout tuning (0 leaves the driver default / no limit)
+POOL_OPTIONS = {
+    "maxPoolSize": int(os.environ.get('MONGO_MAX_POOL_SIZE', '100')),
+    "minPoolSize": int(os.environ.get('MONGO_MIN_POOL_SIZE', '0')),
+    "maxIdleTimeMS": int(os.environ.get('MONGO_MAX_IDLE_TIME_MS', '0')) or None,
+    "serverSelectionTimeoutMS": int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', '30000')),
+    "waitQueueTimeoutMS": int(os.environ.get('MONGO_WAIT_QUEUE_TIMEOUT_MS', '0')) or None,
+    # Client-side operation timeout; the driver sends the remaining budget to
+    # the server as maxTimeMS on every operation
+    "timeoutMS": int(os.environ.get('MONGO_MAX_TIME_MS', '0')) or None,
+}
+
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
\ No newline at end of file
+client = AsyncIOMotorClient(
+    mongo_url,
+    event_listeners=[command_listener, pool_listener],
+    **{option: value for option, value in POOL_OPTIONS.items() if value is not None}
+)
+db = client[os.environ['DB_NAME']]
+
+# Read handle for analytics and leaderboards: tolerates slightly stale data so
+# heavy aggregations can run on secondaries instead of competing with writes
+analytics_db = client.get_database(
+    os.environ['DB_NAME'],
+    read_preference=ReadPreference.SECONDARY_PREFERRED
+)
@@ -0,0 +1,286 @@
+"""
+MongoDB Command Instrumentation
+
+A pymongo command listener attributes every command's count and duration to
+the FastAPI route currently being served (through a contextvar set by the
+request middleware), keeps per-route percentiles and warns when a single
+request issues more queries than MONGO_QUERY_WARN_THRESHOLD, which is the
+signature of an N+1 query pattern.
+"""
+
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, List, Optional
+
+import structlog
+from pymongo import monitoring
+
+performance_logger = structlog.get_logger("performance")
+
+QUERY_WARN_THRESHOLD = int(os.environ.get("MONGO_QUERY_WARN_THRESHOLD", "50"))
+SAMPLE_SIZE = int(os.environ.get("MONGO_QUERY_METRICS_SAMPLES", "1000"))
+BACKGROUND_ROUTE = "(background)"
+
+# Driver handshake/auth traffic is not issued by application code
+IGNORED_COMMANDS = {"hello", "ismaster", "isMaster", "saslStart", "saslContinue", "endSessions"}
+
+
+class RequestQueryStats:
+    """Commands issued while serving one request"""
+
+    def __init__(self):
+        # list.append is atomic, so driver threads can record without a lock
+        self.durations_ms: List[float] = []
+        self.commands: List[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.durations_ms)
+
+    @property
+    def total_ms(self) -> float:
+        return sum(self.durations_ms)
+
+    def record(self, command_name: str, duration_ms: float):
+        self.commands.append(command_name)
+        self.durations_ms.append(duration_ms)
+
+
+_current_request: ContextVar[Optional[RequestQueryStats]] = ContextVar("mongo_request_stats", default=None)
+
+
+def _percentile(values: List[float], percentile: float) -> float:
+    """Nearest-rank percentile"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(percentile / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class RouteQueryMetrics:
+    """Aggregated query statistics of one route"""
+
+    def __init__(self):
+        self.requests = 0
+        self.queries = 0
+        self.max_queries = 0
+        self.slow_requests = 0
+        self.query_counts: Deque[int] = deque(maxlen=SAMPLE_SIZE)
+        self.durations_ms: Deque[float] = deque(maxlen=SAMPLE_SIZE)
+
+    def snapshot(self) -> Dict[str, Any]:
+        counts = list(self.query_counts)
+        durations = list(self.durations_ms)
+        return {
+            "requests": self.requests,
+            "queries": self.queries,
+            "queries_per_request": {
+                "avg": round(self.queries / self.requests, 2) if self.requests else 0.0,
+                "p50": _percentile(counts, 50),
+                "p99": _percentile(counts, 99),
+                "max": self.max_queries,
+            },
+            "query_duration_ms": {
+                "p50": round(_percentile(durations, 50), 3),
+                "p99": round(_percentile(durations, 99), 3),
+            },
+            "requests_over_threshold": self.slow_requests,
+        }
+
+
+class QueryMetrics:
+    """Per-route query counts and durations for the whole process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes: Dict[str, RouteQueryMetrics] = {}
+
+    def _route(self, route: str) -> RouteQueryMetrics:
+        metrics = self._routes.get(route)
+        if metrics is None:
+            metrics = self._routes[route] = RouteQueryMetrics()
+        return metrics
+
+    def record_request(self, route: str, stats: RequestQueryStats):
+        with self._lock:
+            metrics = self._route(route)
+            metrics.requests += 1
+            metrics.queries += stats.count
+            metrics.max_queries = max(metrics.max_queries, stats.count)
+            metrics.query_counts.append(stats.count)
+            metrics.durations_ms.extend(stats.durations_ms)
+            if stats.count > QUERY_WARN_THRESHOLD:
+                metrics.slow_requests += 1
+
+    def record_background(self, duration_ms: float):
+        with self._lock:
+            metrics = self._route(BACKGROUND_ROUTE)
+            metrics.queries += 1
+            metrics.durations_ms.append(duration_ms)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            routes = {route: metrics.snapshot() for route, metrics in self._routes.items()}
+        return {
+            "warn_threshold": QUERY_WARN_THRESHOLD,
+            "routes": dict(sorted(
+                routes.items(),
+                key=lambda item: item[1]["queries_per_request"]["avg"],
+                reverse=True
+            )),
+        }
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+
+
+query_metrics = QueryMetrics()
+
+
+class CommandMetricsListener(monitoring.CommandListener):
+    """Attribute each MongoDB command to the request being served"""
+
+    def started(self, event):
+        pass
+
+    def _record(self, event):
+        if event.command_name in IGNORED_COMMANDS:
+            return
+        duration_ms = event.duration_micros / 1000
+        stats = _current_request.get()
+        if stats is not None:
+            stats.record(event.command_name, duration_ms)
+        else:
+            query_metrics.record_background(duration_ms)
+
+    def succeeded(self, event):
+        self._record(event)
+
+    def failed(self, event):
+        self._record(event)
+
+
+command_listener = CommandMetricsListener()
+
+
+class PoolMetricsListener(monitoring.ConnectionPoolListener):
+    """Connection pool occupancy and checkout wait times, to spot pool saturation"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Checkout start and completion are published on the same thread
+        self._local = threading.local()
+        self.open_connections = 0
+        self.checked_out = 0
+        self.max_checked_out = 0
+        self.checkouts = 0
+        self.checkout_failures: Dict[str, int] = {}
+        self.pool_clears = 0
+        self.wait_ms: Deque[float] = deque(maxlen=SAMPLE_SIZE)
+
+    def connection_check_out_started(self, event):
+        self._local.started = time.perf_counter()
+
+    def connection_checked_out(self, event):
+        started = getattr(self._local, "started", None)
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.max_checked_out = max(self.max_checked_out, self.checked_out)
+            if started is not None:
+                self.wait_ms.append((time.perf_counter() - started) * 1000)
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            reason = str(event.reason)
+            self.checkout_failures[reason] = self.checkout_failures.get(reason, 0) + 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out -= 1
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open_connections += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open_connections -= 1
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self.pool_clears += 1
+
+    def pool_created(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            waits = list(self.wait_ms)
+            return {
+                "open_connections": self.open_connections,
+                "checked_out": self.checked_out,
+                "max_checked_out": self.max_checked_out,
+                "checkouts": self.checkouts,
+                "checkout_failures": dict(self.checkout_failures),
+                "pool_clears": self.pool_clears,
+                "checkout_wait_ms": {
+                    "p50": round(_percentile(waits, 50), 3),
+                    "p99": round(_percentile(waits, 99), 3),
+                },
+            }
+
+
+pool_listener = PoolMetricsListener()
+
+
+def start_request_tracking():
+    """Begin collecting the commands of the current request; returns a reset token"""
+    return _current_request.set(RequestQueryStats())
+
+
+def finish_request_tracking(token, route: str, method: str = "") -> RequestQueryStats:
+    """Stop collecting, aggregate under route and warn on excessive query counts"""
+    stats = _current_request.get()
+    _current_request.reset(token)
+    if stats is None:
+        return RequestQueryStats()
+
+    query_metrics.record_request(route, stats)
+    if stats.count > QUERY_WARN_THRESHOLD:
+        by_command: Dict[str, int] = {}
+        for name in stats.commands:
+            by_command[name] = by_command.get(name, 0) + 1
+        performance_logger.warning(
+            "Excessive database queries in one request (possible N+1)",
+            method=method,
+            route=route,
+            query_count=stats.count,
+            threshold=QUERY_WARN_THRESHOLD,
+            db_time_ms=round(stats.total_ms, 2),
+            commands=by_command
+        )
+    return stats
+
+
+def route_name(scope: Dict[str, Any]) -> str:
+    """Route template of a served ASGI request, falling back to the raw path"""
+    route = scope.get("route")
+    if route is not None and getattr(route, "path", None):
+        return f"{scope.get('method', '')} {route.path}".strip()
+    endpoint = scope.get("endpoint")
+    if endpoint is not None:
+        return f"{scope.get('method', '')} {endpoint.__module__}.{endpoint.__name__}".strip()
+    return f"{scope.get('method', '')} {scope.get('path', '')}".strip()
@@ -0,0 +1,290 @@
+"""
+🏅 INDEX DE RANG ELO
+Un sorted set Redis par (saison, jeu, mode) : membre = user_id, score = rating.
+Le rang d'un joueur, une page du classement ou ses voisins s'obtiennent en
+O(log n) sans trier `elo_ratings`.
+
+L'index est reconstruit au démarrage (par un seul worker) et maintenu à chaque
+mise à jour de rating (matchs, dégradation, réinitialisations). Sans Redis (ou si une clé a disparu),
+les mêmes requêtes sont servies par MongoDB via l'index
+(season, game, mode, rating).
+
+Le rang suit la convention du classement : 1 + nombre de joueurs au rating
+strictement supérieur (ex-aequo au même rang).
+"""
+
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from cache import cache, single_flight
+from database import db
+from monitoring import app_logger
+
+KEY_PREFIX = "oupafamilly:elo_rank"
+REBUILD_CHUNK_SIZE = 5000
+# Une clé de travail abandonnée (worker arrêté en pleine reconstruction) expire seule
+REBUILD_STAGING_TTL = 600
+# Les workers qui démarrent pendant ce délai ne relancent pas la reconstruction
+REBUILD_LOCK_TTL = 300
+# Marge sur updated_at (horloges des serveurs) pour le rattrapage après bascule
+REBUILD_CATCH_UP_MARGIN = timedelta(seconds=5)
+
+# Rang (1 + joueurs au rating supérieur), effectif et rating en un aller-retour
+_RANK_SCRIPT = """
+local score = redis.call('ZSCORE', KEYS[1], ARGV[1])
+local total = redis.call('ZCARD', KEYS[1])
+if not score then
+    return {0, total, ''}
+end
+local higher = redis.call('ZCOUNT', KEYS[1], '(' .. score, '+inf')
+return {higher + 1, total, score}
+"""
+
+# ZADD dans un classement déjà construit uniquement : un classement perdu (Redis
+# redémarré, clé évincée) n'est pas recréé partiel par les mises à jour
+_UPDATE_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return redis.call('ZADD', KEYS[1], ARGV[2], ARGV[1])
+end
+return -1
+"""
+
+RatingEntry = Tuple[str, str, str, str, int]  # (season, game, mode, user_id, rating)
+
+
+def _decode(value: Any) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+class EloRankIndex:
+    """Classements ELO triés, par saison, jeu et mode"""
+
+    def __init__(self, redis_cache=cache):
+        self.cache = redis_cache
+        self._rank_script = None
+        self._update_script = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.cache.enabled and self.cache.async_client)
+
+    @property
+    def client(self):
+        return self.cache.async_client
+
+    def _key(self, season: str, game: str, mode: str) -> str:
+        return f"{KEY_PREFIX}:{season}:{game}:{mode}"
+
+    # ----- Maintenance -----
+
+    async def update(self, season: str, game: str, mode: str, user_id: str, rating: int):
+        """Enregistre le nouveau rating d'un joueur"""
+        await self.update_many([(season, game, mode, user_id, rating)])
+
+    async def update_many(self, entries: Iterable[RatingEntry]):
+        """Enregistre plusieurs ratings en un seul pipeline.
+
+        Les classements absents de Redis ne sont pas créés : ils sont servis par
+        MongoDB jusqu'à leur reconstruction.
+        """
+        if not self.enabled:
+            return
+        try:
+            if self._update_script is None:
+                self._update_script = self.client.register_script(_UPDATE_SCRIPT)
+            async with self.client.pipeline(transaction=False) as pipe:
+                for season, game, mode, user_id, rating in entries:
+                    await self._update_script(keys=[self._key(season, game, mode)], args=[user_id, rating], client=pipe)
+                await pipe.execute()
+        except Exception as e:
+            # L'index est reconstruit au démarrage : une mise à jour perdue n'est pas bloquante
+            app_logger.warning(f"Index de rang ELO non mis à jour: {str(e)}")
+
+    async def rebuild(self, season: str) -> Dict[str, int]:
+        """Reconstruit tous les classements d'une saison depuis elo_ratings.
+
+        Chaque classement est écrit dans une clé de travail propre à l'exécution
+        puis basculé par RENAME. Un rating mis à jour entre la lecture et la
+        bascule serait écrasé par la valeur lue : les ratings modifiés depuis le
+        début de la reconstruction sont donc réappliqués après la bascule.
+        """
+        if not self.enabled:
+            return {"leaderboards": 0, "players": 0}
+
+        started = datetime.utcnow() - REBUILD_CATCH_UP_MARGIN
+        # Seuls les classements présents avant la reconstruction peuvent être supprimés
+        existing = {
+            _decode(key) async for key in self.client.scan_iter(match=f"{KEY_PREFIX}:{season}:*")
+            if ":rebuild:" not in _decode(key)
+        }
+        boards: Dict[Tuple[str, str], Dict[str, int]] = {}
+        async for rating in db.elo_ratings.find(
+            {"season": season},
+            {"_id": 0, "user_id": 1, "game": 1, "mode": 1, "rating": 1}
+        ):
+            boards.setdefault((rating["game"], rating["mode"]), {})[rating["user_id"]] = rating.get("rating", 1200)
+
+        run_id = uuid.uuid4().hex
+        rebuilt = set()
+        for (game, mode), members in boards.items():
+            key = self._key(season, game, mode)
+            staging_key = f"{key}:rebuild:{run_id}"
+            items = list(members.items())
+            async with self.client.pipeline(transaction=False) as pipe:
+                for start in range(0, len(items), REBUILD_CHUNK_SIZE):
+                    pipe.zadd(staging_key, dict(items[start:start + REBUILD_CHUNK_SIZE]))
+                pipe.expire(staging_key, REBUILD_STAGING_TTL)
+                # Bascule atomique : les lectures voient l'ancien ou le nouvel index
+                pipe.rename(staging_key, key)
+                # RENAME conserve l'expiration de la clé de travail
+                pipe.persist(key)
+                await pipe.execute()
+            rebuilt.add(key)
+
+        # Ratings écrits pendant la reconstruction
+        await self.update_many([
+            (season, rating["game"], rating["mode"], rating["user_id"], rating["rating"])
+            async for rating in db.elo_ratings.find(
+                {"season": season, "updated_at": {"$gte": started}},
+                {"_id": 0, "user_id": 1, "game": 1, "mode": 1, "rating": 1}
+            )
+        ])
+
+        # Classements qui n'existent plus
+        stale = list(existing - rebuilt)
+        if stale:
+            await self.client.delete(*stale)
+
+        players = sum(len(members) for members in boards.values())
+        app_logger.info(f"Index de rang ELO reconstruit: {len(boards)} classements, {players} joueurs")
+        return {"leaderboards": len(boards), "players": players}
+
+    async def rebuild_once(self, season: str) -> Optional[Dict[str, int]]:
+        """Reconstruction de démarrage : seul le worker qui obtient le verrou la lance.
+
+        Retourne None quand un autre worker s'en charge (ou vient de le faire).
+        """
+        if not self.enabled:
+            return None
+        lock_key = f"{KEY_PREFIX}:rebuild_lock:{season}"
+        if not await self.client.set(lock_key, uuid.uuid4().hex, nx=True, ex=REBUILD_LOCK_TTL):
+            return None
+        return await self.rebuild(season)
+
+    def _rebuild_missing(self, seasons: Iterable[str]):
+        """Relance en arrière-plan la reconstruction d'une saison dont un classement
+        manque dans Redis alors que MongoDB a des ratings (verrou de rebuild_once)"""
+        for season in set(seasons):
+            single_flight.start(f"elo_rank:rebuild:{season}", lambda season=season: self.rebuild_once(season))
+
+    # ----- Lectures -----
+
+    async def _redis_ranks(self, lookups: List[Tuple[str, str, str, str]]) -> Optional[List[Dict[str, Any]]]:
+        if not self.enabled:
+            return None
+        try:
+            if self._rank_script is None:
+                self._rank_script = self.client.register_script(_RANK_SCRIPT)
+            async with self.client.pipeline(transaction=False) as pipe:
+                for season, game, mode, user_id in lookups:
+                    await self._rank_script(keys=[self._key(season, game, mode)], args=[user_id], client=pipe)
+                replies = await pipe.execute()
+        except Exception as e:
+            app_logger.warning(f"Index de rang ELO indisponible: {str(e)}")
+            return None
+
+        ranks = []
+        for rank, total, score in replies:
+            if not total:
+                # Classement absent de Redis (vidé ou pas encore construit)
+                return None
+            ranks.append({
+                "rank": int(rank) or None,
+                "rating": int(float(_decode(score))) if rank else None,
+                "total_players": int(total)
+            })
+        return ranks
+
+    async def _db_rank(self, season: str, game: str, mode: str, user_id: str) -> Dict[str, Any]:
+        query = {"season": season, "game": game, "mode": mode}
+        total = await db.elo_ratings.count_documents(query)
+        rating = await db.elo_ratings.find_one({**query, "user_id": user_id}, {"_id": 0, "rating": 1})
+        if not rating:
+            return {"rank": None, "rating": None, "total_players": total}
+        higher = await db.elo_ratings.count_documents({**query, "rating": {"$gt": rating["rating"]}})
+        return {"rank": higher + 1, "rating": rating["rating"], "total_players": total}
+
+    async def ranks(self, lookups: List[Tuple[str, str, str, str]]) -> List[Dict[str, Any]]:
+        """Rang de plusieurs (saison, jeu, mode, user_id) en un aller-retour Redis"""
+        if not lookups:
+            return []
+        ranks = await self._redis_ranks(lookups)
+        if ranks is None:
+            ranks = [await self._db_rank(*lookup) for lookup in lookups]
+            if self.enabled:
+                self._rebuild_missing(
+                    lookup[0] for lookup, rank in zip(lookups, ranks) if rank["total_players"]
+                )
+        return ranks
+
+    async def rank(self, season: str, game: str, mode: str, user_id: str) -> Dict[str, Any]:
+        """Rang d'un joueur : {"rank", "rating", "total_players"} (rank None s'il n'est pas classé)"""
+        return (await self.ranks([(season, game, mode, user_id)]))[0]
+
+    async def page(self, season: str, game: str, mode: str, offset: int = 0, limit: int = 50) -> List[Dict[str, Any]]:
+        """Tranche du classement [offset, offset + limit) : user_id, rating et rang"""
+        entries = None
+        if self.enabled:
+            try:
+                key = self._key(season, game, mode)
+                members = await self.client.zrevrange(key, offset, offset + limit - 1, withscores=True)
+                if members:
+                    higher = await self.client.zcount(key, f"({members[0][1]}", "+inf")
+                    entries = [(_decode(member), int(score)) for member, score in members]
+            except Exception as e:
+                app_logger.warning(f"Index de rang ELO indisponible: {str(e)}")
+
+        if entries is None:
+            query = {"season": season, "game": game, "mode": mode}
+            ratings = await db.elo_ratings.find(
+                query, {"_id": 0, "user_id": 1, "rating": 1}
+            ).sort("rating", -1).skip(offset).limit(limit).to_list(limit)
+            if not ratings:
+                return []
+            if self.enabled:
+                # MongoDB a des joueurs à cette position, pas Redis : classement manquant
+                self._rebuild_missing([season])
+            higher = await db.elo_ratings.count_documents({**query, "rating": {"$gt": ratings[0]["rating"]}})
+            entries = [(rating["user_id"], rating["rating"]) for rating in ratings]
+
+        page = []
+        rank = higher + 1
+        for position, (user_id, rating) in enumerate(entries):
+            if position and rating != entries[position - 1][1]:
+                rank = offset + position + 1
+            page.append({"user_id": user_id, "rating": rating, "rank": rank})
+        return page
+
+    async def neighbours(self, season: str, game: str, mode: str, user_id: str, radius: int = 5) -> Dict[str, Any]:
+        """Joueurs classés autour d'un joueur (radius au-dessus et en dessous)"""
+        position = None
+        if self.enabled:
+            try:
+                position = await self.client.zrevrank(self._key(season, game, mode), user_id)
+            except Exception as e:
+                app_logger.warning(f"Index de rang ELO indisponible: {str(e)}")
+
+        player = await self.rank(season, game, mode, user_id)
+        if player["rank"] is None:
+            return {**player, "neighbours": []}
+        if position is None:
+            # Sans Redis, la position dans le tri approche le rang (ex-aequo compris)
+            position = player["rank"] - 1
+
+        offset = max(0, position - radius)
+        return {**player, "neighbours": await self.page(season, game, mode, offset, position - offset + radius + 1)}
+
+
+# Instance globale de l'index de rang
+elo_rank_index = EloRankIndex()
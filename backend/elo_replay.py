@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+🔁 REJEU VECTORISÉ D'UNE SAISON ELO
+Recalcule tous les ratings d'une saison à partir de l'historique `elo_matches`
+(après un changement des règles de facteur K ou de paliers, ou pour corriger
+une dérive), produit un rapport d'écarts et réécrit `elo_ratings` et
+`user_profiles` en bulk.
+
+Les matchs sont rejoués dans l'ordre de `played_at`. Un match ne dépend que
+des matchs précédents de ses deux joueurs : les matchs sont regroupés en
+vagues sans joueur commun, et chaque vague est calculée d'un bloc avec NumPy,
+ce qui donne exactement les ratings d'un rejeu match par match.
+
+Le rejeu part de 1200 pour chaque rating : la dégradation d'inactivité et les
+réinitialisations admin, absentes de l'historique, ne sont pas rejouées. Les
+matchs par équipes (`elo_team_matches`) ne le sont pas non plus : leurs ratings
+et leurs entrées dans la carte elo_ratings des profils sont laissés intacts.
+
+Usage:
+    python elo_replay.py                  # rapport d'écarts uniquement
+    python elo_replay.py --apply          # réécrit les ratings et profils
+    python elo_replay.py --season 2025-S1
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from pymongo import UpdateOne
+
+from elo_rank_index import elo_rank_index
+from elo_system import EloEngine, EloRating, GameMode, elo_engine, main_elo_key
+from monitoring import app_logger
+
+LOAD_BATCH_SIZE = 10000
+INITIAL_RATING = 1200
+MIN_RATING = 800
+REPORT_TOP_DIFFERENCES = 20
+
+
+def calculate_k_factors(engine: EloEngine, ratings: np.ndarray, matches: np.ndarray, is_tournament: np.ndarray) -> np.ndarray:
+    """Version vectorisée de EloEngine.calculate_k_factor (à garder synchronisée)"""
+    base_k = np.where(matches < 10, 48, np.where(matches < 30, 40, engine.K_FACTOR_BASE))
+    base_k = np.where(
+        ratings > 2000, np.trunc(base_k * 0.75),
+        np.where(ratings > 1800, np.trunc(base_k * 0.85), base_k)
+    )
+    base_k = np.where(is_tournament, np.trunc(base_k * 1.5), base_k)
+    return np.clip(base_k, 16, 50).astype(np.int64)
+
+
+def check_k_factor_rules(engine: EloEngine):
+    """Vérifie que la version vectorisée reproduit calculate_k_factor.
+
+    Lève ValueError si les règles ont divergé, plutôt que de rejouer une
+    saison avec des ratings faux.
+    """
+    ratings, matches = np.meshgrid(np.arange(MIN_RATING, 2601), np.arange(0, 65), indexing="ij")
+    ratings, matches = ratings.ravel(), matches.ravel()
+    for is_tournament in (False, True):
+        vectorized = calculate_k_factors(engine, ratings, matches, np.full(ratings.shape, is_tournament))
+        for rating, played, k in zip(ratings.tolist(), matches.tolist(), vectorized.tolist()):
+            if engine.calculate_k_factor(rating, played, is_tournament) != k:
+                raise ValueError(
+                    f"calculate_k_factors diverge de calculate_k_factor "
+                    f"(rating={rating}, matchs={played}, tournoi={is_tournament})"
+                )
+
+
+class SeasonReplay:
+    """Rejeu d'une saison : chargement, calcul par vagues, rapport et réécriture"""
+
+    def __init__(self, engine: EloEngine = elo_engine, season: Optional[str] = None):
+        self.engine = engine
+        self.season = season or engine.CURRENT_SEASON
+
+        # Joueurs indexés : (user_id, game, mode) -> position dans les tableaux
+        self.keys: List[Tuple[str, str, str]] = []
+        self.key_index: Dict[Tuple[str, str, str], int] = {}
+
+        # Historique, dans l'ordre de played_at
+        self.winners = np.empty(0, dtype=np.int64)
+        self.losers = np.empty(0, dtype=np.int64)
+        self.importance = np.empty(0, dtype=np.float64)
+        self.tournament = np.empty(0, dtype=bool)
+        self.played_at: List[datetime] = []
+        self.skipped = 0
+
+        # État rejoué
+        self.ratings = np.empty(0, dtype=np.int64)
+        self.peaks = np.empty(0, dtype=np.int64)
+        self.matches_played = np.empty(0, dtype=np.int64)
+        self.wins = np.empty(0, dtype=np.int64)
+        self.losses = np.empty(0, dtype=np.int64)
+        self.last_match = np.empty(0, dtype=np.int64)
+
+        self.timings: Dict[str, float] = {}
+
+    def _key(self, user_id: str, game: str, mode: str) -> int:
+        key = (user_id, game, mode)
+        index = self.key_index.get(key)
+        if index is None:
+            index = self.key_index[key] = len(self.keys)
+            self.keys.append(key)
+        return index
+
+    async def load(self, db):
+        """Charge l'historique de la saison en flux, par lots"""
+        started = time.perf_counter()
+        winners, losers, importance, tournament = [], [], [], []
+
+        cursor = db.elo_matches.find(
+            {"season": self.season},
+            {"_id": 0, "winner_id": 1, "loser_id": 1, "game": 1, "mode": 1, "match_importance": 1, "played_at": 1}
+        ).sort("played_at", 1).batch_size(LOAD_BATCH_SIZE)
+
+        while True:
+            batch = await cursor.to_list(LOAD_BATCH_SIZE)
+            if not batch:
+                break
+            for match in batch:
+                if match["winner_id"] == match["loser_id"]:
+                    self.skipped += 1
+                    continue
+                mode = match["mode"]
+                winners.append(self._key(match["winner_id"], match["game"], mode))
+                losers.append(self._key(match["loser_id"], match["game"], mode))
+                importance.append(match.get("match_importance", 1.0))
+                # Seuls les matchs de tournoi sont enregistrés en mode tournoi
+                tournament.append(mode == GameMode.TOURNAMENT.value)
+                self.played_at.append(match["played_at"])
+
+        self.winners = np.asarray(winners, dtype=np.int64)
+        self.losers = np.asarray(losers, dtype=np.int64)
+        self.importance = np.asarray(importance, dtype=np.float64)
+        self.tournament = np.asarray(tournament, dtype=bool)
+        self.timings["load_ms"] = round((time.perf_counter() - started) * 1000, 1)
+
+    def _waves(self) -> List[np.ndarray]:
+        """Regroupe les matchs en vagues où chaque joueur apparaît au plus une fois"""
+        last_wave = [0] * len(self.keys)
+        waves = np.empty(len(self.winners), dtype=np.int64)
+        for i, (winner, loser) in enumerate(zip(self.winners.tolist(), self.losers.tolist())):
+            wave = max(last_wave[winner], last_wave[loser]) + 1
+            last_wave[winner] = last_wave[loser] = wave
+            waves[i] = wave
+
+        order = np.argsort(waves, kind="stable")
+        boundaries = np.flatnonzero(np.diff(waves[order])) + 1
+        return np.split(order, boundaries)
+
+    def replay(self):
+        """Rejoue tous les matchs chargés (mêmes règles que calculate_rating_change)"""
+        started = time.perf_counter()
+        players = len(self.keys)
+        self.ratings = np.full(players, INITIAL_RATING, dtype=np.int64)
+        self.peaks = np.full(players, INITIAL_RATING, dtype=np.int64)
+        self.matches_played = np.zeros(players, dtype=np.int64)
+        self.wins = np.zeros(players, dtype=np.int64)
+        self.losses = np.zeros(players, dtype=np.int64)
+        self.last_match = np.full(players, -1, dtype=np.int64)
+
+        for wave in self._waves():
+            winners, losers = self.winners[wave], self.losers[wave]
+            importance, tournament = self.importance[wave], self.tournament[wave]
+            winner_ratings, loser_ratings = self.ratings[winners], self.ratings[losers]
+
+            winner_expected = 1.0 / (1.0 + np.power(10.0, (loser_ratings - winner_ratings) / 400.0))
+            loser_expected = 1.0 - winner_expected
+
+            winner_k = calculate_k_factors(self.engine, winner_ratings, self.matches_played[winners], tournament)
+            loser_k = calculate_k_factors(self.engine, loser_ratings, self.matches_played[losers], tournament)
+
+            winner_change = np.trunc(winner_k * importance * (1.0 - winner_expected)).astype(np.int64)
+            loser_change = -np.trunc(loser_k * importance * (0.0 - loser_expected)).astype(np.int64)
+
+            new_winner_ratings = np.maximum(MIN_RATING, winner_ratings + winner_change)
+            new_loser_ratings = np.maximum(MIN_RATING, loser_ratings + loser_change)
+
+            self.ratings[winners] = new_winner_ratings
+            self.ratings[losers] = new_loser_ratings
+            self.peaks[winners] = np.maximum(self.peaks[winners], new_winner_ratings)
+            self.peaks[losers] = np.maximum(self.peaks[losers], new_loser_ratings)
+            self.matches_played[winners] += 1
+            self.matches_played[losers] += 1
+            self.wins[winners] += 1
+            self.losses[losers] += 1
+            self.last_match[winners] = wave
+            self.last_match[losers] = wave
+
+        self.timings["replay_ms"] = round((time.perf_counter() - started) * 1000, 1)
+
+    def _rating_document(self, index: int, now: datetime) -> Dict[str, Any]:
+        rating = int(self.ratings[index])
+        matches_played = int(self.matches_played[index])
+        tier, tier_progress = self.engine.get_elo_tier(rating)
+        return {
+            "rating": rating,
+            "peak_rating": int(self.peaks[index]),
+            "matches_played": matches_played,
+            "wins": int(self.wins[index]),
+            "losses": int(self.losses[index]),
+            "win_rate": round(int(self.wins[index]) / matches_played, 3) if matches_played else 0.0,
+            "tier": tier.value,
+            "tier_progress": tier_progress,
+            "last_match_date": self.played_at[self.last_match[index]] if self.last_match[index] >= 0 else None,
+            "updated_at": now
+        }
+
+    def _main_ratings(self) -> Dict[str, Dict[str, Any]]:
+        """Ratings rejoués par jeu/mode et pic par utilisateur"""
+        main: Dict[str, Dict[str, Any]] = {}
+        for index, (user_id, game, mode) in enumerate(self.keys):
+            peak = int(self.peaks[index])
+            profile = main.setdefault(user_id, {"ratings": {}, "peak": peak})
+            profile["ratings"][main_elo_key(game, mode)] = int(self.ratings[index])
+            profile["peak"] = max(profile["peak"], peak)
+        return main
+
+    async def diff(self, db) -> Dict[str, Any]:
+        """Compare les ratings rejoués aux ratings actuels"""
+        current = {}
+        async for rating in db.elo_ratings.find(
+            {"season": self.season},
+            {"_id": 0, "user_id": 1, "game": 1, "mode": 1, "rating": 1}
+        ):
+            current[(rating["user_id"], rating["game"], rating["mode"])] = rating.get("rating", INITIAL_RATING)
+
+        differences = []
+        new_ratings = 0
+        for index, key in enumerate(self.keys):
+            replayed = int(self.ratings[index])
+            if key not in current:
+                new_ratings += 1
+                continue
+            if current[key] != replayed:
+                differences.append({
+                    "user_id": key[0],
+                    "game": key[1],
+                    "mode": key[2],
+                    "current": current[key],
+                    "replayed": replayed,
+                    "difference": replayed - current[key]
+                })
+
+        absolute = np.abs(np.asarray([d["difference"] for d in differences], dtype=np.int64))
+        differences.sort(key=lambda d: abs(d["difference"]), reverse=True)
+        return {
+            "compared": len(self.keys) - new_ratings,
+            "changed": len(differences),
+            "unchanged": len(self.keys) - new_ratings - len(differences),
+            "missing_ratings": new_ratings,
+            "not_in_history": len(set(current) - set(self.key_index)),
+            "max_abs_difference": int(absolute.max()) if len(absolute) else 0,
+            "mean_abs_difference": round(float(absolute.mean()), 2) if len(absolute) else 0.0,
+            "largest_differences": differences[:REPORT_TOP_DIFFERENCES]
+        }
+
+    async def write_back(self, db) -> Dict[str, int]:
+        """Réécrit elo_ratings et user_profiles, un bulk_write par collection"""
+        started = time.perf_counter()
+        now = datetime.utcnow()
+
+        rating_operations = []
+        for index, (user_id, game, mode) in enumerate(self.keys):
+            new_rating = EloRating(user_id=user_id, game=game, mode=GameMode(mode), season=self.season)
+            rating_operations.append(UpdateOne(
+                {"user_id": user_id, "game": game, "mode": mode, "season": self.season},
+                {
+                    "$setOnInsert": {"id": new_rating.id, "created_at": new_rating.created_at},
+                    "$set": self._rating_document(index, now)
+                },
+                upsert=True
+            ))
+
+        # Les profils ne portent que la saison courante ; les ratings rejoués sont
+        # fusionnés dans leur carte, sans toucher aux entrées non rejouées (équipes)
+        profile_operations = []
+        if self.season == self.engine.CURRENT_SEASON:
+            for user_id, profile in self._main_ratings().items():
+                profile_operations.append(UpdateOne(
+                    {"user_id": user_id},
+                    self.engine.main_elo_update(profile["ratings"], peak=profile["peak"])
+                ))
+
+        if rating_operations:
+            await db.elo_ratings.bulk_write(rating_operations, ordered=False)
+        if profile_operations:
+            await db.user_profiles.bulk_write(profile_operations, ordered=False)
+
+        self.timings["write_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        return {"ratings_written": len(rating_operations), "profiles_written": len(profile_operations)}
+
+
+async def replay_season(db, season: Optional[str] = None, apply: bool = False, engine: EloEngine = elo_engine) -> Dict[str, Any]:
+    """Rejoue une saison et retourne le rapport d'écarts ; réécrit les ratings si apply"""
+    # Calculs CPU hors de la boucle d'évènements : l'API reste disponible pendant le rejeu
+    await asyncio.to_thread(check_k_factor_rules, engine)
+
+    replay = SeasonReplay(engine, season)
+    await replay.load(db)
+    await asyncio.to_thread(replay.replay)
+    report = {
+        "season": replay.season,
+        "matches_replayed": len(replay.winners),
+        "matches_skipped": replay.skipped,
+        "players": len(replay.keys),
+        "differences": await replay.diff(db),
+        "applied": apply
+    }
+
+    if apply:
+        report.update(await replay.write_back(db))
+        await elo_rank_index.rebuild(replay.season)
+        engine.note_rating_changes(report["differences"]["changed"])
+        app_logger.info(
+            f"Saison {replay.season} rejouée: {report['matches_replayed']} matchs, "
+            f"{report['differences']['changed']} ratings corrigés"
+        )
+
+    report["timings"] = replay.timings
+    return report
+
+
+async def _main(season: Optional[str], apply: bool) -> int:
+    from database import db, client
+
+    try:
+        report = await replay_season(db, season=season, apply=apply)
+        print(json.dumps(report, indent=2, default=str, ensure_ascii=False))
+        return 0
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    sys.path.append(str(Path(__file__).parent))
+    parser = argparse.ArgumentParser(description="Rejeu d'une saison ELO à partir de elo_matches")
+    parser.add_argument("--season", help="saison à rejouer (par défaut la saison courante)")
+    parser.add_argument("--apply", action="store_true", help="réécrire elo_ratings et user_profiles")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(_main(args.season, args.apply)))
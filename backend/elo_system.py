@@ -3,14 +3,20 @@
 Calcul intelligent du classement des joueurs basé sur performances tournois
 """
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime, timedelta
 from enum import Enum
 import uuid
 import math
-from database import db
+import os
+import time
+import numpy as np
+from pymongo import InsertOne, ReturnDocument, UpdateOne
+from cache import single_flight
+from database import db, analytics_db
 from monitoring import app_logger, log_user_action
+from elo_rank_index import elo_rank_index
 
 class EloTier(str, Enum):
     """Niveaux ELO avec paliers"""
@@ -84,6 +90,208 @@ class SeasonStats(BaseModel):
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
+class EloMatchResult(BaseModel):
+    """Résultat de match à traiter (paramètres de process_match_result)"""
+    winner_id: str
+    loser_id: str
+    game: str
+    mode: GameMode = GameMode.TOURNAMENT
+    match_id: Optional[str] = None
+    tournament_id: Optional[str] = None
+    is_tournament: bool = True
+    match_importance: float = 1.0
+    
+    @model_validator(mode="after")
+    def _distinct_players(self) -> "EloMatchResult":
+        if self.winner_id == self.loser_id:
+            raise ValueError("Un joueur ne peut pas être à la fois gagnant et perdant")
+        return self
+
+class EloTeamMatchResult(BaseModel):
+    """Résultat d'un match par équipes : composition des deux camps"""
+    winner_ids: List[str] = Field(..., min_length=1)
+    loser_ids: List[str] = Field(..., min_length=1)
+    game: str
+    mode: GameMode = GameMode.TEAM
+    match_id: Optional[str] = None
+    tournament_id: Optional[str] = None
+    is_tournament: bool = False
+    match_importance: float = 1.0
+
+class EloTeamMatch(BaseModel):
+    """Match par équipes enregistré pour l'historique ELO"""
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    match_id: str
+    tournament_id: Optional[str] = None
+    game: str
+    mode: GameMode
+    winner_ids: List[str]
+    loser_ids: List[str]
+    winner_team_rating: float  # Moyenne des ratings avant le match
+    loser_team_rating: float
+    changes: Dict[str, int]  # Changement de rating par joueur
+    match_importance: float = 1.0
+    season: str = "2025-S1"
+    played_at: datetime = Field(default_factory=datetime.utcnow)
+
+# Champs d'une ligne du classement ELO
+LEADERBOARD_FIELDS = {
+    "_id": 0, "user_id": 1, "game": 1, "mode": 1, "rating": 1, "peak_rating": 1, "tier": 1,
+    "tier_progress": 1, "matches_played": 1, "wins": 1, "losses": 1, "win_rate": 1, "last_match_date": 1
+}
+
+# Marqueur de la migration initialisant elo_ratings dans les profils
+MAIN_ELO_MIGRATION = "main_elo_ratings"
+
+def main_elo_key(game: str, mode: str) -> str:
+    """Clé d'un rating dans le champ elo_ratings du profil"""
+    return f"{game}_{mode}"
+
+# Paliers : (tier, plancher, borne exclue, amplitude de la progression)
+TIER_THRESHOLDS = [
+    (EloTier.BRONZE, 0, 1000, 1000),
+    (EloTier.SILVER, 1000, 1200, 200),
+    (EloTier.GOLD, 1200, 1400, 200),
+    (EloTier.PLATINUM, 1400, 1600, 200),
+    (EloTier.DIAMOND, 1600, 1800, 200),
+    (EloTier.MASTER, 1800, 2000, 200),
+    (EloTier.GRANDMASTER, 2000, 2200, 200),
+    (EloTier.CHALLENGER, 2200, None, 300),
+]
+
+class _RatingBatch:
+    """Ratings d'un lot de matchs tenus en mémoire, persistés en un bulk_write par collection"""
+    
+    def __init__(self, engine: "EloEngine", existing: List[Dict[str, Any]]):
+        self.engine = engine
+        self.ratings: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+        self.ratings_by_user: Dict[str, List[Dict[str, Any]]] = {}
+        # Rating lu au chargement : le lot n'écrit que sa variation par rapport à lui
+        self.loaded: Dict[Tuple[str, str, str], int] = {}
+        for rating in existing:
+            key = (rating["user_id"], rating["game"], rating["mode"])
+            self.ratings[key] = rating
+            self.loaded[key] = rating.get("rating", 1200)
+            self.ratings_by_user.setdefault(rating["user_id"], []).append(rating)
+        
+        # Changements accumulés par rating et par profil
+        self.rating_changes: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+        self.profile_changes: Dict[str, Dict[str, Any]] = {}
+    
+    @classmethod
+    async def load(cls, engine: "EloEngine", user_ids) -> "_RatingBatch":
+        # Tous les ratings de la saison des joueurs concernés (nécessaires à l'ELO principal)
+        existing = await db.elo_ratings.find(
+            {"user_id": {"$in": list(user_ids)}, "season": engine.CURRENT_SEASON},
+            {"_id": 0}
+        ).to_list(None)
+        return cls(engine, existing)
+    
+    def get_or_create(self, user_id: str, game: str, mode: GameMode) -> Dict[str, Any]:
+        key = (user_id, game, mode.value)
+        if key not in self.ratings:
+            new_rating = EloRating(user_id=user_id, game=game, mode=mode, season=self.engine.CURRENT_SEASON).dict()
+            new_rating["mode"] = mode.value
+            new_rating["tier"] = new_rating["tier"].value
+            self.ratings[key] = new_rating
+            self.loaded[key] = new_rating["rating"]
+            self.ratings_by_user.setdefault(user_id, []).append(new_rating)
+        return self.ratings[key]
+    
+    def apply(self, user_id: str, game: str, mode: GameMode, new_rating: int, won: bool, now: datetime):
+        key = (user_id, game, mode.value)
+        rating = self.ratings[key]
+        tier, tier_progress = self.engine.get_elo_tier(new_rating)
+        
+        rating["matches_played"] = rating.get("matches_played", 0) + 1
+        rating["wins" if won else "losses"] = rating.get("wins" if won else "losses", 0) + 1
+        rating["win_rate"] = round(rating.get("wins", 0) / rating["matches_played"], 3)
+        rating["rating"] = new_rating
+        rating["peak_rating"] = max(rating.get("peak_rating", new_rating), new_rating)
+        rating["tier"] = tier.value
+        rating["tier_progress"] = tier_progress
+        rating["last_match_date"] = now
+        rating["updated_at"] = now
+        
+        change = self.rating_changes.setdefault(key, {"matches_played": 0, "wins": 0, "losses": 0})
+        change["matches_played"] += 1
+        change["wins" if won else "losses"] += 1
+        
+        # ELO principal : meilleur rating de la saison, tous jeux confondus
+        highest_rating = max(r["rating"] for r in self.ratings_by_user[user_id])
+        profile = self.profile_changes.setdefault(user_id, {"peak_elo": highest_rating})
+        profile["elo_rating"] = highest_rating
+        profile["peak_elo"] = max(profile["peak_elo"], highest_rating)
+    
+    async def write(self) -> Tuple[int, int]:
+        """Écrit les ratings et profils modifiés ; retourne leur nombre.
+        
+        Comme pour un match isolé, chaque rating reçoit la variation du lot
+        (rating final - rating chargé) et non une valeur absolue : un résultat
+        enregistré en parallèle n'est pas écrasé. Les profils fusionnent les
+        ratings enregistrés dans leur carte elo_ratings.
+        """
+        season = self.engine.CURRENT_SEASON
+        tier, tier_progress = self.engine.tier_expressions("$rating")
+        rating_operations = []
+        for key, change in self.rating_changes.items():
+            user_id, game, mode = key
+            rating = self.ratings[key]
+            delta = rating["rating"] - self.loaded[key]
+            rating_operations.append(UpdateOne(
+                {"user_id": user_id, "game": game, "mode": mode, "season": season},
+                [
+                    {"$set": {
+                        "id": {"$ifNull": ["$id", rating.get("id")]},
+                        "created_at": {"$ifNull": ["$created_at", rating.get("created_at")]},
+                        "rating": {"$max": [800, {"$add": [{"$ifNull": ["$rating", self.loaded[key]]}, delta]}]},
+                        "matches_played": {"$add": [{"$ifNull": ["$matches_played", 0]}, change["matches_played"]]},
+                        "wins": {"$add": [{"$ifNull": ["$wins", 0]}, change["wins"]]},
+                        "losses": {"$add": [{"$ifNull": ["$losses", 0]}, change["losses"]]},
+                        "last_match_date": rating["last_match_date"],
+                        "updated_at": rating["updated_at"]
+                    }},
+                    {"$set": {
+                        "peak_rating": {"$max": [{"$ifNull": ["$peak_rating", "$rating"]}, rating["peak_rating"], "$rating"]},
+                        "win_rate": {"$round": [{"$divide": ["$wins", "$matches_played"]}, 3]},
+                        "tier": tier,
+                        "tier_progress": tier_progress
+                    }}
+                ],
+                upsert=True
+            ))
+        await db.elo_ratings.bulk_write(rating_operations, ordered=False)
+        
+        # Ratings réellement enregistrés (variations concurrentes comprises)
+        stored = {
+            (rating["user_id"], rating["game"], rating["mode"]): rating["rating"]
+            async for rating in db.elo_ratings.find(
+                {"user_id": {"$in": list(self.profile_changes)}, "season": season},
+                {"_id": 0, "user_id": 1, "game": 1, "mode": 1, "rating": 1}
+            )
+        }
+        updated = {key: stored.get(key, self.ratings[key]["rating"]) for key in self.rating_changes}
+        
+        profile_ratings: Dict[str, Dict[str, int]] = {}
+        for (user_id, game, mode), rating in updated.items():
+            profile_ratings.setdefault(user_id, {})[main_elo_key(game, mode)] = rating
+        profile_operations = [
+            UpdateOne(
+                {"user_id": user_id},
+                # Pic atteint pendant le lot, en plus du recalcul de l'ELO principal
+                self.engine.main_elo_update(ratings) + [
+                    {"$set": {"peak_elo": {"$max": ["$peak_elo", self.profile_changes[user_id]["peak_elo"]]}}}
+                ]
+            )
+            for user_id, ratings in profile_ratings.items()
+        ]
+        await db.user_profiles.bulk_write(profile_operations, ordered=False)
+        await elo_rank_index.update_many(
+            (season, game, mode, user_id, rating) for (user_id, game, mode), rating in updated.items()
+        )
+        self.engine.note_rating_changes(len(self.rating_changes))
+        return len(rating_operations), len(profile_operations)
+
 class EloEngine:
     """Moteur de calcul ELO intelligent"""
     
@@ -92,25 +300,33 @@ class EloEngine:
         self.CURRENT_SEASON = "2025-S1"
         self.DECAY_THRESHOLD_DAYS = 30  # Seuil de déclin d'inactivité
         self.DECAY_AMOUNT = 25  # Points perdus par période d'inactivité
+        self.DECAY_BATCH_SIZE = 1000  # Ratings écrits par bulk_write lors de la dégradation
+        # Instantané des statistiques globales : recalculé après ce délai ou ce nombre de ratings modifiés
+        self.STATS_REFRESH_SECONDS = int(os.environ.get('ELO_STATS_REFRESH_SECONDS', '300'))
+        self.STATS_REFRESH_CHANGES = int(os.environ.get('ELO_STATS_REFRESH_CHANGES', '500'))
+        self._stats_snapshot: Optional[Dict[str, Any]] = None
+        self._stats_changes = 0
     
     def get_elo_tier(self, rating: int) -> Tuple[EloTier, int]:
         """Retourne le tier et la progression basé sur le rating"""
-        if rating < 1000:
-            return EloTier.BRONZE, min(100, int((rating / 1000) * 100))
-        elif rating < 1200:
-            return EloTier.SILVER, int(((rating - 1000) / 200) * 100)
-        elif rating < 1400:
-            return EloTier.GOLD, int(((rating - 1200) / 200) * 100)
-        elif rating < 1600:
-            return EloTier.PLATINUM, int(((rating - 1400) / 200) * 100)
-        elif rating < 1800:
-            return EloTier.DIAMOND, int(((rating - 1600) / 200) * 100)
-        elif rating < 2000:
-            return EloTier.MASTER, int(((rating - 1800) / 200) * 100)
-        elif rating < 2200:
-            return EloTier.GRANDMASTER, int(((rating - 2000) / 200) * 100)
-        else:
-            return EloTier.CHALLENGER, min(100, int(((rating - 2200) / 300) * 100))
+        for tier, floor, upper, span in TIER_THRESHOLDS:
+            if upper is None or rating < upper:
+                return tier, min(100, int(((rating - floor) / span) * 100))
+    
+    def tier_expressions(self, rating: Any) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Expressions d'agrégation (tier, progression) équivalentes à get_elo_tier"""
+        tier_branches, progress_branches = [], []
+        for tier, floor, upper, span in TIER_THRESHOLDS:
+            progress = {"$toInt": {"$min": [100, {"$trunc": {"$multiply": [
+                {"$divide": [{"$subtract": [rating, floor]}, span]}, 100
+            ]}}]}}
+            if upper is None:
+                return (
+                    {"$switch": {"branches": tier_branches, "default": tier.value}},
+                    {"$switch": {"branches": progress_branches, "default": progress}}
+                )
+            tier_branches.append({"case": {"$lt": [rating, upper]}, "then": tier.value})
+            progress_branches.append({"case": {"$lt": [rating, upper]}, "then": progress})
     
     def calculate_k_factor(self, rating: int, matches_played: int, is_tournament: bool = False) -> int:
         """Calcule le facteur K adaptatif"""
@@ -203,8 +419,8 @@ class EloEngine:
             loser_change = new_loser_rating - loser_rating_before
             
             # Mettre à jour les ratings dans la base
-            await self._update_elo_rating(winner_id, game, mode, new_winner_rating, True)
-            await self._update_elo_rating(loser_id, game, mode, new_loser_rating, False)
+            await self._update_elo_rating(winner_id, game, mode, winner_rating_before, new_winner_rating, True)
+            await self._update_elo_rating(loser_id, game, mode, loser_rating_before, new_loser_rating, False)
             
             # Enregistrer le match ELO
             elo_match = EloMatch(
@@ -295,93 +511,391 @@ class EloEngine:
             app_logger.error(f"Erreur get/create ELO rating: {str(e)}")
             raise
     
-    async def _update_elo_rating(self, user_id: str, game: str, mode: GameMode, new_rating: int, won: bool):
-        """Met à jour le rating ELO d'un utilisateur"""
+    async def _update_elo_rating(
+        self, user_id: str, game: str, mode: GameMode, rating_before: int, new_rating: int, won: bool
+    ) -> int:
+        """Met à jour le rating ELO d'un utilisateur (une seule écriture atomique).
+        
+        Le changement (new_rating - rating_before) est appliqué en delta au rating
+        stocké, avec le plancher de 800 : un résultat traité en parallèle pour le
+        même joueur n'est pas perdu. Chaque changement reste calculé à partir du
+        rating lu avant le match. Retourne le rating enregistré.
+        """
         try:
-            # Calculer tier et progression
-            tier, tier_progress = self.get_elo_tier(new_rating)
-            
-            # Préparer la mise à jour
-            update_data = {
-                "$set": {
-                    "rating": new_rating,
-                    "tier": tier.value,
-                    "tier_progress": tier_progress,
-                    "last_match_date": datetime.utcnow(),
-                    "updated_at": datetime.utcnow()
-                },
-                "$inc": {
-                    "matches_played": 1,
-                    "wins" if won else "losses": 1
-                },
-                "$max": {
-                    "peak_rating": new_rating
-                }
-            }
-            
-            # Mettre à jour le taux de victoire
-            current_rating = await db.elo_ratings.find_one({
-                "user_id": user_id,
-                "game": game,
-                "mode": mode.value,
-                "season": self.CURRENT_SEASON
-            })
-            
-            if current_rating:
-                total_matches = current_rating.get("matches_played", 0) + 1
-                current_wins = current_rating.get("wins", 0) + (1 if won else 0)
-                win_rate = (current_wins / total_matches) if total_matches > 0 else 0.0
-                update_data["$set"]["win_rate"] = round(win_rate, 3)
+            now = datetime.utcnow()
+            result_field = "wins" if won else "losses"
+            tier, tier_progress = self.tier_expressions("$rating")
             
-            await db.elo_ratings.update_one(
+            updated = await db.elo_ratings.find_one_and_update(
                 {
                     "user_id": user_id,
                     "game": game,
                     "mode": mode.value,
                     "season": self.CURRENT_SEASON
                 },
-                update_data
+                [
+                    {"$set": {
+                        "rating": {"$max": [800, {"$add": [
+                            {"$ifNull": ["$rating", rating_before]}, new_rating - rating_before
+                        ]}]},
+                        "matches_played": {"$add": [{"$ifNull": ["$matches_played", 0]}, 1]},
+                        result_field: {"$add": [{"$ifNull": [f"${result_field}", 0]}, 1]},
+                        "last_match_date": now,
+                        "updated_at": now
+                    }},
+                    {"$set": {
+                        "peak_rating": {"$max": [{"$ifNull": ["$peak_rating", "$rating"]}, "$rating"]},
+                        "win_rate": {"$round": [{"$divide": [{"$ifNull": ["$wins", 0]}, "$matches_played"]}, 3]},
+                        "tier": tier,
+                        "tier_progress": tier_progress
+                    }}
+                ],
+                projection={"_id": 0, "rating": 1},
+                return_document=ReturnDocument.AFTER
             )
+            stored_rating = updated["rating"] if updated else new_rating
+            await elo_rank_index.update(self.CURRENT_SEASON, game, mode.value, user_id, stored_rating)
+            self.note_rating_changes()
             
             # Mettre à jour le profil utilisateur principal avec l'ELO global
-            await self._update_user_main_elo(user_id, new_rating)
+            await self._update_user_main_elo(user_id, game, mode, stored_rating)
+            return stored_rating
             
         except Exception as e:
             app_logger.error(f"Erreur mise à jour ELO rating: {str(e)}")
             raise
     
-    async def _update_user_main_elo(self, user_id: str, new_rating: int):
-        """Met à jour l'ELO principal dans le profil utilisateur"""
+    def _main_elo_pipeline(self, elo_ratings: Any, peak: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Étapes qui écrivent la carte elo_ratings du profil puis en recalculent
+        l'ELO principal (maximum), son tier et le pic ; peak remplace le pic stocké"""
+        tier, tier_progress = self.tier_expressions("$elo_rating")
+        stored_peak = peak if peak is not None else {"$cond": [{"$isNumber": "$peak_elo"}, "$peak_elo", "$elo_rating"]}
+        return [
+            {"$set": {"elo_ratings": elo_ratings, "elo_ratings_season": self.CURRENT_SEASON}},
+            {"$set": {
+                "elo_rating": {"$max": {"$map": {"input": {"$objectToArray": "$elo_ratings"}, "in": "$$this.v"}}}
+            }},
+            {"$set": {
+                "peak_elo": {"$max": [stored_peak, "$elo_rating"]},
+                "elo_tier": tier,
+                "elo_tier_progress": tier_progress,
+                "updated_at": datetime.utcnow()
+            }}
+        ]
+    
+    def main_elo_update(self, ratings: Dict[str, int], peak: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Mise à jour (pipeline) du profil fusionnant des ratings de la saison.
+        
+        ratings est indexé par main_elo_key ; les autres entrées de la carte
+        (autres jeux, modes équipe) sont conservées, celles d'une saison
+        précédente abandonnées. L'ELO principal est recalculé dans la même écriture.
+        """
+        return self._main_elo_pipeline({"$mergeObjects": [
+            # Les ratings d'une saison précédente ne comptent plus
+            {"$cond": [
+                {"$eq": ["$elo_ratings_season", self.CURRENT_SEASON]},
+                {"$ifNull": ["$elo_ratings", {}]},
+                {}
+            ]},
+            {"$literal": ratings}
+        ]}, peak)
+    
+    async def _update_user_main_elo(self, user_id: str, game: str, mode: GameMode, new_rating: int):
+        """Met à jour l'ELO principal dans le profil utilisateur.
+        
+        Le profil garde les ratings de la saison par jeu/mode (elo_ratings) ;
+        l'ELO principal en est le maximum, recalculé dans la même écriture.
+        """
         try:
-            # Récupérer l'ELO le plus élevé de l'utilisateur (tous jeux confondus)
-            pipeline = [
-                {"$match": {"user_id": user_id, "season": self.CURRENT_SEASON}},
-                {"$group": {"_id": None, "max_rating": {"$max": "$rating"}}}
-            ]
-            
-            result = await db.elo_ratings.aggregate(pipeline).to_list(1)
-            highest_rating = result[0]["max_rating"] if result else new_rating
-            
-            # Calculer tier global
-            tier, tier_progress = self.get_elo_tier(highest_rating)
-            
-            # Mettre à jour le profil utilisateur
             await db.user_profiles.update_one(
                 {"user_id": user_id},
-                {
-                    "$set": {
-                        "elo_rating": highest_rating,
-                        "peak_elo": {"$max": ["$peak_elo", highest_rating]},
-                        "elo_tier": tier.value,
-                        "elo_tier_progress": tier_progress,
-                        "updated_at": datetime.utcnow()
-                    }
-                }
+                self.main_elo_update({main_elo_key(game, mode.value): new_rating})
             )
             
         except Exception as e:
             app_logger.error(f"Erreur mise à jour ELO principal: {str(e)}")
     
+    async def sync_main_elo_ratings(self):
+        """Recopie les ratings de la saison dans les profils et recalcule l'ELO principal"""
+        await db.elo_ratings.aggregate([
+            {"$match": {"season": self.CURRENT_SEASON}},
+            {"$group": {
+                "_id": "$user_id",
+                "ratings": {"$push": {"k": {"$concat": ["$game", "_", "$mode"]}, "v": "$rating"}}
+            }},
+            {"$project": {
+                "_id": 0,
+                "user_id": "$_id",
+                "elo_ratings": {"$arrayToObject": "$ratings"}
+            }},
+            {"$merge": {
+                "into": "user_profiles",
+                "on": "user_id",
+                "whenMatched": self._main_elo_pipeline("$$new.elo_ratings"),
+                "whenNotMatched": "discard"
+            }}
+        ]).to_list(None)
+    
+    async def ensure_main_elo_ratings(self) -> bool:
+        """Migration unique initialisant les ELO principaux maintenus.
+        
+        Le premier worker qui pose le marqueur l'exécute ; les suivants (et les
+        redémarrages) n'ont rien à faire. Retourne True si la migration a tourné.
+        """
+        claim = await db.elo_migrations.update_one(
+            {"_id": MAIN_ELO_MIGRATION},
+            {"$setOnInsert": {"started_at": datetime.utcnow()}},
+            upsert=True
+        )
+        if claim.upserted_id is None:
+            return False
+        
+        try:
+            await self.sync_main_elo_ratings()
+        except Exception:
+            # Marqueur retiré : la migration sera retentée au prochain démarrage
+            await db.elo_migrations.delete_one({"_id": MAIN_ELO_MIGRATION})
+            raise
+        await db.elo_migrations.update_one(
+            {"_id": MAIN_ELO_MIGRATION},
+            {"$set": {"completed_at": datetime.utcnow()}}
+        )
+        app_logger.info("ELO principaux initialisés dans les profils")
+        return True
+    
+    async def process_match_results_bulk(self, results: List[EloMatchResult]) -> Dict[str, Any]:
+        """Traite une liste ordonnée de résultats de matchs en une seule passe.
+
+        Les matchs sont appliqués dans l'ordre sur un état en mémoire, avec les
+        mêmes règles que process_match_result (les ratings obtenus sont donc
+        identiques), puis persistés avec un seul bulk_write par collection.
+        """
+        if not results:
+            return {"processed": 0, "results": [], "ratings_updated": 0, "profiles_updated": 0}
+        
+        try:
+            batch = await _RatingBatch.load(
+                self, {r.winner_id for r in results} | {r.loser_id for r in results}
+            )
+            elo_matches = []
+            processed = []
+            
+            for result in results:
+                winner_elo = batch.get_or_create(result.winner_id, result.game, result.mode)
+                loser_elo = batch.get_or_create(result.loser_id, result.game, result.mode)
+                
+                winner_rating_before = winner_elo["rating"]
+                loser_rating_before = loser_elo["rating"]
+                
+                new_winner_rating, new_loser_rating = self.calculate_rating_change(
+                    winner_rating_before,
+                    loser_rating_before,
+                    winner_elo["matches_played"],
+                    loser_elo["matches_played"],
+                    result.is_tournament,
+                    result.match_importance
+                )
+                
+                now = datetime.utcnow()
+                batch.apply(result.winner_id, result.game, result.mode, new_winner_rating, True, now)
+                batch.apply(result.loser_id, result.game, result.mode, new_loser_rating, False, now)
+                
+                winner_change = new_winner_rating - winner_rating_before
+                loser_change = new_loser_rating - loser_rating_before
+                
+                elo_match = EloMatch(
+                    match_id=result.match_id or str(uuid.uuid4()),
+                    tournament_id=result.tournament_id,
+                    game=result.game,
+                    mode=result.mode,
+                    winner_id=result.winner_id,
+                    loser_id=result.loser_id,
+                    winner_rating_before=winner_rating_before,
+                    loser_rating_before=loser_rating_before,
+                    winner_rating_after=new_winner_rating,
+                    loser_rating_after=new_loser_rating,
+                    rating_change=winner_change,
+                    match_importance=result.match_importance,
+                    season=self.CURRENT_SEASON,
+                    played_at=now
+                )
+                elo_matches.append(elo_match.dict())
+                
+                processed.append({
+                    "winner": {
+                        "user_id": result.winner_id,
+                        "rating_before": winner_rating_before,
+                        "rating_after": new_winner_rating,
+                        "change": winner_change
+                    },
+                    "loser": {
+                        "user_id": result.loser_id,
+                        "rating_before": loser_rating_before,
+                        "rating_after": new_loser_rating,
+                        "change": loser_change
+                    },
+                    "match_id": elo_match.id
+                })
+            
+            # Persistance : un bulk_write par collection
+            ratings_updated, profiles_updated = await batch.write()
+            await db.elo_matches.bulk_write([InsertOne(match) for match in elo_matches], ordered=False)
+            
+            for entry in processed:
+                for side, outcome in (("winner", "win"), ("loser", "loss")):
+                    log_user_action(entry[side]["user_id"], "elo_rating_updated", {
+                        "old_rating": entry[side]["rating_before"],
+                        "new_rating": entry[side]["rating_after"],
+                        "change": entry[side]["change"],
+                        "result": outcome,
+                        "batch": True
+                    })
+            
+            app_logger.info(f"ELO mis à jour en lot: {len(processed)} matchs, {ratings_updated} ratings, {profiles_updated} profils")
+            
+            return {
+                "processed": len(processed),
+                "results": processed,
+                "ratings_updated": ratings_updated,
+                "profiles_updated": profiles_updated
+            }
+            
+        except Exception as e:
+            app_logger.error(f"Erreur traitement lot de matchs ELO: {str(e)}")
+            raise
+    
+    def calculate_team_rating_changes(
+        self,
+        winner_ratings: List[int],
+        loser_ratings: List[int],
+        winner_matches: List[int],
+        loser_matches: List[int],
+        is_tournament: bool = False,
+        match_importance: float = 1.0
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Calcule les nouveaux ratings de tous les membres de deux équipes.
+
+        Le score attendu est celui de la moyenne des ratings de chaque équipe ;
+        chaque membre garde son propre facteur K. Changement = K × importance ×
+        (score - attendu), avec un score de 1 pour les gagnants et 0 pour les
+        perdants, et un plancher de 800.
+        """
+        winners = np.asarray(winner_ratings, dtype=np.int64)
+        losers = np.asarray(loser_ratings, dtype=np.int64)
+        
+        winner_expected = self.calculate_expected_score(winners.mean(), losers.mean())
+        loser_expected = 1.0 - winner_expected
+        
+        winner_k = np.array([
+            self.calculate_k_factor(int(rating), matches, is_tournament)
+            for rating, matches in zip(winners, winner_matches)
+        ])
+        loser_k = np.array([
+            self.calculate_k_factor(int(rating), matches, is_tournament)
+            for rating, matches in zip(losers, loser_matches)
+        ])
+        
+        winner_changes = np.trunc(winner_k * match_importance * (1.0 - winner_expected)).astype(np.int64)
+        loser_changes = np.trunc(loser_k * match_importance * (0.0 - loser_expected)).astype(np.int64)
+        
+        return np.maximum(800, winners + winner_changes), np.maximum(800, losers + loser_changes)
+    
+    async def process_team_match_results(self, results: List[EloTeamMatchResult]) -> Dict[str, Any]:
+        """Traite une liste ordonnée de matchs par équipes (2v2, 5v5...).
+
+        Tous les membres d'un match sont mis à jour en une opération vectorisée ;
+        le lot entier est persisté avec un bulk_write par collection.
+        """
+        if not results:
+            return {"processed": 0, "results": [], "ratings_updated": 0, "profiles_updated": 0}
+        
+        for result in results:
+            rosters = result.winner_ids + result.loser_ids
+            if len(set(rosters)) != len(rosters):
+                raise ValueError("Un joueur ne peut apparaître qu'une fois par match")
+        
+        try:
+            batch = await _RatingBatch.load(
+                self, {user_id for r in results for user_id in r.winner_ids + r.loser_ids}
+            )
+            team_matches = []
+            processed = []
+            
+            for result in results:
+                winner_elos = [batch.get_or_create(user_id, result.game, result.mode) for user_id in result.winner_ids]
+                loser_elos = [batch.get_or_create(user_id, result.game, result.mode) for user_id in result.loser_ids]
+                winners_before = [elo["rating"] for elo in winner_elos]
+                losers_before = [elo["rating"] for elo in loser_elos]
+                
+                winners_after, losers_after = self.calculate_team_rating_changes(
+                    winners_before,
+                    losers_before,
+                    [elo["matches_played"] for elo in winner_elos],
+                    [elo["matches_played"] for elo in loser_elos],
+                    result.is_tournament,
+                    result.match_importance
+                )
+                
+                now = datetime.utcnow()
+                sides = {}
+                for side, user_ids, before, after, won in (
+                    ("winners", result.winner_ids, winners_before, winners_after, True),
+                    ("losers", result.loser_ids, losers_before, losers_after, False)
+                ):
+                    sides[side] = []
+                    for user_id, rating_before, rating_after in zip(user_ids, before, after.tolist()):
+                        batch.apply(user_id, result.game, result.mode, rating_after, won, now)
+                        sides[side].append({
+                            "user_id": user_id,
+                            "rating_before": rating_before,
+                            "rating_after": rating_after,
+                            "change": rating_after - rating_before
+                        })
+                
+                team_match = EloTeamMatch(
+                    match_id=result.match_id or str(uuid.uuid4()),
+                    tournament_id=result.tournament_id,
+                    game=result.game,
+                    mode=result.mode,
+                    winner_ids=result.winner_ids,
+                    loser_ids=result.loser_ids,
+                    winner_team_rating=round(sum(winners_before) / len(winners_before), 1),
+                    loser_team_rating=round(sum(losers_before) / len(losers_before), 1),
+                    changes={entry["user_id"]: entry["change"] for entry in sides["winners"] + sides["losers"]},
+                    match_importance=result.match_importance,
+                    season=self.CURRENT_SEASON,
+                    played_at=now
+                )
+                team_matches.append(team_match.dict())
+                processed.append({**sides, "match_id": team_match.id})
+            
+            ratings_updated, profiles_updated = await batch.write()
+            await db.elo_team_matches.bulk_write([InsertOne(match) for match in team_matches], ordered=False)
+            
+            for entry in processed:
+                for side, outcome in (("winners", "win"), ("losers", "loss")):
+                    for member in entry[side]:
+                        log_user_action(member["user_id"], "elo_rating_updated", {
+                            "old_rating": member["rating_before"],
+                            "new_rating": member["rating_after"],
+                            "change": member["change"],
+                            "result": outcome,
+                            "team": True
+                        })
+            
+            app_logger.info(f"ELO équipes mis à jour: {len(processed)} matchs, {ratings_updated} ratings, {profiles_updated} profils")
+            
+            return {
+                "processed": len(processed),
+                "results": processed,
+                "ratings_updated": ratings_updated,
+                "profiles_updated": profiles_updated
+            }
+            
+        except Exception as e:
+            app_logger.error(f"Erreur traitement matchs ELO par équipes: {str(e)}")
+            raise
+    
     async def get_user_elo_profile(self, user_id: str) -> Dict[str, Any]:
         """Récupère le profil ELO complet d'un utilisateur"""
         try:
@@ -404,6 +918,11 @@ class EloEngine:
             # Tier global
             tier, tier_progress = self.get_elo_tier(highest_rating)
             
+            # Rang dans chaque classement (index de rang, sans tri de collection)
+            ranks = await elo_rank_index.ranks([
+                (self.CURRENT_SEASON, r["game"], r["mode"], user_id) for r in user_ratings
+            ])
+            
             # Récupérer l'historique récent des matchs
             recent_matches = await db.elo_matches.find({
                 "$or": [
@@ -431,9 +950,11 @@ class EloEngine:
                         "losses": r.get("losses", 0),
                         "win_rate": r.get("win_rate", 0.0),
                         "tier": r.get("tier", "silver"),
-                        "peak": r.get("peak_rating", 1200)
+                        "peak": r.get("peak_rating", 1200),
+                        "rank": rank["rank"],
+                        "total_players": rank["total_players"]
                     }
-                    for r in user_ratings
+                    for r, rank in zip(user_ratings, ranks)
                 },
                 "recent_matches": [
                     {
@@ -468,7 +989,10 @@ class EloEngine:
             if mode:
                 query["mode"] = mode.value
             
-            # Pipeline d'agrégation pour le classement
+            if game and mode:
+                return await self._indexed_leaderboard(query, limit)
+            
+            # Classement tous jeux ou tous modes : pas d'index de rang, tri MongoDB
             pipeline = [
                 {"$match": query},
                 {"$sort": {"rating": -1}},
@@ -502,7 +1026,7 @@ class EloEngine:
                 }
             ]
             
-            leaderboard_data = await db.elo_ratings.aggregate(pipeline).to_list(limit)
+            leaderboard_data = await analytics_db.elo_ratings.aggregate(pipeline).to_list(limit)
             
             # Enrichir avec le rang
             enriched_leaderboard = []
@@ -518,52 +1042,296 @@ class EloEngine:
             app_logger.error(f"Erreur génération leaderboard ELO: {str(e)}")
             return []
     
-    async def apply_inactivity_decay(self):
-        """Applique la dégradation d'ELO pour inactivité"""
+    async def _indexed_leaderboard(self, query: Dict[str, Any], limit: int) -> List[Dict[str, Any]]:
+        """Classement d'un jeu/mode : une page de l'index de rang, puis les fiches
+        et les utilisateurs de cette page seulement"""
+        page = await elo_rank_index.page(query["season"], query["game"], query["mode"], 0, limit)
+        user_ids = [entry["user_id"] for entry in page]
+        ratings = {
+            rating["user_id"]: rating
+            async for rating in analytics_db.elo_ratings.find({**query, "user_id": {"$in": user_ids}}, LEADERBOARD_FIELDS)
+        }
+        users = {
+            user["id"]: user
+            async for user in analytics_db.users.find(
+                {"id": {"$in": user_ids}}, {"_id": 0, "id": 1, "username": 1, "display_name": 1}
+            )
+        }
+        
+        leaderboard = []
+        for entry in page:
+            user = users.get(entry["user_id"], {})
+            username = user.get("username", "Inconnu")
+            leaderboard.append({
+                **ratings.get(entry["user_id"], {}),
+                "user_id": entry["user_id"],
+                "rating": entry["rating"],
+                "rank": entry["rank"],
+                "username": username,
+                "display_name": user.get("display_name", username)
+            })
+        return leaderboard
+    
+    def note_rating_changes(self, count: int = 1):
+        """Compte les ratings modifiés depuis le dernier instantané des statistiques"""
+        self._stats_changes += count
+    
+    def _global_statistics_stale(self, snapshot: Dict[str, Any]) -> bool:
+        age = (datetime.utcnow() - snapshot["generated_at"]).total_seconds()
+        return age >= self.STATS_REFRESH_SECONDS or self._stats_changes >= self.STATS_REFRESH_CHANGES
+    
+    async def compute_global_statistics(self, season: str = None) -> Dict[str, Any]:
+        """Calcule les statistiques globales d'une saison en une seule agrégation ($facet)"""
+        season = season or self.CURRENT_SEASON
+        floors = [floor for _, floor, _, _ in TIER_THRESHOLDS]
+        tier_by_floor = {floor: tier.value for tier, floor, _, _ in TIER_THRESHOLDS}
+        
+        pipeline = [
+            {"$match": {"season": season}},
+            {"$facet": {
+                "overview": [{"$count": "total_players"}],
+                # Les ratings au-delà du dernier plancher tombent dans le bucket par défaut (challenger)
+                "tiers": [{"$bucket": {
+                    "groupBy": "$rating",
+                    "boundaries": floors,
+                    "default": floors[-1],
+                    "output": {"count": {"$sum": 1}}
+                }}],
+                "by_game": [
+                    {"$group": {
+                        "_id": "$game",
+                        "avg_rating": {"$avg": "$rating"},
+                        "player_count": {"$sum": 1},
+                        "max_rating": {"$max": "$rating"}
+                    }},
+                    {"$sort": {"player_count": -1}},
+                    {"$limit": 10}
+                ],
+                "most_active": [
+                    {"$sort": {"matches_played": -1}},
+                    {"$limit": 5},
+                    {
+                        "$lookup": {
+                            "from": "users",
+                            "localField": "user_id",
+                            "foreignField": "id",
+                            "as": "user_info"
+                        }
+                    },
+                    {
+                        "$project": {
+                            "_id": 0,
+                            "user_id": 1,
+                            "username": {"$arrayElemAt": ["$user_info.username", 0]},
+                            "rating": 1,
+                            "matches_played": 1,
+                            "wins": 1,
+                            "win_rate": 1
+                        }
+                    }
+                ]
+            }}
+        ]
+        
+        facets = (await analytics_db.elo_ratings.aggregate(pipeline).to_list(1))[0]
+        total_matches = await analytics_db.elo_matches.count_documents({"season": season})
+        
+        tier_distribution = {tier.value: 0 for tier in EloTier}
+        for bucket in facets["tiers"]:
+            tier_distribution[tier_by_floor[bucket["_id"]]] = bucket["count"]
+        
+        return {
+            "overview": {
+                "total_players": facets["overview"][0]["total_players"] if facets["overview"] else 0,
+                "total_matches": total_matches,
+                "current_season": season
+            },
+            "tier_distribution": tier_distribution,
+            "most_active_players": facets["most_active"],
+            "statistics_by_game": [
+                {
+                    "game": stat["_id"],
+                    "average_rating": round(stat["avg_rating"], 1),
+                    "player_count": stat["player_count"],
+                    "highest_rating": stat["max_rating"]
+                }
+                for stat in facets["by_game"]
+            ],
+            "generated_at": datetime.utcnow()
+        }
+    
+    async def refresh_global_statistics(self, season: str = None) -> Dict[str, Any]:
+        """Recalcule l'instantané des statistiques globales et l'enregistre dans elo_statistics"""
+        season = season or self.CURRENT_SEASON
+        try:
+            # Un autre worker a pu rafraîchir l'instantané entre-temps
+            stored = await db.elo_statistics.find_one({"_id": season}, {"_id": 0})
+            if stored and not self._global_statistics_stale(stored):
+                self._stats_snapshot = stored
+                return stored
+            
+            self._stats_changes = 0
+            snapshot = await self.compute_global_statistics(season)
+            await db.elo_statistics.replace_one({"_id": season}, snapshot, upsert=True)
+            self._stats_snapshot = snapshot
+            return snapshot
+            
+        except Exception as e:
+            app_logger.error(f"Erreur calcul statistiques ELO globales: {str(e)}")
+            raise
+    
+    async def get_global_statistics(self) -> Dict[str, Any]:
+        """Statistiques globales servies depuis l'instantané.
+        
+        Un instantané périmé (STATS_REFRESH_SECONDS écoulées ou STATS_REFRESH_CHANGES
+        ratings modifiés) reste servi pendant son recalcul en arrière-plan ;
+        seul le tout premier appel attend le calcul.
+        """
+        season = self.CURRENT_SEASON
+        refresh_key = f"elo_statistics:{season}"
+        
+        snapshot = self._stats_snapshot
+        if snapshot is None or snapshot["overview"]["current_season"] != season:
+            snapshot = await db.elo_statistics.find_one({"_id": season}, {"_id": 0})
+            if snapshot is None:
+                return await single_flight.run(refresh_key, lambda: self.refresh_global_statistics(season))
+            self._stats_snapshot = snapshot
+        
+        if self._global_statistics_stale(snapshot):
+            single_flight.start(refresh_key, lambda: self.refresh_global_statistics(season))
+        return snapshot
+    
+    async def apply_inactivity_decay(self) -> Dict[str, Any]:
+        """Applique la dégradation d'ELO pour inactivité à tous les joueurs inactifs.
+
+        Le curseur est parcouru par lots, chaque lot étant écrit avec un seul
+        bulk_write. Chaque rating dégradé est marqué du jour (last_decay_date) :
+        une relance le même jour, après un arrêt ou non, ne reprend que les
+        joueurs restants et ne dégrade personne deux fois.
+        """
+        today = datetime.utcnow().strftime("%Y-%m-%d")
+        run_id = f"{self.CURRENT_SEASON}:{today}"
+        
+        previous_run = await db.elo_decay_runs.find_one({"_id": run_id})
+        if previous_run and previous_run.get("status") == "completed":
+            return {**previous_run, "already_applied": True}
+        
+        started = time.perf_counter()
+        report = {
+            "season": self.CURRENT_SEASON,
+            "date": today,
+            "status": "running",
+            "scanned": 0,
+            "decayed": 0,
+            "batches": 0,
+            "started_at": datetime.utcnow()
+        }
+        await db.elo_decay_runs.update_one(
+            {"_id": run_id},
+            {"$set": {"status": "running", "started_at": report["started_at"]}},
+            upsert=True
+        )
+        
         try:
             cutoff_date = datetime.utcnow() - timedelta(days=self.DECAY_THRESHOLD_DAYS)
             
-            # Trouver les joueurs inactifs avec ELO > 1200 (pour éviter de pénaliser les débutants)
-            inactive_players = await db.elo_ratings.find({
-                "last_match_date": {"$lt": cutoff_date},
-                "rating": {"$gt": 1200},
-                "season": self.CURRENT_SEASON
-            }).to_list(1000)
+            # Joueurs inactifs avec ELO > 1200 (pour éviter de pénaliser les débutants)
+            cursor = db.elo_ratings.find(
+                {
+                    "season": self.CURRENT_SEASON,
+                    "last_match_date": {"$lt": cutoff_date},
+                    "rating": {"$gt": 1200},
+                    "last_decay_date": {"$ne": today}
+                },
+                {"_id": 1, "user_id": 1, "game": 1, "mode": 1, "rating": 1}
+            ).batch_size(self.DECAY_BATCH_SIZE)
             
-            decay_count = 0
-            for player in inactive_players:
-                new_rating = max(1200, player["rating"] - self.DECAY_AMOUNT)
-                if new_rating < player["rating"]:
-                    # Appliquer la dégradation
+            while True:
+                players = await cursor.to_list(self.DECAY_BATCH_SIZE)
+                if not players:
+                    break
+                
+                now = datetime.utcnow()
+                operations = []
+                new_ratings: Dict[Any, int] = {}
+                for player in players:
+                    new_rating = max(1200, player["rating"] - self.DECAY_AMOUNT)
                     tier, tier_progress = self.get_elo_tier(new_rating)
-                    
-                    await db.elo_ratings.update_one(
-                        {"_id": player["_id"]},
+                    operations.append(UpdateOne(
+                        # Le filtre sur le jour garantit une seule dégradation, même en concurrence ;
+                        # celui sur le rating lu écarte un joueur dont un match vient d'être enregistré
+                        {"_id": player["_id"], "last_decay_date": {"$ne": today}, "rating": player["rating"]},
                         {
                             "$set": {
                                 "rating": new_rating,
                                 "tier": tier.value,
                                 "tier_progress": tier_progress,
-                                "updated_at": datetime.utcnow()
+                                "last_decay_date": today,
+                                "updated_at": now
                             }
                         }
-                    )
-                    
-                    # Log de la dégradation
-                    log_user_action(player["user_id"], "elo_decay_applied", {
-                        "old_rating": player["rating"],
-                        "new_rating": new_rating,
-                        "decay_amount": player["rating"] - new_rating
-                    })
-                    
-                    decay_count += 1
+                    ))
+                    new_ratings[player["_id"]] = new_rating
+                
+                result = await db.elo_ratings.bulk_write(operations, ordered=False)
+                
+                # Seuls les ratings effectivement dégradés par ce lot (marqués de son updated_at)
+                # sont reportés dans l'index de rang et les profils
+                decayed = []
+                profiles: Dict[str, Dict[str, int]] = {}
+                if result.modified_count:
+                    async for player in db.elo_ratings.find(
+                        {"_id": {"$in": list(new_ratings)}, "last_decay_date": today, "updated_at": now},
+                        {"_id": 1, "user_id": 1, "game": 1, "mode": 1}
+                    ):
+                        new_rating = new_ratings[player["_id"]]
+                        decayed.append((self.CURRENT_SEASON, player["game"], player["mode"], player["user_id"], new_rating))
+                        profiles.setdefault(player["user_id"], {})[main_elo_key(player["game"], player["mode"])] = new_rating
+                
+                if decayed:
+                    await elo_rank_index.update_many(decayed)
+                    # ELO principal des profils, recalculé à partir des ratings dégradés
+                    await db.user_profiles.bulk_write([
+                        UpdateOne({"user_id": user_id}, self.main_elo_update(ratings))
+                        for user_id, ratings in profiles.items()
+                    ], ordered=False)
+                self.note_rating_changes(result.modified_count)
+                
+                report["scanned"] += len(players)
+                report["decayed"] += result.modified_count
+                report["batches"] += 1
+                await db.elo_decay_runs.update_one(
+                    {"_id": run_id},
+                    {"$inc": {"scanned": len(players), "decayed": result.modified_count, "batches": 1}}
+                )
             
-            app_logger.info(f"Dégradation ELO appliquée à {decay_count} joueurs inactifs")
-            return decay_count
+            duration = time.perf_counter() - started
+            report.update({
+                "status": "completed",
+                "finished_at": datetime.utcnow(),
+                "duration_seconds": round(duration, 3),
+                "players_per_second": round(report["scanned"] / duration, 1) if duration > 0 else 0.0
+            })
+            await db.elo_decay_runs.update_one(
+                {"_id": run_id},
+                {"$set": {
+                    "status": "completed",
+                    "finished_at": report["finished_at"],
+                    "duration_seconds": report["duration_seconds"],
+                    "players_per_second": report["players_per_second"]
+                }}
+            )
+            
+            app_logger.info(
+                f"Dégradation ELO appliquée à {report['decayed']} joueurs inactifs "
+                f"({report['batches']} lots, {report['players_per_second']} joueurs/s)"
+            )
+            return report
             
         except Exception as e:
             app_logger.error(f"Erreur application dégradation ELO: {str(e)}")
-            return 0
+            await db.elo_decay_runs.update_one({"_id": run_id}, {"$set": {"status": "failed", "error": str(e)}})
+            raise
 
 # Instance globale du moteur ELO
 elo_engine = EloEngine()
@@ -594,6 +1362,14 @@ async def process_regular_match(winner_id: str, loser_id: str, game: str, match_
         match_importance=importance
     )
 
+async def process_match_results(results: List[EloMatchResult]):
+    """Traite un lot ordonné de résultats de matchs pour le calcul ELO"""
+    return await elo_engine.process_match_results_bulk(results)
+
+async def process_team_match_results(results: List[EloTeamMatchResult]):
+    """Traite un lot de matchs par équipes en un bulk_write par collection"""
+    return await elo_engine.process_team_match_results(results)
+
 async def get_user_elo_complete(user_id: str):
     """Récupère le profil ELO complet d'un utilisateur"""
     return await elo_engine.get_user_elo_profile(user_id)
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+MongoDB Index Registry
+
+Declares the indexes backing the API's hot queries, applies them idempotently
+(at application startup or from the command line) and reports, through
+`explain`, any registered hot query that still falls back to a collection scan.
+
+Usage:
+    python indexes.py            # create missing indexes
+    python indexes.py --report   # create missing indexes, then explain hot queries
+    python indexes.py --report --no-create
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+
+def _index(*keys: Tuple[str, int], unique: bool = False, partial: Optional[Dict[str, Any]] = None) -> IndexModel:
+    if partial:
+        return IndexModel(list(keys), unique=unique, partialFilterExpression=partial)
+    return IndexModel(list(keys), unique=unique)
+
+
+# Collection name -> indexes. Index names are derived by MongoDB from the keys,
+# so re-applying the registry is a no-op once the indexes exist.
+INDEXES: Dict[str, List[IndexModel]] = {
+    "users": [
+        _index(("id", ASCENDING), unique=True),
+        _index(("email", ASCENDING), unique=True),
+        _index(("username", ASCENDING)),
+        _index(("status", ASCENDING), ("created_at", DESCENDING)),
+    ],
+    "user_profiles": [
+        _index(("user_id", ASCENDING), unique=True),
+    ],
+    "teams": [
+        _index(("id", ASCENDING), unique=True),
+        _index(("members", ASCENDING), ("game", ASCENDING)),
+        _index(("captain_id", ASCENDING)),
+        _index(("name", ASCENDING), ("game", ASCENDING)),
+    ],
+    "tournaments": [
+        _index(("id", ASCENDING), unique=True),
+        _index(("status", ASCENDING), ("created_at", DESCENDING)),
+        _index(("winner_id", ASCENDING), ("status", ASCENDING)),
+        _index(("participants", ASCENDING), ("status", ASCENDING)),
+    ],
+    "community_leaderboard": [
+        _index(("user_id", ASCENDING), unique=True),
+        _index(("total_points", DESCENDING), ("created_at", ASCENDING)),
+    ],
+    "user_counters": [
+        _index(("user_id", ASCENDING), unique=True),
+    ],
+    "matches": [
+        _index(("id", ASCENDING), unique=True),
+        _index(("tournament_id", ASCENDING), ("round_number", ASCENDING), ("match_number", ASCENDING)),
+        _index(("status", ASCENDING)),
+    ],
+    "elo_ratings": [
+        _index(("user_id", ASCENDING), ("game", ASCENDING), ("mode", ASCENDING), ("season", ASCENDING), unique=True),
+        _index(("season", ASCENDING), ("game", ASCENDING), ("mode", ASCENDING), ("rating", DESCENDING)),
+        _index(("season", ASCENDING), ("rating", DESCENDING)),
+        _index(("season", ASCENDING), ("last_match_date", ASCENDING)),
+    ],
+    "elo_matches": [
+        _index(("winner_id", ASCENDING), ("played_at", DESCENDING)),
+        _index(("loser_id", ASCENDING), ("played_at", DESCENDING)),
+        _index(("season", ASCENDING), ("played_at", ASCENDING)),
+    ],
+    "betting_markets": [
+        _index(("id", ASCENDING), unique=True),
+        _index(("status", ASCENDING), ("created_at", DESCENDING)),
+    ],
+    "bets": [
+        _index(("user_id", ASCENDING), ("market_id", ASCENDING)),
+        _index(("market_id", ASCENDING)),
+        _index(("user_id", ASCENDING), ("placed_at", DESCENDING)),
+    ],
+    "chat_messages": [
+        _index(("id", ASCENDING)),
+        _index(("author_id", ASCENDING), ("created_at", DESCENDING)),
+        _index(("channel", ASCENDING), ("is_deleted", ASCENDING), ("created_at", DESCENDING)),
+    ],
+    "private_messages": [
+        _index(("sender_id", ASCENDING), ("created_at", DESCENDING)),
+        _index(("recipient_id", ASCENDING), ("created_at", DESCENDING)),
+        _index(("recipient_id", ASCENDING), ("is_read", ASCENDING)),
+    ],
+    "coin_transactions": [
+        _index(("user_id", ASCENDING), ("transaction_type", ASCENDING), ("created_at", DESCENDING)),
+        _index(("user_id", ASCENDING), ("created_at", DESCENDING)),
+        _index(("created_at", DESCENDING)),
+    ],
+    "transactions": [
+        _index(("user_id", ASCENDING), ("transaction_type", ASCENDING)),
+    ],
+    "activity_feed": [
+        _index(("id", ASCENDING)),
+        _index(("user_id", ASCENDING), ("created_at", DESCENDING)),
+        _index(("created_at", DESCENDING)),
+    ],
+    "user_comments": [
+        _index(("id", ASCENDING)),
+        _index(("target_user_id", ASCENDING), ("is_public", ASCENDING), ("is_approved", ASCENDING), ("created_at", DESCENDING)),
+        _index(("is_approved", ASCENDING), ("created_at", DESCENDING)),
+    ],
+    "team_comments": [
+        _index(("team_id", ASCENDING), ("is_public", ASCENDING), ("is_approved", ASCENDING), ("created_at", DESCENDING)),
+        _index(("is_approved", ASCENDING), ("created_at", DESCENDING)),
+    ],
+    "user_inventory": [
+        _index(("user_id", ASCENDING), ("item_id", ASCENDING)),
+        _index(("id", ASCENDING)),
+    ],
+    "premium_subscriptions": [
+        _index(("user_id", ASCENDING), ("status", ASCENDING)),
+    ],
+    "user_badges": [
+        _index(("user_id", ASCENDING), ("badge_id", ASCENDING), unique=True),
+        _index(("badge_id", ASCENDING)),
+        _index(("obtained_at", DESCENDING), ("id", DESCENDING)),
+    ],
+    "achievement_leaderboard": [
+        _index(("user_id", ASCENDING), unique=True),
+        _index(("badge_count", DESCENDING), ("last_badge", DESCENDING)),
+        _index(("score", DESCENDING), ("last_badge", DESCENDING)),
+    ],
+    "badge_holder_counts": [
+        _index(("badge_id", ASCENDING), unique=True),
+    ],
+    "user_quests": [
+        # One entry per user, quest and day; entries from before quest_date are not covered
+        _index(
+            ("user_id", ASCENDING), ("quest_id", ASCENDING), ("quest_date", ASCENDING),
+            unique=True, partial={"quest_date": {"$exists": True}}
+        ),
+        _index(("user_id", ASCENDING), ("completed", ASCENDING), ("completed_at", DESCENDING)),
+    ],
+    "user_quest_stats": [
+        _index(("user_id", ASCENDING), unique=True),
+        _index(("quests_completed", DESCENDING), ("last_completion", DESCENDING)),
+        _index(("last_completion", DESCENDING)),
+    ],
+    "tournament_participants": [
+        _index(("user_id", ASCENDING), ("tournament_game", ASCENDING)),
+    ],
+    "tournament_results": [
+        _index(("winner_id", ASCENDING), ("tournament_type", ASCENDING)),
+    ],
+    "news": [
+        _index(("id", ASCENDING)),
+        _index(("is_published", ASCENDING), ("is_pinned", ASCENDING), ("created_at", DESCENDING)),
+    ],
+    "steam_profiles": [
+        _index(("user_id", ASCENDING)),
+        _index(("steam_id", ASCENDING)),
+    ],
+}
+
+
+class HotQuery(NamedTuple):
+    """A frequently executed query whose plan must use an index"""
+    name: str
+    collection: str
+    filter: Dict[str, Any]
+    sort: Optional[Dict[str, int]] = None
+
+
+# Representative shapes of the most frequent queries; values are placeholders,
+# only the plan shape matters to `explain`.
+HOT_QUERIES: List[HotQuery] = [
+    HotQuery("auth.get_user_by_email", "users", {"email": "user@example.com"}),
+    HotQuery("auth.get_user_by_id", "users", {"id": "user-id"}),
+    HotQuery("profiles.get_profile", "user_profiles", {"user_id": "user-id"}),
+    HotQuery("teams.get_team", "teams", {"id": "team-id"}),
+    HotQuery("teams.get_my_teams", "teams", {"members": {"$in": ["user-id"]}}),
+    HotQuery("tournaments.get_tournament", "tournaments", {"id": "tournament-id"}),
+    HotQuery("community.leaderboard", "community_leaderboard", {}, {"total_points": -1, "created_at": 1}),
+    HotQuery("achievements.user_counters", "user_counters", {"user_id": "user-id"}),
+    HotQuery("community.tournament_victories", "tournaments", {"winner_id": "user-id", "status": "completed"}),
+    HotQuery(
+        "matches.next_match", "matches",
+        {"tournament_id": "tournament-id", "round_number": 2, "match_number": 1}
+    ),
+    HotQuery("matches.bracket", "matches", {"tournament_id": "tournament-id"}, {"round_number": 1}),
+    HotQuery(
+        "elo.get_user_rating", "elo_ratings",
+        {"user_id": "user-id", "game": "cs2", "mode": "1v1", "season": "season"}
+    ),
+    HotQuery("elo.leaderboard", "elo_ratings", {"season": "season", "game": "cs2", "mode": "1v1"}, {"rating": -1}),
+    HotQuery(
+        "elo.inactivity_decay", "elo_ratings",
+        {"season": "season", "last_match_date": {"$lt": 0}, "rating": {"$gt": 1200}, "last_decay_date": {"$ne": "day"}}
+    ),
+    HotQuery("elo.match_history_winner", "elo_matches", {"winner_id": "user-id"}, {"played_at": -1}),
+    HotQuery("betting.existing_bet", "bets", {"user_id": "user-id", "market_id": "market-id"}),
+    HotQuery("betting.market_bets", "bets", {"market_id": "market-id"}),
+    HotQuery(
+        "chat.rate_limit", "chat_messages",
+        {"author_id": "user-id", "created_at": {"$gte": 0}}
+    ),
+    HotQuery("chat.channel_history", "chat_messages", {"channel": "general", "is_deleted": False}, {"created_at": -1}),
+    HotQuery(
+        "currency.daily_bonus", "coin_transactions",
+        {"user_id": "user-id", "transaction_type": "daily_bonus", "created_at": {"$gte": 0}}
+    ),
+    HotQuery("currency.transactions", "coin_transactions", {"user_id": "user-id"}, {"created_at": -1}),
+    HotQuery("activity.my_feed", "activity_feed", {"user_id": "user-id"}, {"created_at": -1}),
+    HotQuery(
+        "comments.user_comments", "user_comments",
+        {"target_user_id": "user-id", "is_public": True, "is_approved": True}, {"created_at": -1}
+    ),
+    HotQuery("premium.subscription", "premium_subscriptions", {"user_id": "user-id", "status": {"$in": ["active"]}}),
+    HotQuery("achievements.user_badges", "user_badges", {"user_id": "user-id"}),
+    HotQuery(
+        "achievements.leaderboard", "achievement_leaderboard", {}, {"badge_count": -1, "last_badge": -1}
+    ),
+    HotQuery("achievements.admin_badges", "user_badges", {}, {"obtained_at": -1, "id": -1}),
+    HotQuery(
+        "achievements.user_quest", "user_quests",
+        {"user_id": "user-id", "quest_id": "quest-id", "quest_date": "2025-01-01"}
+    ),
+    HotQuery("achievements.quest_stats", "user_quest_stats", {"user_id": "user-id"}),
+    HotQuery(
+        "achievements.quest_leaderboard", "user_quest_stats", {}, {"quests_completed": -1, "last_completion": -1}
+    ),
+]
+
+
+async def ensure_indexes(db) -> Dict[str, Any]:
+    """Create every registered index that does not exist yet.
+
+    Each index is created on its own so that one conflicting definition (for
+    instance a unique index over existing duplicates) is reported without
+    blocking the others.
+    """
+    created, failed = [], []
+    for collection_name, indexes in INDEXES.items():
+        collection = db[collection_name]
+        for index in indexes:
+            name = index.document["name"]
+            try:
+                await collection.create_indexes([index])
+                created.append(f"{collection_name}.{name}")
+            except OperationFailure as e:
+                logger.error(f"Index {collection_name}.{name} could not be created: {str(e)}")
+                failed.append({"index": f"{collection_name}.{name}", "error": str(e)})
+
+    logger.info(f"✅ MongoDB indexes verified: {len(created)} ok, {len(failed)} failed")
+    return {"ok": created, "failed": failed}
+
+
+def _plan_stages(plan: Any) -> List[str]:
+    """Collect every stage name of an explain plan tree"""
+    stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages.extend(_plan_stages(value))
+    elif isinstance(plan, list):
+        for item in plan:
+            stages.extend(_plan_stages(item))
+    return stages
+
+
+def _plan_indexes(plan: Any) -> List[str]:
+    """Collect the index names used by an explain plan tree"""
+    names = []
+    if isinstance(plan, dict):
+        if "indexName" in plan:
+            names.append(plan["indexName"])
+        for value in plan.values():
+            names.extend(_plan_indexes(value))
+    elif isinstance(plan, list):
+        for item in plan:
+            names.extend(_plan_indexes(item))
+    return names
+
+
+async def explain_hot_queries(db) -> List[Dict[str, Any]]:
+    """Explain every registered hot query and flag the ones planned as a COLLSCAN"""
+    report = []
+    for query in HOT_QUERIES:
+        find = {"find": query.collection, "filter": query.filter, "limit": 1}
+        if query.sort:
+            find["sort"] = query.sort
+        try:
+            explain = await db.command({"explain": find, "verbosity": "queryPlanner"})
+            winning_plan = explain.get("queryPlanner", {}).get("winningPlan", {})
+            stages = _plan_stages(winning_plan)
+            report.append({
+                "query": query.name,
+                "collection": query.collection,
+                "collection_scan": "COLLSCAN" in stages,
+                "in_memory_sort": "SORT" in stages,
+                "indexes": sorted(set(_plan_indexes(winning_plan))),
+            })
+        except OperationFailure as e:
+            report.append({"query": query.name, "collection": query.collection, "error": str(e)})
+    return report
+
+
+async def _main(create: bool, report: bool) -> int:
+    from database import db, client
+
+    try:
+        exit_code = 0
+        if create:
+            result = await ensure_indexes(db)
+            for name in result["ok"]:
+                print(f"✅ {name}")
+            for failure in result["failed"]:
+                print(f"❌ {failure['index']}: {failure['error']}")
+                exit_code = 1
+
+        if report:
+            print("\n🔍 Hot query plans:")
+            for entry in await explain_hot_queries(db):
+                if "error" in entry:
+                    print(f"❌ {entry['query']}: {entry['error']}")
+                    exit_code = 1
+                elif entry["collection_scan"]:
+                    print(f"⚠️  {entry['query']} ({entry['collection']}): COLLECTION SCAN")
+                    exit_code = 1
+                else:
+                    sort_note = " + in-memory sort" if entry["in_memory_sort"] else ""
+                    print(f"✅ {entry['query']} ({entry['collection']}): {', '.join(entry['indexes'])}{sort_note}")
+        return exit_code
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    sys.path.append(str(Path(__file__).parent))
+    parser = argparse.ArgumentParser(description="Apply and verify Oupafamilly MongoDB indexes")
+    parser.add_argument("--report", action="store_true", help="explain hot queries and flag collection scans")
+    parser.add_argument("--no-create", action="store_true", help="do not create missing indexes")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(_main(create=not args.no_create, report=args.report)))
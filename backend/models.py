@@ -4,6 +4,8 @@ from datetime import datetime
 from enum import Enum
 import uuid
 
+from cache_codec import register_type
+
 # Enums
 class UserRole(str, Enum):
     ADMIN = "admin"
@@ -489,4 +491,9 @@ class ExtendedCommunityStats(BaseModel):
     top_players: List[Dict[str, Any]] = []
     top_teams: List[Dict[str, Any]] = []
     recent_activities: List[Dict[str, Any]] = []
-    date: datetime = Field(default_factory=datetime.utcnow)
\ No newline at end of file
+    date: datetime = Field(default_factory=datetime.utcnow)
+
+# Every model and enum above may be read back from the shared cache
+for _cls in list(globals().values()):
+    if isinstance(_cls, type) and issubclass(_cls, (BaseModel, Enum)) and _cls.__module__ == __name__:
+        register_type(_cls)
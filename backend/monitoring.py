@@ -14,6 +14,7 @@ import time
 import psutil
 import traceback
 from pathlib import Path
+from db_metrics import start_request_tracking, finish_request_tracking, route_name
 
 # Create logs directory
 LOGS_DIR = Path("/var/log/oupafamilly")
@@ -343,6 +344,7 @@ class RequestLoggingMiddleware:
             
             # Process request
             response_status = 500  # Default to error
+            query_tracking = start_request_tracking()
             
             async def send_wrapper(message):
                 nonlocal response_status
@@ -363,6 +365,7 @@ class RequestLoggingMiddleware:
                 raise
             finally:
                 duration_ms = (time.time() - start_time) * 1000
+                query_stats = finish_request_tracking(query_tracking, route_name(scope), scope["method"])
                 
                 # Log response
                 log_level = "info" if response_status < 400 else "warning" if response_status < 500 else "error"
@@ -371,7 +374,9 @@ class RequestLoggingMiddleware:
                     method=scope["method"],
                     path=scope["path"],
                     status_code=response_status,
-                    duration_ms=round(duration_ms, 2)
+                    duration_ms=round(duration_ms, 2),
+                    db_queries=query_stats.count,
+                    db_time_ms=round(query_stats.total_ms, 2)
                 )
         else:
             await self.app(scope, receive, send)
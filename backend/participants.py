@@ -0,0 +1,140 @@
+"""
+Batched tournament participant resolution
+
+Tournament participants are either user ids or team ids. Resolving them one by
+one costs several round-trips per participant; this module loads users,
+profiles, teams and team members with a handful of `$in` queries instead.
+"""
+
+import asyncio
+from datetime import datetime
+from typing import Any, Dict, Iterable, List
+
+from database import db
+
+USER_FIELDS = {"_id": 0, "id": 1, "username": 1}
+PROFILE_FIELDS = {"_id": 0, "user_id": 1, "display_name": 1, "level": 1, "gaming_info": 1, "avatar_url": 1}
+TEAM_FIELDS = {"_id": 0, "id": 1, "name": 1, "members": 1, "max_members": 1, "created_at": 1}
+
+
+class ResolvedParticipants:
+    """Documents needed to describe a set of participants, indexed by id"""
+
+    def __init__(self):
+        self.users: Dict[str, Dict[str, Any]] = {}
+        self.profiles: Dict[str, Dict[str, Any]] = {}
+        self.teams: Dict[str, Dict[str, Any]] = {}
+        self.members: Dict[str, Dict[str, Any]] = {}
+
+
+async def _find_by_ids(collection, field: str, ids: Iterable[str], projection: Dict[str, int]) -> Dict[str, Dict[str, Any]]:
+    ids = list(ids)
+    if not ids:
+        return {}
+    documents = await collection.find({field: {"$in": ids}}, projection).to_list(None)
+    return {document[field]: document for document in documents}
+
+
+async def resolve_participants(
+    participant_ids: List[str],
+    include_profiles: bool = True,
+    include_members: bool = True
+) -> ResolvedParticipants:
+    """Load every user, profile, team and team member behind participant_ids.
+
+    Costs at most four queries whatever the number of participants: users,
+    then profiles and teams concurrently, then the team members not already
+    loaded.
+    """
+    resolved = ResolvedParticipants()
+    unique_ids = list(dict.fromkeys(participant_ids))
+    if not unique_ids:
+        return resolved
+
+    resolved.users = await _find_by_ids(db.users, "id", unique_ids, USER_FIELDS)
+    remaining = [participant_id for participant_id in unique_ids if participant_id not in resolved.users]
+
+    profiles, teams = await asyncio.gather(
+        _find_by_ids(db.user_profiles, "user_id", resolved.users if include_profiles else [], PROFILE_FIELDS),
+        _find_by_ids(db.teams, "id", remaining, TEAM_FIELDS)
+    )
+    resolved.profiles, resolved.teams = profiles, teams
+
+    if include_members:
+        member_ids = {member_id for team in resolved.teams.values() for member_id in team.get("members", [])}
+        missing = [member_id for member_id in member_ids if member_id not in resolved.users]
+        resolved.members = {member_id: resolved.users[member_id] for member_id in member_ids if member_id in resolved.users}
+        resolved.members.update(await _find_by_ids(db.users, "id", missing, USER_FIELDS))
+
+    return resolved
+
+
+def build_participants_info(participant_ids: List[str], resolved: ResolvedParticipants) -> List[Dict[str, Any]]:
+    """Detailed participant entries (users with profile, teams with members), in registration order"""
+    participants_info = []
+    for participant_id in participant_ids:
+        user_data = resolved.users.get(participant_id)
+        if user_data:
+            profile_data = resolved.profiles.get(participant_id)
+            participants_info.append({
+                "id": participant_id,
+                "type": "user",
+                "name": user_data.get("username", "Utilisateur"),
+                "display_name": profile_data.get("display_name") if profile_data else user_data.get("username", "Utilisateur"),
+                "level": profile_data.get("level", 1) if profile_data else 1,
+                "game_info": profile_data.get("gaming_info", {}) if profile_data else {},
+                "avatar": profile_data.get("avatar_url") if profile_data else None,
+                "registered_at": datetime.utcnow()  # Could be tracked separately
+            })
+            continue
+
+        team_data = resolved.teams.get(participant_id)
+        if team_data:
+            team_members = [
+                {
+                    "id": member_id,
+                    "username": resolved.members[member_id].get("username", "Membre"),
+                    "role": "member"  # Could be expanded with roles
+                }
+                for member_id in team_data.get("members", [])
+                if member_id in resolved.members
+            ]
+            participants_info.append({
+                "id": participant_id,
+                "type": "team",
+                "name": team_data.get("name", "Équipe"),
+                "members": team_members,
+                "members_count": len(team_members),
+                "registered_at": team_data.get("created_at", datetime.utcnow())
+            })
+    return participants_info
+
+
+def build_participants_map(participant_ids: List[str], resolved: ResolvedParticipants) -> Dict[str, Dict[str, str]]:
+    """Short display names per participant id, as used by bracket views"""
+    participants_map = {}
+    for participant_id in participant_ids:
+        user_data = resolved.users.get(participant_id)
+        if user_data:
+            participants_map[participant_id] = {
+                "type": "user",
+                "name": user_data["username"],
+                "display_name": user_data["username"]
+            }
+            continue
+
+        team_data = resolved.teams.get(participant_id)
+        if team_data:
+            participants_map[participant_id] = {
+                "type": "team",
+                "name": team_data["name"],
+                "display_name": f"{team_data['name']} ({len(team_data['members'])}/{team_data['max_members']})"
+            }
+            continue
+
+        participants_map[participant_id] = {
+            "type": "unknown",
+            "name": f"Participant {participant_id[:8]}",
+            "display_name": f"Participant {participant_id[:8]}"
+        }
+    return participants_map
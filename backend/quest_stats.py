@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Materialized per-user quest statistics
+
+One `user_quest_stats` document per user holds the quest streak
+(`current_streak`, `best_streak`, `last_completed_date`), the total of quests
+completed and the completions of the last RECENT_DAYS days. It is updated with
+a single atomic pipeline update each time quest rewards are claimed, so
+streaks, today's completions and the quest leaderboard are read from it
+instead of aggregating `user_quests`.
+
+A quest counts on the day its rewards are claimed (UTC).
+
+Usage:
+    python quest_stats.py --rebuild   # recompute every document from user_quests
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from pymongo import ReplaceOne
+
+from database import db
+
+logger = logging.getLogger(__name__)
+
+COLLECTION = "user_quest_stats"
+# Long enough for the monthly leaderboard (30 days back, today included)
+RECENT_DAYS = 31
+REBUILD_CHUNK_SIZE = 1000
+
+
+def _recent_cutoff(today: date) -> str:
+    return (today - timedelta(days=RECENT_DAYS - 1)).isoformat()
+
+
+async def record_quest_completion(user_id: str, completed_at: Optional[datetime] = None):
+    """Count a completed quest and extend the streak, in one atomic update"""
+    completed_at = completed_at or datetime.utcnow()
+    day = completed_at.date().isoformat()
+    previous_day = (completed_at.date() - timedelta(days=1)).isoformat()
+    last_day = {"$ifNull": ["$last_completed_date", ""]}
+    recent = {"$ifNull": ["$recent", []]}
+
+    await db[COLLECTION].update_one(
+        {"user_id": user_id},
+        [
+            {"$set": {
+                "current_streak": {"$switch": {
+                    "branches": [
+                        # Already counted today (or a later day): unchanged
+                        {"case": {"$gte": [last_day, day]}, "then": {"$ifNull": ["$current_streak", 0]}},
+                        {"case": {"$eq": [last_day, previous_day]}, "then": {"$add": [{"$ifNull": ["$current_streak", 0]}, 1]}},
+                    ],
+                    "default": 1
+                }}
+            }},
+            {"$set": {
+                "best_streak": {"$max": [{"$ifNull": ["$best_streak", 0]}, "$current_streak"]},
+                "last_completed_date": {"$max": [last_day, day]},
+                "last_completion": {"$max": ["$last_completion", completed_at]},
+                "quests_completed": {"$add": [{"$ifNull": ["$quests_completed", 0]}, 1]},
+                "recent": {"$concatArrays": [
+                    {"$filter": {
+                        "input": recent,
+                        "cond": {"$and": [
+                            {"$gte": ["$$this.date", _recent_cutoff(datetime.utcnow().date())]},
+                            {"$ne": ["$$this.date", day]}
+                        ]}
+                    }},
+                    [{"date": day, "count": {"$add": [
+                        {"$sum": {"$map": {
+                            "input": {"$filter": {"input": recent, "cond": {"$eq": ["$$this.date", day]}}},
+                            "in": "$$this.count"
+                        }}},
+                        1
+                    ]}}]
+                ]},
+                "updated_at": datetime.utcnow()
+            }}
+        ],
+        upsert=True
+    )
+
+
+async def get_quest_stats(user_id: str) -> Dict[str, Any]:
+    """Stats document of a user (empty when no quest was ever completed)"""
+    return await db[COLLECTION].find_one({"user_id": user_id}, {"_id": 0}) or {}
+
+
+def current_streak(stats: Dict[str, Any], today: Optional[date] = None) -> int:
+    """Consecutive days with a completed quest, ending today (0 when not today)"""
+    today = today or datetime.utcnow().date()
+    return stats.get("current_streak", 0) if stats.get("last_completed_date") == today.isoformat() else 0
+
+
+def completions_since(stats: Dict[str, Any], start_day: date) -> int:
+    """Quests completed from start_day (within the last RECENT_DAYS days) onwards"""
+    start = start_day.isoformat()
+    return sum(entry["count"] for entry in stats.get("recent", []) if entry["date"] >= start)
+
+
+async def leaderboard(start_date: Optional[datetime], limit: int) -> List[Dict[str, Any]]:
+    """Users ranked by quests completed since start_date (None: all time)"""
+    fields = {"_id": 0, "user_id": 1, "quests_completed": 1, "last_completion": 1}
+    if start_date is None:
+        return await db[COLLECTION].find({}, fields).sort(
+            [("quests_completed", -1), ("last_completion", -1)]
+        ).limit(limit).to_list(limit)
+
+    start_day = start_date.date().isoformat()
+    return await db[COLLECTION].aggregate([
+        {"$match": {"last_completion": {"$gte": start_date}}},
+        {"$project": {
+            **fields,
+            "quests_completed": {"$sum": {"$map": {
+                "input": {"$filter": {"input": "$recent", "cond": {"$gte": ["$$this.date", start_day]}}},
+                "in": "$$this.count"
+            }}}
+        }},
+        {"$match": {"quests_completed": {"$gt": 0}}},
+        {"$sort": {"quests_completed": -1, "last_completion": -1}},
+        {"$limit": limit}
+    ]).to_list(limit)
+
+
+def _stats_from_days(user_id: str, days: Dict[str, int], last_completion: datetime, today: date) -> Dict[str, Any]:
+    ordered = sorted(days)
+    best = streak = 0
+    previous = None
+    for day in ordered:
+        current = date.fromisoformat(day)
+        streak = streak + 1 if previous is not None and current - previous == timedelta(days=1) else 1
+        best = max(best, streak)
+        previous = current
+    cutoff = _recent_cutoff(today)
+    return {
+        "user_id": user_id,
+        "current_streak": streak,
+        "best_streak": best,
+        "last_completed_date": ordered[-1],
+        "last_completion": last_completion,
+        "quests_completed": sum(days.values()),
+        "recent": [{"date": day, "count": days[day]} for day in ordered if day >= cutoff],
+        "updated_at": datetime.utcnow(),
+    }
+
+
+async def rebuild_quest_stats() -> Dict[str, int]:
+    """Recompute every document from the claimed quests of user_quests.
+
+    Claims made before the stats existed are dated by completed_at (or
+    started_at when missing).
+    """
+    users: Dict[str, Dict[str, Any]] = {}
+    async for user_quest in db.user_quests.find(
+        {"rewards_claimed": True}, {"_id": 0, "user_id": 1, "completed_at": 1, "started_at": 1}
+    ):
+        completed_at = user_quest.get("completed_at") or user_quest.get("started_at")
+        if not completed_at:
+            continue
+        entry = users.setdefault(user_quest["user_id"], {"days": {}, "last_completion": completed_at})
+        day = completed_at.date().isoformat()
+        entry["days"][day] = entry["days"].get(day, 0) + 1
+        entry["last_completion"] = max(entry["last_completion"], completed_at)
+
+    today = datetime.utcnow().date()
+    operations = [
+        ReplaceOne(
+            {"user_id": user_id},
+            _stats_from_days(user_id, entry["days"], entry["last_completion"], today),
+            upsert=True
+        )
+        for user_id, entry in users.items()
+    ]
+    for start in range(0, len(operations), REBUILD_CHUNK_SIZE):
+        await db[COLLECTION].bulk_write(operations[start:start + REBUILD_CHUNK_SIZE], ordered=False)
+    removed = await db[COLLECTION].delete_many({"user_id": {"$nin": list(users)}})
+
+    logger.info(f"✅ Quest stats rebuilt: {len(operations)} users")
+    return {"users": len(operations), "removed": removed.deleted_count}
+
+
+async def ensure_quest_stats():
+    """Backfill the stats on first start after deployment"""
+    if await db[COLLECTION].estimated_document_count() == 0:
+        await rebuild_quest_stats()
+
+
+async def _main() -> int:
+    from database import client
+
+    try:
+        result = await rebuild_quest_stats()
+        print(f"✅ {result['users']} users counted, {result['removed']} stale entries removed")
+        return 0
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    sys.path.append(str(Path(__file__).parent))
+    parser = argparse.ArgumentParser(description="User quest statistics maintenance")
+    parser.add_argument("--rebuild", action="store_true", help="recompute every document from user_quests")
+    args = parser.parse_args()
+    if not args.rebuild:
+        parser.print_help()
+        sys.exit(0)
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(asyncio.run(_main()))
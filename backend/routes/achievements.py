@@ -10,10 +10,16 @@ from auth import get_current_active_user, is_admin
 from achievements import (
     trigger_achievement_check, get_user_badges, get_all_badges,
     get_badge_progress, achievement_engine, Badge, BadgeCategory, BadgeRarity,
-    QuestEngine
+    QuestEngine, quest_engine
 )
 from monitoring import log_user_action, app_logger
+from achievement_stats import (
+    global_stats as achievements_global_stats, leaderboard as achievements_leaderboard,
+    record_awards, user_position as achievements_user_position
+)
+from quest_stats import current_streak, get_quest_stats, leaderboard as quest_leaderboard
 from datetime import datetime
+from pymongo.errors import DuplicateKeyError
 
 router = APIRouter(prefix="/achievements", tags=["Achievements & Badges"])
 
@@ -25,20 +31,17 @@ router = APIRouter(prefix="/achievements", tags=["Achievements & Badges"])
 async def get_daily_quests(current_user: User = Depends(get_current_active_user)):
     """Récupère les quêtes quotidiennes actives pour l'utilisateur"""
     try:
-        from achievements import QuestEngine
         from datetime import datetime, timedelta
         
-        # Initialiser le moteur de quêtes
-        quest_engine = QuestEngine()
-        
-        # Récupérer les quêtes quotidiennes pour aujourd'hui
+        # Récupérer les quêtes quotidiennes pour aujourd'hui (jeu mémorisé par date)
         today = datetime.utcnow().date()
         daily_quests = await quest_engine.get_daily_quests_for_date(today)
         
-        # Récupérer la progression de l'utilisateur pour ces quêtes
+        # Récupérer la progression de l'utilisateur pour ces quêtes en une requête
+        quests_progress = await quest_engine.get_user_quests_progress(current_user.id, daily_quests)
         user_quests = []
         for quest in daily_quests:
-            progress = await quest_engine.get_user_quest_progress(current_user.id, quest.id)
+            progress = quests_progress.get(quest.id, {})
             quest_dict = quest.dict()
             quest_dict.update({
                 "user_progress": progress.get("progress", {}),
@@ -79,10 +82,6 @@ async def claim_quest_rewards(
 ):
     """Réclamer les récompenses d'une quête terminée"""
     try:
-        from achievements import QuestEngine
-        
-        quest_engine = QuestEngine()
-        
         # Vérifier que la quête est terminée et que les récompenses ne sont pas déjà réclamées
         progress = await quest_engine.get_user_quest_progress(current_user.id, quest_id)
         
@@ -104,8 +103,14 @@ async def claim_quest_rewards(
                 detail="Les récompenses ont déjà été réclamées pour cette quête"
             )
         
-        # Réclamer les récompenses
-        claimed_rewards = await quest_engine.claim_quest_rewards(current_user.id, quest_id)
+        # Réclamer les récompenses (une réclamation concurrente est refusée par le moteur)
+        try:
+            claimed_rewards = await quest_engine.claim_quest_rewards(current_user.id, quest_id)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
         
         log_user_action(current_user.id, "quest_rewards_claimed", {
             "quest_id": quest_id,
@@ -174,15 +179,17 @@ async def get_my_quest_progress(current_user: User = Depends(get_current_active_
                 "completed_at": user_quest.get("completed_at"),
                 "rewards_claimed": user_quest.get("rewards_claimed", False),
                 "started_at": user_quest["started_at"],
-                "quest_date": user_quest["started_at"].date().isoformat() if "started_at" in user_quest else None
+                "quest_date": user_quest.get("quest_date") or (
+                    user_quest["started_at"].date().isoformat() if "started_at" in user_quest else None
+                )
             })
         
         # Statistiques globales
         total_completed = sum(1 for q in enriched_quests if q["completed"])
         total_rewards_claimed = sum(1 for q in enriched_quests if q["rewards_claimed"])
         
-        # Streak de jours consécutifs avec quêtes complétées
-        quest_streak = await _calculate_quest_streak(current_user.id)
+        # Streak de jours consécutifs avec quêtes complétées (statistiques matérialisées)
+        quest_stats = await get_quest_stats(current_user.id)
         
         return {
             "quest_history": enriched_quests,
@@ -191,7 +198,8 @@ async def get_my_quest_progress(current_user: User = Depends(get_current_active_
                 "total_completed": total_completed,
                 "total_rewards_claimed": total_rewards_claimed,
                 "completion_rate": total_completed / max(len(enriched_quests), 1),
-                "current_streak": quest_streak,
+                "current_streak": current_streak(quest_stats),
+                "best_streak": quest_stats.get("best_streak", 0),
                 "last_7_days": len(enriched_quests)
             }
         }
@@ -225,42 +233,31 @@ async def get_quest_leaderboard(
         else:  # all
             start_date = datetime.min
         
-        # Pipeline d'agrégation pour le classement
-        pipeline = [
-            {
-                "$match": {
-                    "completed": True,
-                    "completed_at": {"$gte": start_date}
-                }
-            },
-            {
-                "$group": {
-                    "_id": "$user_id",
-                    "quests_completed": {"$sum": 1},
-                    "last_completion": {"$max": "$completed_at"},
-                    "rewards_claimed_count": {"$sum": {"$cond": ["$rewards_claimed", 1, 0]}}
-                }
-            },
-            {"$sort": {"quests_completed": -1, "last_completion": -1}},
-            {"$limit": limit}
-        ]
-        
-        leaderboard_data = await db.user_quests.aggregate(pipeline).to_list(limit)
+        # Classement servi depuis les statistiques de quêtes matérialisées
+        leaderboard_data = await quest_leaderboard(None if period == "all" else start_date, limit)
         
-        # Enrichir avec les informations utilisateur
+        # Enrichir avec les informations utilisateur (une requête)
+        users = {
+            user["id"]: user
+            async for user in db.users.find(
+                {"id": {"$in": [entry["user_id"] for entry in leaderboard_data]}},
+                {"_id": 0, "id": 1, "username": 1, "level": 1}
+            )
+        }
         enriched_leaderboard = []
         for i, entry in enumerate(leaderboard_data):
-            user_data = await db.users.find_one({"id": entry["_id"]})
+            user_data = users.get(entry["user_id"])
             if user_data:
                 enriched_leaderboard.append({
                     "rank": i + 1,
-                    "user_id": entry["_id"],
+                    "user_id": entry["user_id"],
                     "username": user_data.get("username", "Inconnu"),
                     "quests_completed": entry["quests_completed"],
-                    "rewards_claimed": entry["rewards_claimed_count"],
-                    "last_completion": entry["last_completion"],
+                    # Une quête est comptée quand ses récompenses sont réclamées
+                    "rewards_claimed": entry["quests_completed"],
+                    "last_completion": entry.get("last_completion"),
                     "level": user_data.get("level", 1),
-                    "is_current_user": entry["_id"] == current_user.id
+                    "is_current_user": entry["user_id"] == current_user.id
                 })
         
         # Trouver le rang de l'utilisateur actuel
@@ -284,61 +281,6 @@ async def get_quest_leaderboard(
             detail="Erreur lors de la génération du classement"
         )
 
-async def _calculate_quest_streak(user_id: str) -> int:
-    """Calcule le nombre de jours consécutifs avec quêtes complétées"""
-    try:
-        from database import db
-        from datetime import datetime, timedelta
-        
-        # Récupérer les quêtes complétées par jour, triées par date décroissante
-        pipeline = [
-            {
-                "$match": {
-                    "user_id": user_id,
-                    "completed": True
-                }
-            },
-            {
-                "$group": {
-                    "_id": {
-                        "$dateToString": {
-                            "format": "%Y-%m-%d",
-                            "date": "$completed_at"
-                        }
-                    },
-                    "quests_completed": {"$sum": 1}
-                }
-            },
-            {"$sort": {"_id": -1}}
-        ]
-        
-        daily_completions = await db.user_quests.aggregate(pipeline).to_list(365)
-        
-        if not daily_completions:
-            return 0
-        
-        # Calculer le streak
-        streak = 0
-        current_date = datetime.utcnow().date()
-        
-        for daily_data in daily_completions:
-            completion_date_str = daily_data["_id"]
-            completion_date = datetime.strptime(completion_date_str, "%Y-%m-%d").date()
-            
-            # Vérifier si c'est le jour actuel ou le jour suivant dans le streak
-            expected_date = current_date - timedelta(days=streak)
-            
-            if completion_date == expected_date:
-                streak += 1
-            else:
-                break
-        
-        return streak
-        
-    except Exception as e:
-        app_logger.error(f"Erreur calcul streak quêtes: {str(e)}")
-        return 0
-
 # =====================================================
 # ACHIEVEMENT/BADGE ENDPOINTS (existing)
 # =====================================================
@@ -438,6 +380,9 @@ async def get_available_badges(
         user_badges = await get_user_badges(current_user.id)
         obtained_badge_ids = [badge["badge_id"] for badge in user_badges]
         
+        # Un seul instantané des critères pour la progression de toute la page
+        snapshot = await achievement_engine.get_criterion_snapshot(current_user.id) or {}
+        
         # Filtrer les badges
         filtered_badges = []
         for badge in all_badges:
@@ -457,6 +402,10 @@ async def get_available_badges(
             badge_dict = badge.dict()
             badge_dict["obtained"] = badge.id in obtained_badge_ids
             badge_dict["obtainable"] = not badge.hidden or badge.id in obtained_badge_ids
+            badge_dict["progress"] = (
+                1.0 if badge_dict["obtained"]
+                else achievement_engine.badge_progress(badge, snapshot)["overall_progress"]
+            )
             
             filtered_badges.append(badge_dict)
         
@@ -555,55 +504,59 @@ async def trigger_achievement_check_endpoint(
 @router.get("/leaderboard")
 async def get_achievements_leaderboard(
     limit: int = Query(50, ge=1, le=100),
+    sort: str = Query("badges", regex="^(badges|score)$"),
     current_user: User = Depends(get_current_active_user)
 ):
-    """Classement des joueurs par nombre de badges"""
+    """Classement des joueurs par nombre de badges (ou score pondéré par la rareté)"""
     try:
-        # Agrégation MongoDB pour compter les badges par utilisateur
-        pipeline = [
-            {
-                "$group": {
-                    "_id": "$user_id",
-                    "badge_count": {"$sum": 1},
-                    "last_badge": {"$max": "$obtained_at"}
-                }
-            },
-            {"$sort": {"badge_count": -1, "last_badge": -1}},
-            {"$limit": limit}
-        ]
-        
         from database import db
-        leaderboard_data = await db.user_badges.aggregate(pipeline).to_list(limit)
         
-        # Enrichir avec les informations utilisateur
+        # Classement matérialisé, trié par index
+        leaderboard_data = await achievements_leaderboard(sort, limit)
+        
+        # Enrichir avec les informations utilisateur (une requête)
+        users = {
+            user["id"]: user
+            async for user in db.users.find(
+                {"id": {"$in": [entry["user_id"] for entry in leaderboard_data]}},
+                {"_id": 0, "id": 1, "username": 1, "level": 1}
+            )
+        }
         enriched_leaderboard = []
         for entry in leaderboard_data:
-            user_data = await db.users.find_one({"id": entry["_id"]})
+            user_data = users.get(entry["user_id"])
             if user_data:
-                # Récupérer le badge le plus rare
-                user_badges = await get_user_badges(entry["_id"])
+                # Badge le plus rare
                 rarest_badge = None
-                if user_badges:
-                    rarity_order = {"common": 0, "rare": 1, "epic": 2, "legendary": 3, "mythic": 4}
-                    rarest_badge = max(user_badges, key=lambda b: rarity_order.get(b["rarity"], 0))
+                rarest = achievement_engine.badges_registry.get((entry.get("rarest") or {}).get("badge_id"))
+                if rarest:
+                    rarest_badge = {
+                        "badge_id": entry["rarest"]["badge_id"],
+                        "name": rarest.name,
+                        "description": rarest.description,
+                        "category": rarest.category,
+                        "rarity": rarest.rarity,
+                        "icon": rarest.icon
+                    }
                 
                 enriched_leaderboard.append({
                     "rank": len(enriched_leaderboard) + 1,
-                    "user_id": entry["_id"],
+                    "user_id": entry["user_id"],
                     "username": user_data.get("username", "Inconnu"),
                     "badge_count": entry["badge_count"],
-                    "last_badge_date": entry["last_badge"],
+                    "score": entry.get("score", 0),
+                    "last_badge_date": entry.get("last_badge"),
                     "rarest_badge": rarest_badge,
                     "level": user_data.get("level", 1),
-                    "is_current_user": entry["_id"] == current_user.id
+                    "is_current_user": entry["user_id"] == current_user.id
                 })
         
-        # Trouver le rang de l'utilisateur actuel
-        current_user_rank = None
-        for i, entry in enumerate(enriched_leaderboard):
-            if entry["is_current_user"]:
-                current_user_rank = i + 1
-                break
+        # Rang de l'utilisateur actuel, même hors de la page
+        current_user_rank = next(
+            (entry["rank"] for entry in enriched_leaderboard if entry["is_current_user"]), None
+        )
+        if current_user_rank is None:
+            current_user_rank = await achievements_user_position(current_user.id, sort)
         
         return {
             "leaderboard": enriched_leaderboard,
@@ -622,12 +575,11 @@ async def get_achievements_leaderboard(
 async def get_achievements_global_stats():
     """Statistiques globales du système d'achievements"""
     try:
-        from database import db
-        
-        # Stats de base
+        # Stats de base (compteurs matérialisés)
+        stats = await achievements_global_stats(top=3)
         total_badges_available = len(achievement_engine.badges_registry)
-        total_badges_earned = await db.user_badges.count_documents({})
-        total_users_with_badges = len(await db.user_badges.distinct("user_id"))
+        total_badges_earned = stats["total_badges_earned"]
+        total_users_with_badges = stats["total_users_with_badges"]
         
         # Distribution par rareté
         rarity_stats = {}
@@ -635,21 +587,14 @@ async def get_achievements_global_stats():
             rarity_stats[badge.rarity] = rarity_stats.get(badge.rarity, 0) + 1
         
         # Top 3 badges les plus obtenus
-        pipeline = [
-            {"$group": {"_id": "$badge_id", "count": {"$sum": 1}}},
-            {"$sort": {"count": -1}},
-            {"$limit": 3}
-        ]
-        
-        top_badges_data = await db.user_badges.aggregate(pipeline).to_list(3)
         top_badges = []
-        for entry in top_badges_data:
-            badge_info = achievement_engine.badges_registry.get(entry["_id"])
+        for entry in stats["most_earned"]:
+            badge_info = achievement_engine.badges_registry.get(entry["badge_id"])
             if badge_info:
                 top_badges.append({
                     "badge_name": badge_info.name,
                     "badge_icon": badge_info.icon,
-                    "times_earned": entry["count"]
+                    "times_earned": entry["times_earned"]
                 })
         
         return {
@@ -671,55 +616,69 @@ async def get_achievements_global_stats():
 # Routes admin
 @router.get("/admin/all-user-badges")
 async def admin_get_all_user_badges(
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
     current_user: User = Depends(get_current_active_user)
 ):
-    """Admin: Récupère tous les badges de tous les utilisateurs"""
+    """Admin: Récupère les badges de tous les utilisateurs, page par page (plus récents d'abord).
+    
+    cursor est le next_cursor de la page précédente.
+    """
     if not is_admin(current_user):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Accès administrateur requis"
         )
     
+    query: Dict[str, Any] = {}
+    if cursor:
+        try:
+            obtained_at, badge_uid = cursor.split("|", 1)
+            obtained_at = datetime.fromisoformat(obtained_at)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Curseur invalide"
+            )
+        query = {"$or": [
+            {"obtained_at": {"$lt": obtained_at}},
+            {"obtained_at": obtained_at, "id": {"$lt": badge_uid}}
+        ]}
+    
     try:
         from database import db
         
-        pipeline = [
-            {
-                "$lookup": {
-                    "from": "users",
-                    "localField": "user_id",
-                    "foreignField": "id",
-                    "as": "user_info"
-                }
-            },
-            {
-                "$project": {
-                    "user_id": 1,
-                    "badge_id": 1,
-                    "obtained_at": 1,
-                    "username": {"$arrayElemAt": ["$user_info.username", 0]}
-                }
-            },
-            {"$sort": {"obtained_at": -1}}
-        ]
+        all_badges = await db.user_badges.find(
+            query, {"_id": 0, "id": 1, "user_id": 1, "badge_id": 1, "obtained_at": 1}
+        ).sort([("obtained_at", -1), ("id", -1)]).limit(limit).to_list(limit)
         
-        all_badges = await db.user_badges.aggregate(pipeline).to_list(1000)
+        # Noms d'utilisateur de la page en une requête
+        usernames = {
+            user["id"]: user.get("username")
+            async for user in db.users.find(
+                {"id": {"$in": list({badge["user_id"] for badge in all_badges})}},
+                {"_id": 0, "id": 1, "username": 1}
+            )
+        }
         
-        # Enrichir avec info badge et convertir ObjectId
+        # Enrichir avec info badge
         for badge in all_badges:
-            # Convertir ObjectId en string
-            if "_id" in badge:
-                badge["_id"] = str(badge["_id"])
-            
+            badge["username"] = usernames.get(badge["user_id"])
             badge_info = achievement_engine.badges_registry.get(badge["badge_id"])
             if badge_info:
                 badge["badge_name"] = badge_info.name
                 badge["badge_rarity"] = badge_info.rarity
                 badge["badge_icon"] = badge_info.icon
         
+        next_cursor = None
+        if len(all_badges) == limit:
+            last = all_badges[-1]
+            next_cursor = f"{last['obtained_at'].isoformat()}|{last['id']}"
+        
         return {
             "all_user_badges": all_badges,
-            "total": len(all_badges)
+            "total": len(all_badges),
+            "next_cursor": next_cursor
         }
         
     except Exception as e:
@@ -760,7 +719,6 @@ async def admin_award_badge(
         
         # Attribuer le badge
         badge_info = achievement_engine.badges_registry[badge_id]
-        await achievement_engine._give_rewards(user_id, badge_info)
         
         from achievements import UserBadge
         user_badge = UserBadge(
@@ -769,7 +727,15 @@ async def admin_award_badge(
             metadata={"awarded_by_admin": current_user.id}
         )
         
-        await db.user_badges.insert_one(user_badge.dict())
+        try:
+            await db.user_badges.insert_one(user_badge.dict())
+        except DuplicateKeyError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="L'utilisateur possède déjà ce badge"
+            )
+        await record_awards([(user_id, badge_id, badge_info.rarity)], user_badge.obtained_at)
+        await achievement_engine._give_rewards(user_id, badge_info)
         
         log_user_action(current_user.id, "admin_award_badge", {
             "target_user": user_id,
@@ -11,6 +11,7 @@ router = APIRouter(prefix="/activity", tags=["Activity Feed"])
 
 # Get database from database module
 from database import db
+from user_counters import record_coin_transaction
 
 @router.get("/feed", response_model=List[ActivityFeed])
 async def get_activity_feed(
@@ -452,7 +453,7 @@ async def reward_for_activity_engagement(user_id: str, engagement_type: str):
             description=reward["description"]
         )
         
-        await db.coin_transactions.insert_one(transaction.dict())
+        await record_coin_transaction(transaction.dict())
         
         # Mettre à jour le profil
         await db.user_profiles.update_one(
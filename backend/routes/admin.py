@@ -1,7 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from typing import List, Optional, Dict, Any
 from models import User, UserResponse, CommunityStats, UserRole, UserStatus
-from auth import get_current_active_user, get_admin_user, is_admin
+from auth import get_current_active_user, get_admin_user, is_admin, invalidate_cached_user
+from cache import invalidate
+from community_leaderboard import remove_user as remove_from_leaderboard
 from datetime import datetime, timedelta
 import logging
 
@@ -142,6 +144,9 @@ async def update_user_status(
         
         logger.info(f"User {user_id} status updated to {new_status} by admin {current_user.username}")
         
+        invalidate_cached_user(user_id)
+        await invalidate.invalidate_user_cache(user_id)
+        
         return {"message": f"User status updated to {new_status}"}
         
     except HTTPException:
@@ -181,6 +186,9 @@ async def update_user_role(
         
         logger.info(f"User {user_id} role updated to {new_role} by admin {current_user.username}")
         
+        invalidate_cached_user(user_id)
+        await invalidate.invalidate_user_cache(user_id)
+        
         return {"message": f"User role updated to {new_role}"}
         
     except HTTPException:
@@ -208,6 +216,7 @@ async def delete_user(
         
         # Delete user profile first
         await db.user_profiles.delete_one({"user_id": user_id})
+        await remove_from_leaderboard(db, user_id)
         
         # Delete user
         result = await db.users.delete_one({"id": user_id})
@@ -220,6 +229,9 @@ async def delete_user(
         
         logger.info(f"User {user_id} deleted by admin {current_user.username}")
         
+        invalidate_cached_user(user_id)
+        await invalidate.invalidate_user_cache(user_id)
+        
         return {"message": "User deleted successfully"}
         
     except HTTPException:
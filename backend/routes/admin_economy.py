@@ -13,6 +13,7 @@ router = APIRouter(prefix="/admin/economy", tags=["Admin Economy"])
 
 # Get database from database module
 from database import db
+from user_counters import record_coin_transaction
 
 # Modèles pour l'administration économique
 
@@ -461,7 +462,7 @@ async def settle_betting_market(
                     reference_id=market_id
                 )
                 
-                await db.coin_transactions.insert_one(payout_transaction.dict())
+                await record_coin_transaction(payout_transaction.dict())
                 await db.user_profiles.update_one(
                     {"user_id": bet["user_id"]},
                     {"$inc": {"coins": total_payout, "total_coins_earned": total_payout}}
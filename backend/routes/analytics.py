@@ -8,7 +8,7 @@ from pydantic import BaseModel
 from typing import Dict, List, Any, Optional
 from datetime import datetime, timedelta
 from auth import get_admin_user
-from database import db
+from database import analytics_db as db  # lecture seule : agrégations routées vers les secondaires
 from monitoring import app_logger
 import asyncio
 from collections import defaultdict
@@ -9,10 +9,12 @@ from models import (
 from auth import (
     authenticate_user, create_access_token, get_password_hash,
     get_current_active_user, get_user_by_email, ACCESS_TOKEN_EXPIRE_MINUTES,
-    pwd_context
+    pwd_context, invalidate_cached_user
 )
 from validation import SecurityValidator, validate_request_security, log_security_event
 from monitoring import log_user_action, log_performance
+from community_leaderboard import remove_user as remove_from_leaderboard
+from user_counters import withdraw_team_registrations
 import logging
 
 logger = logging.getLogger(__name__)
@@ -330,18 +332,22 @@ async def delete_user_account(
                     }
                 )
             else:
-                # Delete team if user is the only member
+                # Delete team if user is the only member, leaving its tournaments
+                await withdraw_team_registrations(team.id)
                 await db.teams.delete_one({"id": team.id})
         
         # Remove user from tournament participants
         await db.tournaments.update_many(
             {"participants": {"$in": [user_id]}},
-            {"$pull": {"participants": user_id}}
+            {"$pull": {"participants": user_id}, "$unset": {f"registered_members.{user_id}": ""}}
         )
         
         # Delete user profile
         await db.user_profiles.delete_one({"user_id": user_id})
         
+        # Remove user from the community leaderboard
+        await remove_from_leaderboard(db, user_id)
+        
         # Delete user's content (news, tutorials where they are author)
         await db.news.delete_many({"author_id": user_id})
         await db.tutorials.delete_many({"author_id": user_id})
@@ -357,6 +363,8 @@ async def delete_user_account(
         
         logger.info(f"User account {username} ({user_id}) deleted successfully with all associated data")
         
+        invalidate_cached_user(user_id)
+        
         return {
             "message": f"Account '{username}' has been permanently deleted along with all associated data",
             "deleted_data": {
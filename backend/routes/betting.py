@@ -13,6 +13,7 @@ router = APIRouter(prefix="/betting", tags=["Betting System"])
 
 # Get database from database module
 from database import db
+from user_counters import record_coin_transaction
 
 # Modèles pour le système de paris
 
@@ -445,7 +446,7 @@ async def place_bet(
             reference_id=new_bet.id
         )
         
-        await db.coin_transactions.insert_one(transaction.dict())
+        await record_coin_transaction(transaction.dict())
         
         await db.user_profiles.update_one(
             {"user_id": current_user.id},
@@ -713,7 +714,7 @@ async def settle_betting_market(
                     reference_id=bet.id
                 )
                 
-                await db.coin_transactions.insert_one(payout_transaction.dict())
+                await record_coin_transaction(payout_transaction.dict())
                 
                 await db.user_profiles.update_one(
                     {"user_id": bet.user_id},
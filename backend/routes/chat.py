@@ -14,6 +14,7 @@ router = APIRouter(prefix="/chat", tags=["Chat & Messaging"])
 
 # Get database from database module
 from database import db
+from user_counters import record_coin_transaction
 
 # Gestionnaire de connexions WebSocket
 class ConnectionManager:
@@ -605,7 +606,7 @@ async def reward_user_for_chat_activity(user_id: str, username: str):
             description="Participation active au chat communautaire"
         )
         
-        await db.coin_transactions.insert_one(transaction.dict())
+        await record_coin_transaction(transaction.dict())
         
         # Mettre à jour le profil
         await db.user_profiles.update_one(
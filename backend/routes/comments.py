@@ -13,6 +13,7 @@ router = APIRouter(prefix="/comments", tags=["Comments & Ratings"])
 
 # Get database from database module
 from database import db
+from user_counters import record_coin_transaction, record_comment
 
 # Commentaires sur les utilisateurs
 
@@ -58,6 +59,7 @@ async def create_user_comment(
         )
         
         await db.user_comments.insert_one(new_comment.dict())
+        await record_comment(current_user.id)
         
         # Mettre à jour les statistiques du profil cible
         await update_user_rating_stats(comment_data.target_user_id)
@@ -192,7 +194,10 @@ async def delete_user_comment(
             )
         
         # Supprimer le commentaire
-        await db.user_comments.delete_one({"id": comment_id})
+        deleted = await db.user_comments.delete_one({"id": comment_id})
+        # Une suppression concurrente l'a déjà décompté
+        if deleted.deleted_count:
+            await record_comment(comment_data["author_id"], -1)
         
         # Mettre à jour les statistiques du profil cible
         await update_user_rating_stats(comment_data["target_user_id"])
@@ -247,6 +252,7 @@ async def create_team_comment(
         )
         
         await db.team_comments.insert_one(new_comment.dict())
+        await record_comment(current_user.id)
         
         # Mettre à jour les statistiques de l'équipe
         await update_team_rating_stats(comment_data.team_id)
@@ -546,7 +552,7 @@ async def reward_user_for_comment(user_id: str, username: str):
             description="Récompense pour commentaire constructif"
         )
         
-        await db.coin_transactions.insert_one(transaction.dict())
+        await record_coin_transaction(transaction.dict())
         
         # Mettre à jour le profil
         await db.user_profiles.update_one(
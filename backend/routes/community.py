@@ -13,9 +13,10 @@ router = APIRouter(prefix="/community", tags=["Community"])
 
 # Get database from database module
 from database import db
+from community_leaderboard import get_top_players, victory_type
 
 @router.get("/stats")
-@cached(ttl=600, key_prefix="community_stats")  # Cache for 10 minutes
+@cached(ttl=600, key_prefix="community_stats", local=True, stale_ttl=120, tags=["community", "tournaments"])  # Cache for 10 minutes, served stale while refreshing
 async def get_community_stats():
     """Get overall community statistics."""
     try:
@@ -226,39 +227,8 @@ async def delete_community_post(
 async def get_community_leaderboard():
     """Get community leaderboard with trophies and rankings."""
     try:
-        # Get all users with their tournament victories
-        users = await db.users.find({}).to_list(100)
-        
-        leaderboard = []
-        for user_data in users:
-            user = User(**user_data)
-            
-            # Count tournament victories by type
-            victories = await get_user_tournament_victories(user.id)
-            
-            # Calculate total points based on victories
-            total_points = (
-                victories["1v1"] * 100 +      # 100 points per 1v1 victory
-                victories["2v2"] * 150 +      # 150 points per 2v2 victory  
-                victories["5v5"] * 200        # 200 points per 5v5 victory
-            )
-            
-            total_trophies = sum(victories.values())
-            
-            leaderboard.append({
-                "user_id": user.id,
-                "username": user.username,
-                "total_points": total_points,
-                "total_trophies": total_trophies,
-                "victories_1v1": victories["1v1"],
-                "victories_2v2": victories["2v2"],
-                "victories_5v5": victories["5v5"],
-                "role": user.role,
-                "created_at": user.created_at
-            })
-        
-        # Sort by total points descending
-        leaderboard.sort(key=lambda x: x["total_points"], reverse=True)
+        # Materialized leaderboard, already sorted by total points
+        leaderboard = await get_top_players(db, limit=50)
         
         # Add ranks
         for i, player in enumerate(leaderboard):
@@ -278,7 +248,7 @@ async def get_community_leaderboard():
             else:
                 player["badge"] = "Rising"
         
-        return {"leaderboard": leaderboard[:50]}  # Top 50
+        return {"leaderboard": leaderboard}  # Top 50
         
     except Exception as e:
         logger.error(f"Error getting community leaderboard: {str(e)}")
@@ -299,24 +269,7 @@ async def get_user_tournament_victories(user_id: str) -> dict:
         victories = {"1v1": 0, "2v2": 0, "5v5": 0}
         
         for tournament in won_tournaments:
-            # Determine tournament type based on max_participants or tournament name
-            max_participants = tournament.get("max_participants", 2)
-            tournament_name = tournament.get("title", "").lower()
-            
-            if "1v1" in tournament_name or max_participants <= 2:
-                victories["1v1"] += 1
-            elif "2v2" in tournament_name or max_participants <= 4:
-                victories["2v2"] += 1
-            elif "5v5" in tournament_name or max_participants >= 5:
-                victories["5v5"] += 1
-            else:
-                # Default based on participant count
-                if max_participants <= 2:
-                    victories["1v1"] += 1
-                elif max_participants <= 4:
-                    victories["2v2"] += 1
-                else:
-                    victories["5v5"] += 1
+            victories[victory_type(tournament)] += 1
         
         return victories
         
@@ -325,7 +278,11 @@ async def get_user_tournament_victories(user_id: str) -> dict:
         return {"1v1": 0, "2v2": 0, "5v5": 0}
 
 @router.get("/members")
-@cached(ttl=300, key_prefix="community_members")  # Cache for 5 minutes
+@cached(
+    ttl=300,
+    key_prefix="community_members",
+    tags=["community", lambda result: [f"user:{member['id']}" for member in result["members"]]]
+)  # Cache for 5 minutes
 async def get_community_members():
     """Get community members with enhanced profiles."""
     try:
@@ -377,7 +334,11 @@ async def get_community_members():
         )
 
 @router.get("/teams")
-@cached(ttl=300, key_prefix="community_teams")  # Cache for 5 minutes
+@cached(
+    ttl=300,
+    key_prefix="community_teams",
+    tags=["community", "teams", lambda result: [f"team:{team['id']}" for team in result["teams"]]]
+)  # Cache for 5 minutes
 async def get_community_teams():
     """Get community teams with rankings."""
     try:
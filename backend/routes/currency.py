@@ -15,6 +15,7 @@ router = APIRouter(prefix="/currency", tags=["Currency & Marketplace"])
 
 # Get database from database module
 from database import db
+from user_counters import record_coin_transaction
 
 # Fonction pour récompenser les participants de tournoi
 async def reward_tournament_participants(tournament_id: str, participants: List[str], winner_id: str = None):
@@ -52,7 +53,7 @@ async def reward_tournament_participants(tournament_id: str, participants: List[
                 reference_id=tournament_id
             )
             
-            await db.coin_transactions.insert_one(participation_transaction.dict())
+            await record_coin_transaction(participation_transaction.dict())
             
             # Mettre à jour le profil
             await db.user_profiles.update_one(
@@ -78,7 +79,7 @@ async def reward_tournament_participants(tournament_id: str, participants: List[
                 reference_id=tournament_id
             )
             
-            await db.coin_transactions.insert_one(victory_transaction.dict())
+            await record_coin_transaction(victory_transaction.dict())
             
             # Bonus gagnant
             await db.user_profiles.update_one(
@@ -215,7 +216,7 @@ async def earn_coins(
         )
         
         # Enregistrer la transaction
-        await db.coin_transactions.insert_one(transaction.dict())
+        await record_coin_transaction(transaction.dict())
         
         # Mettre à jour le solde de l'utilisateur
         await db.user_profiles.update_one(
@@ -282,7 +283,7 @@ async def spend_coins(
         )
         
         # Enregistrer la transaction
-        await db.coin_transactions.insert_one(transaction.dict())
+        await record_coin_transaction(transaction.dict())
         
         # Mettre à jour le solde de l'utilisateur
         await db.user_profiles.update_one(
@@ -343,7 +344,7 @@ async def claim_daily_bonus(current_user: User = Depends(get_current_active_user
             description=f"Bonus quotidien de connexion (Niveau {user_level})"
         )
         
-        await db.coin_transactions.insert_one(transaction.dict())
+        await record_coin_transaction(transaction.dict())
         
         # Mettre à jour le solde et donner de l'XP
         await db.user_profiles.update_one(
@@ -489,7 +490,7 @@ async def buy_marketplace_item(
             reference_id=item_id
         )
         
-        await db.coin_transactions.insert_one(transaction.dict())
+        await record_coin_transaction(transaction.dict())
         
         return {
             "message": "Article acheté avec succès",
@@ -690,7 +691,7 @@ async def check_level_up(user_id: str, username: str):
             reference_id=f"level_{new_level}"
         )
         
-        await db.coin_transactions.insert_one(level_transaction.dict())
+        await record_coin_transaction(level_transaction.dict())
         
         # Créer une activité dans le feed
         await create_activity_feed_entry(
@@ -779,7 +780,7 @@ async def admin_give_coins(
             reference_id=current_user.id
         )
         
-        await db.coin_transactions.insert_one(transaction.dict())
+        await record_coin_transaction(transaction.dict())
         
         # Mettre à jour le solde
         await db.user_profiles.update_one(
@@ -4,20 +4,54 @@ Endpoints pour consultation et gestion du système de classement ELO
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from pydantic import BaseModel, Field
 from typing import List, Dict, Any, Optional
 from models import User
 from auth import get_current_active_user, is_admin
 from elo_system import (
-    elo_engine, EloTier, GameMode,
+    elo_engine, EloTier, GameMode, EloMatchResult, EloTeamMatchResult,
     get_user_elo_complete, get_elo_rankings,
-    process_tournament_match, process_regular_match
+    process_tournament_match, process_regular_match, process_match_results,
+    process_team_match_results, main_elo_key
 )
+from elo_rank_index import elo_rank_index
+from elo_replay import replay_season
 from monitoring import log_user_action, app_logger
 from database import db
 from datetime import datetime
 
 router = APIRouter(prefix="/elo", tags=["ELO Rating System"])
 
+MAX_BATCH_MATCHES = 5000
+
+class AdminMatchResult(BaseModel):
+    """Résultat de match à importer (mêmes paramètres que /admin/process-match)"""
+    winner_id: str
+    loser_id: str
+    game: str
+    tournament_id: Optional[str] = None
+    match_id: Optional[str] = None
+    is_tournament: bool = True
+    importance: float = 1.0
+
+class AdminMatchBatch(BaseModel):
+    """Lot ordonné de résultats de matchs"""
+    matches: List[AdminMatchResult] = Field(..., min_length=1, max_length=MAX_BATCH_MATCHES)
+
+class AdminTeamMatchResult(BaseModel):
+    """Résultat de match par équipes : composition du camp gagnant et du camp perdant"""
+    winner_ids: List[str] = Field(..., min_length=1)
+    loser_ids: List[str] = Field(..., min_length=1)
+    game: str
+    tournament_id: Optional[str] = None
+    match_id: Optional[str] = None
+    is_tournament: bool = True
+    importance: float = 1.0
+
+class AdminTeamMatchBatch(BaseModel):
+    """Lot ordonné de matchs par équipes (ex: un tour de tournoi 5v5)"""
+    matches: List[AdminTeamMatchResult] = Field(..., min_length=1, max_length=MAX_BATCH_MATCHES)
+
 # =====================================================
 # PUBLIC ELO ENDPOINTS
 # =====================================================
@@ -86,7 +120,11 @@ async def get_elo_leaderboard(
                 entry["is_current_user"] = False
         
         # Si l'utilisateur n'est pas dans le top, récupérer sa position
-        if current_user_rank is None:
+        if current_user_rank is None and game and mode:
+            user_rank = await elo_rank_index.rank(elo_engine.CURRENT_SEASON, game, mode.value, current_user.id)
+            current_user_rank = user_rank["rank"]
+            current_user_rating = user_rank["rating"]
+        elif current_user_rank is None:
             user_elo = await get_user_elo_complete(current_user.id)
             if user_elo and "overall_rating" in user_elo:
                 current_user_rating = user_elo["overall_rating"]
@@ -138,6 +176,99 @@ async def get_elo_leaderboard(
             detail="Erreur lors de la génération du classement"
         )
 
+async def _with_usernames(entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Ajoute username et display_name aux entrées de classement (une seule requête)"""
+    users = await db.users.find(
+        {"id": {"$in": [entry["user_id"] for entry in entries]}},
+        {"_id": 0, "id": 1, "username": 1, "display_name": 1}
+    ).to_list(None)
+    users_by_id = {user["id"]: user for user in users}
+    for entry in entries:
+        user = users_by_id.get(entry["user_id"], {})
+        entry["username"] = user.get("username", "Inconnu")
+        entry["display_name"] = user.get("display_name", entry["username"])
+    return entries
+
+@router.get("/rank/{user_id}")
+async def get_user_elo_rank(
+    user_id: str,
+    game: str = Query(..., regex="^(cs2|lol|wow|sc2|minecraft)$"),
+    mode: GameMode = GameMode.TOURNAMENT
+):
+    """Rang d'un joueur dans un classement (jeu, mode) de la saison courante"""
+    try:
+        user_rank = await elo_rank_index.rank(elo_engine.CURRENT_SEASON, game, mode.value, user_id)
+        return {
+            "user_id": user_id,
+            "season": elo_engine.CURRENT_SEASON,
+            "game": game,
+            "mode": mode.value,
+            **user_rank
+        }
+    except Exception as e:
+        app_logger.error(f"Erreur récupération rang ELO: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Erreur lors de la récupération du rang"
+        )
+
+@router.get("/rank/{user_id}/neighbours")
+async def get_user_elo_neighbours(
+    user_id: str,
+    game: str = Query(..., regex="^(cs2|lol|wow|sc2|minecraft)$"),
+    mode: GameMode = GameMode.TOURNAMENT,
+    radius: int = Query(5, ge=1, le=50)
+):
+    """Joueurs classés juste au-dessus et en dessous d'un joueur"""
+    try:
+        result = await elo_rank_index.neighbours(elo_engine.CURRENT_SEASON, game, mode.value, user_id, radius)
+        if result["rank"] is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Joueur non classé dans ce classement"
+            )
+        result["neighbours"] = await _with_usernames(result["neighbours"])
+        return {
+            "user_id": user_id,
+            "season": elo_engine.CURRENT_SEASON,
+            "game": game,
+            "mode": mode.value,
+            **result
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        app_logger.error(f"Erreur récupération voisins ELO: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Erreur lors de la récupération du classement"
+        )
+
+@router.get("/rankings/{game}/{mode}")
+async def get_elo_rankings_page(
+    game: str,
+    mode: GameMode,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=200)
+):
+    """Page du classement (jeu, mode) de la saison courante, à partir d'un rang"""
+    try:
+        entries = await elo_rank_index.page(elo_engine.CURRENT_SEASON, game, mode.value, offset, limit)
+        return {
+            "season": elo_engine.CURRENT_SEASON,
+            "game": game,
+            "mode": mode.value,
+            "offset": offset,
+            "limit": limit,
+            "rankings": await _with_usernames(entries)
+        }
+    except Exception as e:
+        app_logger.error(f"Erreur récupération page classement ELO: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Erreur lors de la récupération du classement"
+        )
+
 @router.get("/tiers")
 async def get_elo_tiers():
     """Récupère la liste des tiers ELO avec leurs seuils"""
@@ -268,88 +399,9 @@ async def get_my_elo_match_history(
 
 @router.get("/statistics")
 async def get_elo_global_statistics():
-    """Statistiques globales du système ELO"""
+    """Statistiques globales du système ELO (instantané recalculé périodiquement, voir generated_at)"""
     try:
-        # Statistiques générales
-        total_players = await db.elo_ratings.count_documents({"season": elo_engine.CURRENT_SEASON})
-        total_matches = await db.elo_matches.count_documents({"season": elo_engine.CURRENT_SEASON})
-        
-        # Distribution par tier
-        tier_stats = {}
-        for tier in EloTier:
-            min_rating, max_rating = _get_tier_range(tier)
-            query = {
-                "season": elo_engine.CURRENT_SEASON,
-                "rating": {"$gte": min_rating}
-            }
-            if max_rating:
-                query["rating"]["$lte"] = max_rating
-            
-            count = await db.elo_ratings.count_documents(query)
-            tier_stats[tier.value] = count
-        
-        # Joueurs les plus actifs
-        most_active_pipeline = [
-            {"$match": {"season": elo_engine.CURRENT_SEASON}},
-            {"$sort": {"matches_played": -1}},
-            {"$limit": 5},
-            {
-                "$lookup": {
-                    "from": "users",
-                    "localField": "user_id",
-                    "foreignField": "id",
-                    "as": "user_info"
-                }
-            },
-            {
-                "$project": {
-                    "_id": 0,  # Exclude MongoDB ObjectId
-                    "user_id": 1,
-                    "username": {"$arrayElemAt": ["$user_info.username", 0]},
-                    "rating": 1,
-                    "matches_played": 1,
-                    "wins": 1,
-                    "win_rate": 1
-                }
-            }
-        ]
-        
-        most_active = await db.elo_ratings.aggregate(most_active_pipeline).to_list(5)
-        
-        # Rating moyen par jeu
-        avg_by_game_pipeline = [
-            {"$match": {"season": elo_engine.CURRENT_SEASON}},
-            {
-                "$group": {
-                    "_id": "$game",
-                    "avg_rating": {"$avg": "$rating"},
-                    "player_count": {"$sum": 1},
-                    "max_rating": {"$max": "$rating"}
-                }
-            },
-            {"$sort": {"player_count": -1}}
-        ]
-        
-        game_stats = await db.elo_ratings.aggregate(avg_by_game_pipeline).to_list(10)
-        
-        return {
-            "overview": {
-                "total_players": total_players,
-                "total_matches": total_matches,
-                "current_season": elo_engine.CURRENT_SEASON
-            },
-            "tier_distribution": tier_stats,
-            "most_active_players": most_active,
-            "statistics_by_game": [
-                {
-                    "game": stat["_id"],
-                    "average_rating": round(stat["avg_rating"], 1),
-                    "player_count": stat["player_count"],
-                    "highest_rating": stat["max_rating"]
-                }
-                for stat in game_stats
-            ]
-        }
+        return await elo_engine.get_global_statistics()
         
     except Exception as e:
         app_logger.error(f"Erreur statistiques globales ELO: {str(e)}")
@@ -420,6 +472,172 @@ async def admin_process_match(
             detail="Erreur lors du traitement du match"
         )
 
+@router.post("/admin/process-matches")
+async def admin_process_matches(
+    batch: AdminMatchBatch,
+    current_user: User = Depends(get_current_active_user)
+):
+    """Admin: Importer un lot ordonné de résultats de matchs (ex: après une LAN)"""
+    if not is_admin(current_user):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Accès administrateur requis"
+        )
+    
+    try:
+        # Vérifier que les utilisateurs existent
+        user_ids = {m.winner_id for m in batch.matches} | {m.loser_id for m in batch.matches}
+        found = await db.users.find({"id": {"$in": list(user_ids)}}, {"_id": 0, "id": 1}).to_list(None)
+        missing = user_ids - {user["id"] for user in found}
+        if missing:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Utilisateurs non trouvés: {', '.join(sorted(missing))}"
+            )
+        
+        # Mêmes règles que le traitement unitaire (tournoi ou match normal)
+        results = [
+            EloMatchResult(
+                winner_id=m.winner_id,
+                loser_id=m.loser_id,
+                game=m.game,
+                mode=GameMode.TOURNAMENT,
+                match_id=m.match_id,
+                tournament_id=m.tournament_id,
+                is_tournament=True,
+                match_importance=1.5
+            ) if m.is_tournament and m.tournament_id else EloMatchResult(
+                winner_id=m.winner_id,
+                loser_id=m.loser_id,
+                game=m.game,
+                mode=GameMode.SOLO,
+                match_id=m.match_id,
+                is_tournament=False,
+                match_importance=m.importance
+            )
+            for m in batch.matches
+        ]
+        
+        result = await process_match_results(results)
+        
+        log_user_action(current_user.id, "admin_elo_matches_processed", {
+            "matches": result["processed"],
+            "ratings_updated": result["ratings_updated"]
+        })
+        
+        return {
+            "message": f"{result['processed']} matchs traités avec succès",
+            **result
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        app_logger.error(f"Erreur traitement lot de matchs admin: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Erreur lors du traitement des matchs"
+        )
+
+@router.post("/admin/process-team-matches")
+async def admin_process_team_matches(
+    batch: AdminTeamMatchBatch,
+    current_user: User = Depends(get_current_active_user)
+):
+    """Admin: Traiter un lot de matchs par équipes (2v2, 5v5) en une écriture groupée"""
+    if not is_admin(current_user):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Accès administrateur requis"
+        )
+    
+    try:
+        for m in batch.matches:
+            rosters = m.winner_ids + m.loser_ids
+            if len(set(rosters)) != len(rosters):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Un joueur ne peut apparaître qu'une fois par match"
+                )
+        
+        # Vérifier que les utilisateurs existent
+        user_ids = {user_id for m in batch.matches for user_id in m.winner_ids + m.loser_ids}
+        found = await db.users.find({"id": {"$in": list(user_ids)}}, {"_id": 0, "id": 1}).to_list(None)
+        missing = user_ids - {user["id"] for user in found}
+        if missing:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Utilisateurs non trouvés: {', '.join(sorted(missing))}"
+            )
+        
+        # Les tournois ont plus d'importance, comme pour les matchs individuels
+        results = [
+            EloTeamMatchResult(
+                winner_ids=m.winner_ids,
+                loser_ids=m.loser_ids,
+                game=m.game,
+                mode=GameMode.TEAM,
+                match_id=m.match_id,
+                tournament_id=m.tournament_id,
+                is_tournament=bool(m.is_tournament and m.tournament_id),
+                match_importance=1.5 if m.is_tournament and m.tournament_id else m.importance
+            )
+            for m in batch.matches
+        ]
+        
+        result = await process_team_match_results(results)
+        
+        log_user_action(current_user.id, "admin_elo_team_matches_processed", {
+            "matches": result["processed"],
+            "ratings_updated": result["ratings_updated"]
+        })
+        
+        return {
+            "message": f"{result['processed']} matchs par équipes traités avec succès",
+            **result
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        app_logger.error(f"Erreur traitement matchs par équipes admin: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Erreur lors du traitement des matchs par équipes"
+        )
+
+@router.post("/admin/replay-season")
+async def admin_replay_season(
+    season: Optional[str] = None,
+    apply: bool = False,
+    current_user: User = Depends(get_current_active_user)
+):
+    """Admin: Rejouer une saison depuis l'historique des matchs (rapport d'écarts, réécriture si apply)"""
+    if not is_admin(current_user):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Accès administrateur requis"
+        )
+    
+    try:
+        report = await replay_season(db, season=season, apply=apply)
+        
+        log_user_action(current_user.id, "admin_elo_season_replayed", {
+            "season": report["season"],
+            "matches": report["matches_replayed"],
+            "changed": report["differences"]["changed"],
+            "applied": apply
+        })
+        
+        return report
+        
+    except Exception as e:
+        app_logger.error(f"Erreur rejeu saison ELO admin: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Erreur lors du rejeu de la saison"
+        )
+
 @router.post("/admin/reset-user-elo")
 async def admin_reset_user_elo(
     user_id: str,
@@ -458,6 +676,25 @@ async def admin_reset_user_elo(
             }
         )
         
+        reset_ratings = await db.elo_ratings.find(
+            {"user_id": user_id, "season": elo_engine.CURRENT_SEASON},
+            {"_id": 0, "game": 1, "mode": 1}
+        ).to_list(None)
+        await elo_rank_index.update_many(
+            (elo_engine.CURRENT_SEASON, rating["game"], rating["mode"], user_id, new_rating)
+            for rating in reset_ratings
+        )
+        if reset_ratings:
+            # ELO principal et pic du profil suivent les ratings réinitialisés
+            await db.user_profiles.update_one(
+                {"user_id": user_id},
+                elo_engine.main_elo_update(
+                    {main_elo_key(rating["game"], rating["mode"]): new_rating for rating in reset_ratings},
+                    peak=new_rating
+                )
+            )
+        elo_engine.note_rating_changes(result.modified_count)
+        
         log_user_action(current_user.id, "admin_elo_reset", {
             "target_user": user_id,
             "new_rating": new_rating
@@ -487,15 +724,24 @@ async def admin_apply_elo_decay(current_user: User = Depends(get_current_active_
         )
     
     try:
-        decay_count = await elo_engine.apply_inactivity_decay()
+        report = await elo_engine.apply_inactivity_decay()
+        
+        if report.get("already_applied"):
+            return {
+                "message": "Dégradation ELO déjà appliquée aujourd'hui",
+                "players_affected": 0,
+                "report": report
+            }
         
         log_user_action(current_user.id, "admin_elo_decay_applied", {
-            "players_affected": decay_count
+            "players_affected": report["decayed"],
+            "duration_seconds": report["duration_seconds"]
         })
         
         return {
-            "message": f"Dégradation ELO appliquée à {decay_count} joueurs inactifs",
-            "players_affected": decay_count
+            "message": f"Dégradation ELO appliquée à {report['decayed']} joueurs inactifs",
+            "players_affected": report["decayed"],
+            "report": report
         }
         
     except Exception as e:
@@ -504,17 +750,3 @@ async def admin_apply_elo_decay(current_user: User = Depends(get_current_active_
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Erreur lors de l'application de la dégradation"
         )
-
-def _get_tier_range(tier: EloTier) -> tuple:
-    """Retourne les seuils min/max d'un tier"""
-    ranges = {
-        EloTier.BRONZE: (0, 999),
-        EloTier.SILVER: (1000, 1199),
-        EloTier.GOLD: (1200, 1399),
-        EloTier.PLATINUM: (1400, 1599),
-        EloTier.DIAMOND: (1600, 1799),
-        EloTier.MASTER: (1800, 1999),
-        EloTier.GRANDMASTER: (2000, 2199),
-        EloTier.CHALLENGER: (2200, None)
-    }
-    return ranges.get(tier, (1200, 1399))
\ No newline at end of file
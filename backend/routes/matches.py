@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
 from typing import List, Optional
 from models import Match, MatchCreate, User, MatchStatus
 from auth import get_current_active_user, is_admin, is_moderator_or_admin
@@ -12,6 +12,11 @@ router = APIRouter(prefix="/matches", tags=["Matches"])
 
 # Get database from database module
 from database import db
+from participants import resolve_participants, build_participants_map
+from community_leaderboard import sync_tournament_winner
+from user_counters import sync_tournament_winner as sync_winner_counters
+from tournament_predictor import get_prediction, refresh_prediction
+from pymongo import ReturnDocument
 
 @router.get("/tournament/{tournament_id}", response_model=List[Match])
 async def get_tournament_matches(tournament_id: str):
@@ -172,6 +177,7 @@ def generate_bracket_tournament(tournament_id: str, participants: List[str]) ->
 async def update_match_result(
     match_id: str,
     request_data: dict,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_active_user)
 ):
     """Update match result (admin only)."""
@@ -230,6 +236,9 @@ async def update_match_result(
         # Update next round match if exists
         await update_next_round_match(match.tournament_id, match.round_number, match.match_number, winner_id)
 
+        # Refresh live win probabilities once the response is sent
+        background_tasks.add_task(refresh_prediction, match.tournament_id)
+
         logger.info(f"Match {match_id} result updated - Winner: {winner_id}")
         
         return {"message": "Match result updated successfully"}
@@ -294,7 +303,7 @@ async def check_tournament_completion(tournament_id: str):
         
         if final_match and final_match["status"] == MatchStatus.COMPLETED and final_match["winner_id"]:
             # Tournament is complete - update with winner
-            await db.tournaments.update_one(
+            previous = await db.tournaments.find_one_and_update(
                 {"id": tournament_id},
                 {
                     "$set": {
@@ -303,8 +312,15 @@ async def check_tournament_completion(tournament_id: str):
                         "tournament_end": datetime.utcnow(),
                         "updated_at": datetime.utcnow()
                     }
-                }
+                },
+                projection={
+                    "_id": 0, "status": 1, "winner_id": 1, "title": 1, "max_participants": 1,
+                    "game": 1, "tournament_type": 1
+                },
+                return_document=ReturnDocument.BEFORE
             )
+            await sync_tournament_winner(db, previous, final_match["winner_id"])
+            await sync_winner_counters(previous, final_match["winner_id"])
             logger.info(f"Tournament {tournament_id} completed - Winner: {final_match['winner_id']}")
         
     except Exception as e:
@@ -330,33 +346,9 @@ async def get_tournament_bracket(tournament_id: str):
         # Get participant names mapping
         participants_map = {}
         if tournament:
-            for participant_id in tournament.get("participants", []):
-                # Try to find as user first
-                user_data = await db.users.find_one({"id": participant_id})
-                if user_data:
-                    participants_map[participant_id] = {
-                        "type": "user",
-                        "name": user_data["username"],
-                        "display_name": user_data["username"]
-                    }
-                    continue
-                
-                # Try to find as team
-                team_data = await db.teams.find_one({"id": participant_id})
-                if team_data:
-                    participants_map[participant_id] = {
-                        "type": "team",
-                        "name": team_data["name"],
-                        "display_name": f"{team_data['name']} ({len(team_data['members'])}/{team_data['max_members']})"
-                    }
-                    continue
-                
-                # Fallback
-                participants_map[participant_id] = {
-                    "type": "unknown", 
-                    "name": f"Participant {participant_id[:8]}",
-                    "display_name": f"Participant {participant_id[:8]}"
-                }
+            participants = tournament.get("participants", [])
+            resolved = await resolve_participants(participants, include_profiles=False, include_members=False)
+            participants_map = build_participants_map(participants, resolved)
 
         # Organize matches by rounds and enrich with participant names
         rounds = {}
@@ -419,6 +411,27 @@ async def get_tournament_bracket(tournament_id: str):
             detail="Error fetching tournament bracket"
         )
 
+@router.get("/tournament/{tournament_id}/predictions")
+async def get_tournament_predictions(tournament_id: str):
+    """Monte-Carlo probabilities of each participant reaching each round and winning."""
+    try:
+        prediction = await get_prediction(tournament_id)
+        if not prediction:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Tournament has no bracket"
+            )
+        return prediction
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error predicting tournament {tournament_id}: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error predicting tournament outcome"
+        )
+
 @router.get("/{match_id}", response_model=Match)
 async def get_match(match_id: str):
     """Get a specific match."""
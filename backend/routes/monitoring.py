@@ -110,11 +110,21 @@ async def get_metrics() -> Dict[str, Any]:
         app_logger.error("Failed to get database metrics", error=str(e))
         db_metrics = {"error": "Unable to fetch database metrics"}
     
+    # Driver-side connection pool metrics
+    from database import POOL_OPTIONS
+    from db_metrics import pool_listener
+    db_metrics["pool"] = {
+        "config": POOL_OPTIONS,
+        **pool_listener.snapshot()
+    }
+    
     # Cache metrics
-    from cache import cache
+    from cache import cache, local_cache, single_flight
     cache_metrics = {
         "enabled": cache.enabled,
-        "default_ttl": cache.default_ttl if cache.enabled else None
+        "default_ttl": cache.default_ttl if cache.enabled else None,
+        "local": local_cache.stats(),
+        "single_flight_coalesced": single_flight.coalesced
     }
     
     if cache.enabled and cache.client:
@@ -143,6 +153,16 @@ async def get_metrics() -> Dict[str, Any]:
         }
     }
 
+@router.get("/queries")
+async def get_query_metrics() -> Dict[str, Any]:
+    """Per-route MongoDB query counts and p50/p99 durations (N+1 detection)"""
+    from db_metrics import query_metrics
+    
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        **query_metrics.snapshot()
+    }
+
 @router.get("/logs/recent")
 async def get_recent_logs(
     level: str = "INFO",
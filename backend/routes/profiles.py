@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
 from typing import Optional
 from models import User
-from auth import get_current_active_user
+from auth import get_current_active_user, invalidate_cached_user
+from cache import invalidate
 from datetime import datetime
 import logging
 import uuid
@@ -144,6 +145,9 @@ async def update_my_profile(
         
         logger.info(f"Profile updated for user {current_user.username}")
         
+        invalidate_cached_user(current_user.id)
+        await invalidate.invalidate_user_cache(current_user.id)
+        
         return {"message": "Profile updated successfully"}
         
     except Exception as e:
@@ -210,6 +214,9 @@ async def upload_avatar(
         
         logger.info(f"Avatar uploaded for user {current_user.username}: {filename}")
         
+        invalidate_cached_user(current_user.id)
+        await invalidate.invalidate_user_cache(current_user.id)
+        
         return {
             "message": "Avatar uploaded successfully",
             "avatar_url": avatar_url
@@ -300,6 +307,9 @@ async def upload_avatar_base64(
         
         logger.info(f"Base64 avatar uploaded for user {current_user.username}")
         
+        invalidate_cached_user(current_user.id)
+        await invalidate.invalidate_user_cache(current_user.id)
+        
         return {
             "message": "Avatar uploaded successfully",
             "avatar_url": avatar_url
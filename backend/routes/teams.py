@@ -11,6 +11,8 @@ router = APIRouter(prefix="/teams", tags=["Teams"])
 
 # Get database from database module
 from database import db
+from cache import invalidate
+from user_counters import withdraw_team_registrations
 
 @router.post("/", response_model=Team)
 async def create_team(
@@ -47,6 +49,8 @@ async def create_team(
         
         logger.info(f"Team created: {team_data.name} by {current_user.username}")
         
+        await invalidate.invalidate_team_cache()
+        
         return new_team
         
     except HTTPException:
@@ -175,6 +179,7 @@ async def join_team(
         )
         
         logger.info(f"User {current_user.username} joined team {team.name}")
+        await invalidate.invalidate_team_cache(team_id)
         
         return {"message": f"Successfully joined team {team.name}"}
         
@@ -219,9 +224,12 @@ async def leave_team(
                     detail="Captain must transfer captaincy or disband team before leaving"
                 )
             else:
-                # If captain is the only member, disband the team
+                # If captain is the only member, disband the team and withdraw its registrations
+                for tournament_id in await withdraw_team_registrations(team_id):
+                    await invalidate.invalidate_tournament_cache(tournament_id)
                 await db.teams.delete_one({"id": team_id})
                 logger.info(f"Team {team.name} disbanded by captain {current_user.username}")
+                await invalidate.invalidate_team_cache(team_id)
                 return {"message": f"Team {team.name} disbanded"}
         
         # Remove user from team
@@ -234,6 +242,7 @@ async def leave_team(
         )
         
         logger.info(f"User {current_user.username} left team {team.name}")
+        await invalidate.invalidate_team_cache(team_id)
         
         return {"message": f"Successfully left team {team.name}"}
         
@@ -290,6 +299,7 @@ async def transfer_captaincy(
         )
         
         logger.info(f"Team {team.name} captaincy transferred to {new_captain_id} by {current_user.username}")
+        await invalidate.invalidate_team_cache(team_id)
         
         return {"message": "Captaincy transferred successfully"}
         
@@ -326,6 +336,10 @@ async def delete_team(
                 detail="Only team captain or admin can delete team"
             )
         
+        # Remove team from its tournaments, withdrawing each registration
+        for tournament_id in await withdraw_team_registrations(team_id):
+            await invalidate.invalidate_tournament_cache(tournament_id)
+        
         # Delete the team
         delete_result = await db.teams.delete_one({"id": team_id})
         
@@ -336,6 +350,7 @@ async def delete_team(
             )
         
         logger.info(f"Team {team.name} deleted by {current_user.username}")
+        await invalidate.invalidate_team_cache(team_id)
         
         return {"message": f"Team '{team.name}' deleted successfully"}
         
@@ -414,6 +429,7 @@ async def update_team(
         )
         
         logger.info(f"Team {team.name} updated by {current_user.username}")
+        await invalidate.invalidate_team_cache(team_id)
         
         return {"message": "Team updated successfully"}
         
@@ -483,6 +499,7 @@ async def add_member_to_team(
         )
         
         logger.info(f"User {user_to_add['username']} added to team {team.name} by {current_user.username}")
+        await invalidate.invalidate_team_cache(team_id)
         
         return {"message": f"User {user_to_add['username']} added to team successfully"}
         
@@ -547,6 +564,7 @@ async def remove_member_from_team(
         )
         
         logger.info(f"User {user_to_remove['username'] if user_to_remove else user_id} removed from team {team.name} by {current_user.username}")
+        await invalidate.invalidate_team_cache(team_id)
         
         return {"message": f"User removed from team successfully"}
         
@@ -760,16 +778,16 @@ async def delete_team(
                 detail=f"Cannot delete team. Team is registered in active tournaments: {', '.join(tournament_names)}"
             )
         
-        # Remove team from all completed tournaments (cleanup)
-        await db.tournaments.update_many(
-            {"participants": {"$in": [team_id]}},
-            {"$pull": {"participants": team_id}}
-        )
+        # Remove team from all completed tournaments (cleanup), withdrawing
+        # each registration from the members' counters
+        for tournament_id in await withdraw_team_registrations(team_id):
+            await invalidate.invalidate_tournament_cache(tournament_id)
         
         # Delete the team
         await db.teams.delete_one({"id": team_id})
         
         logger.info(f"Team {team.name} deleted by captain {current_user.username}")
+        await invalidate.invalidate_team_cache(team_id)
         
         return {"message": f"Team '{team.name}' has been successfully deleted"}
         
@@ -16,6 +16,21 @@ router = APIRouter(prefix="/tournaments", tags=["Tournaments"])
 # Get database from database module
 from database import db
 from cache import cached, invalidate
+from participants import resolve_participants, build_participants_info
+from community_leaderboard import sync_tournament_winner
+from user_counters import (
+    participant_user_ids, record_tournament_registration, sync_tournament_winner as sync_winner_counters
+)
+from pymongo import ReturnDocument
+
+
+def participant_cache_tags(result: dict) -> List[str]:
+    """Cache tags for every user and team shown in a participants payload."""
+    tags = []
+    for participant in result.get("participants", []):
+        tags.append(f"{participant['type']}:{participant['id']}")
+        tags.extend(f"user:{member['id']}" for member in participant.get("members", []))
+    return tags
 
 @router.post("/", response_model=Tournament)
 async def create_tournament(
@@ -35,6 +50,9 @@ async def create_tournament(
         
         logger.info(f"Tournament created: {tournament_data.title} by {current_user.username}")
         
+        # Tournament counts and lists changed
+        await invalidate.invalidate_tournament_cache()
+        
         return new_tournament
         
     except Exception as e:
@@ -45,7 +63,7 @@ async def create_tournament(
         )
 
 @router.get("/", response_model=List[Tournament])
-# @cached(ttl=300, key_prefix="tournaments")  # Cache disabled temporarily
+# @cached(ttl=300, key_prefix="tournaments", tags=["tournaments"])  # Cache disabled temporarily
 async def get_tournaments(
     tournament_status: Optional[TournamentStatus] = None,
     game: Optional[Game] = None,
@@ -128,7 +146,7 @@ def map_tournament_type(db_type: str) -> TournamentType:
     return type_mapping.get(db_type, TournamentType.ELIMINATION)
 
 @router.get("/{tournament_id}", response_model=Tournament)
-@cached(ttl=600, key_prefix="tournament")  # Cache for 10 minutes
+@cached(ttl=600, key_prefix="tournament", tags=["tournaments", "tournament:{tournament_id}"])  # Cache for 10 minutes
 async def get_tournament(tournament_id: str):
     """Get a specific tournament."""
     try:
@@ -175,7 +193,11 @@ async def get_tournament(tournament_id: str):
         )
 
 @router.get("/{tournament_id}/participants-info")
-@cached(ttl=180, key_prefix="tournament_participants")  # Cache for 3 minutes
+@cached(
+    ttl=180,
+    key_prefix="tournament_participants",
+    tags=["tournaments", "tournament:{tournament_id}", participant_cache_tags]
+)  # Cache for 3 minutes
 async def get_tournament_participants_info(tournament_id: str):
     """Get detailed information about tournament participants."""
     try:
@@ -186,51 +208,9 @@ async def get_tournament_participants_info(tournament_id: str):
                 detail="Tournament not found"
             )
         
-        participants_info = []
         participants = tournament_data.get("participants", [])
-        
-        # Get detailed info for each participant
-        for participant_id in participants:
-            # Try to get user info first
-            user_data = await db.users.find_one({"id": participant_id})
-            if user_data:
-                # Get user profile for additional info
-                profile_data = await db.user_profiles.find_one({"user_id": participant_id})
-                
-                participant_info = {
-                    "id": participant_id,
-                    "type": "user",
-                    "name": user_data.get("username", "Utilisateur"),
-                    "display_name": profile_data.get("display_name") if profile_data else user_data.get("username", "Utilisateur"),
-                    "level": profile_data.get("level", 1) if profile_data else 1,
-                    "game_info": profile_data.get("gaming_info", {}) if profile_data else {},
-                    "avatar": profile_data.get("avatar_url") if profile_data else None,
-                    "registered_at": datetime.utcnow()  # Could be tracked separately
-                }
-                participants_info.append(participant_info)
-            else:
-                # Try to get team info
-                team_data = await db.teams.find_one({"id": participant_id})
-                if team_data:
-                    team_members = []
-                    for member_id in team_data.get("members", []):
-                        member_data = await db.users.find_one({"id": member_id})
-                        if member_data:
-                            team_members.append({
-                                "id": member_id,
-                                "username": member_data.get("username", "Membre"),
-                                "role": "member"  # Could be expanded with roles
-                            })
-                    
-                    participant_info = {
-                        "id": participant_id,
-                        "type": "team",
-                        "name": team_data.get("name", "Équipe"),
-                        "members": team_members,
-                        "members_count": len(team_members),
-                        "registered_at": team_data.get("created_at", datetime.utcnow())
-                    }
-                    participants_info.append(participant_info)
+        resolved = await resolve_participants(participants)
+        participants_info = build_participants_info(participants, resolved)
         
         # Calculate statistics
         stats = {
@@ -389,11 +369,21 @@ async def register_for_tournament(
                 detail="Tournament is full"
             )
         
-        # Register participant (user or team)
-        await db.tournaments.update_one(
-            {"id": tournament_id},
-            {"$push": {"participants": participant_id}}
+        # Register participant (user or team), storing the users counted for it
+        members = await participant_user_ids(participant_id)
+        registered = await db.tournaments.update_one(
+            {"id": tournament_id, "participants": {"$ne": participant_id}},
+            {
+                "$push": {"participants": participant_id},
+                "$set": {f"registered_members.{participant_id}": members}
+            }
         )
+        if not registered.modified_count:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Already registered for this tournament"
+            )
+        await record_tournament_registration(tournament_data, participant_id, members=members)
         
         # Update user profile tournament count
         await db.user_profiles.update_one(
@@ -405,8 +395,11 @@ async def register_for_tournament(
         registration_type = "team" if team_id else "individual"
         logger.info(f"User {current_user.username} registered for tournament {tournament.title} as {registration_type}")
         
-        # Invalidate tournament cache
-        invalidate.invalidate_tournament_cache(tournament_id)
+        # Invalidate this tournament's entries, plus the registered team's statistics
+        if team_id:
+            await invalidate.invalidate_tags(f"tournament:{tournament_id}", f"team:{team_id}")
+        else:
+            await invalidate.invalidate_tournament_cache(tournament_id)
         
         return {"message": "Successfully registered for tournament", "type": registration_type}
         
@@ -559,17 +552,26 @@ async def delete_tournament(
         # Delete associated matches
         await db.matches.delete_many({"tournament_id": tournament_id})
         
-        # Delete the tournament
-        result = await db.tournaments.delete_one({"id": tournament_id})
+        # Delete the tournament (the deleted document tells what was counted)
+        previous = await db.tournaments.find_one_and_delete({"id": tournament_id})
         
-        if result.deleted_count == 0:
+        if not previous:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Tournament not found"
             )
         
+        # Withdraw the victory of a completed tournament and every registration
+        await sync_tournament_winner(db, previous, None)
+        await sync_winner_counters(previous, None)
+        for participant_id in previous.get("participants", []):
+            await record_tournament_registration(previous, participant_id, -1)
+        
         logger.info(f"Tournament {tournament.title} deleted by admin {current_user.username}")
         
+        await invalidate.invalidate_tournament_cache(tournament_id)
+        await invalidate.invalidate_tournament_cache()
+        
         return {"message": f"Tournament '{tournament.title}' has been successfully deleted"}
         
     except HTTPException:
@@ -612,11 +614,20 @@ async def unregister_from_tournament(
                 detail="Cannot unregister from ongoing tournament"
             )
         
-        # Unregister user
-        await db.tournaments.update_one(
-            {"id": tournament_id},
-            {"$pull": {"participants": current_user.id}}
+        # Unregister user (the previous document tells who was counted)
+        previous = await db.tournaments.find_one_and_update(
+            {"id": tournament_id, "participants": current_user.id},
+            {
+                "$pull": {"participants": current_user.id},
+                "$unset": {f"registered_members.{current_user.id}": ""}
+            }
         )
+        if not previous:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Not registered for this tournament"
+            )
+        await record_tournament_registration(previous, current_user.id, -1)
         
         # Update user profile tournament count
         await db.user_profiles.update_one(
@@ -626,6 +637,8 @@ async def unregister_from_tournament(
         
         logger.info(f"User {current_user.username} unregistered from tournament {tournament.title}")
         
+        await invalidate.invalidate_tournament_cache(tournament_id)
+        
         return {"message": "Successfully unregistered from tournament"}
         
     except HTTPException:
@@ -637,69 +650,6 @@ async def unregister_from_tournament(
             detail="Error unregistering from tournament"
         )
 
-@router.get("/{tournament_id}/participants-info")
-async def get_tournament_participants_info(tournament_id: str):
-    """Get detailed information about tournament participants (users and teams)."""
-    try:
-        # Get tournament
-        tournament_data = await db.tournaments.find_one({"id": tournament_id})
-        if not tournament_data:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Tournament not found"
-            )
-
-        tournament = Tournament(**tournament_data)
-        participants_info = []
-
-        for participant_id in tournament.participants:
-            # Try to find as user first
-            user_data = await db.users.find_one({"id": participant_id})
-            if user_data:
-                participants_info.append({
-                    "id": participant_id,
-                    "type": "user",
-                    "name": user_data["username"],
-                    "display_name": user_data["username"]
-                })
-                continue
-            
-            # Try to find as team
-            team_data = await db.teams.find_one({"id": participant_id})
-            if team_data:
-                participants_info.append({
-                    "id": participant_id,
-                    "type": "team", 
-                    "name": team_data["name"],
-                    "display_name": f"{team_data['name']} ({len(team_data['members'])}/{team_data['max_members']})",
-                    "members_count": len(team_data["members"]),
-                    "max_members": team_data["max_members"]
-                })
-                continue
-            
-            # Fallback for unknown participants
-            participants_info.append({
-                "id": participant_id,
-                "type": "unknown",
-                "name": f"Participant {participant_id[:8]}",
-                "display_name": f"Participant {participant_id[:8]}"
-            })
-
-        return {
-            "tournament_id": tournament_id,
-            "tournament_type": tournament.tournament_type,
-            "participants": participants_info
-        }
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Error getting tournament participants info: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Error fetching participants information"
-        )
-
 @router.put("/{tournament_id}/status")
 async def update_tournament_status(
     tournament_id: str,
@@ -726,13 +676,19 @@ async def update_tournament_status(
             )
         
         # Update status
-        await db.tournaments.update_one(
+        previous = await db.tournaments.find_one_and_update(
             {"id": tournament_id},
-            {"$set": {"status": new_status, "updated_at": datetime.utcnow()}}
+            {"$set": {"status": new_status, "updated_at": datetime.utcnow()}},
+            return_document=ReturnDocument.BEFORE
         )
+        winner_id = previous.get("winner_id") if previous and new_status == "completed" else None
+        await sync_tournament_winner(db, previous, winner_id)
+        await sync_winner_counters(previous, winner_id)
         
         logger.info(f"Tournament {tournament.title} status updated to {new_status} by {current_user.username}")
         
+        await invalidate.invalidate_tournament_cache(tournament_id)
+        
         return {"message": f"Tournament status updated to {new_status}"}
         
     except HTTPException:
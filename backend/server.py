@@ -173,6 +173,73 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def ensure_db_indexes():
+    if os.environ.get("MONGO_ENSURE_INDEXES", "true").lower() != "true":
+        return
+    from indexes import ensure_indexes
+    try:
+        await ensure_indexes(db)
+    except Exception as e:
+        logger.error(f"Index bootstrap failed: {str(e)}")
+
+@app.on_event("startup")
+async def backfill_community_leaderboard():
+    from community_leaderboard import ensure_leaderboard
+    try:
+        await ensure_leaderboard(db)
+    except Exception as e:
+        logger.error(f"Community leaderboard backfill failed: {str(e)}")
+
+@app.on_event("startup")
+async def backfill_user_counters():
+    from user_counters import ensure_counters
+    try:
+        await ensure_counters()
+    except Exception as e:
+        logger.error(f"User counters backfill failed: {str(e)}")
+
+@app.on_event("startup")
+async def backfill_quest_stats():
+    from quest_stats import ensure_quest_stats
+    try:
+        await ensure_quest_stats()
+    except Exception as e:
+        logger.error(f"Quest stats backfill failed: {str(e)}")
+
+@app.on_event("startup")
+async def backfill_achievement_stats():
+    from achievement_stats import ensure_achievement_stats
+    from achievements import achievement_engine
+    try:
+        await ensure_achievement_stats(
+            {badge_id: badge.rarity for badge_id, badge in achievement_engine.badges_registry.items()}
+        )
+    except Exception as e:
+        logger.error(f"Achievement stats backfill failed: {str(e)}")
+
+@app.on_event("startup")
+async def rebuild_elo_rank_index():
+    from elo_rank_index import elo_rank_index
+    from elo_system import elo_engine
+    try:
+        await elo_rank_index.rebuild_once(elo_engine.CURRENT_SEASON)
+    except Exception as e:
+        logger.error(f"ELO rank index rebuild failed: {str(e)}")
+
+@app.on_event("startup")
+async def migrate_main_elo_ratings():
+    from elo_system import elo_engine
+    try:
+        await elo_engine.ensure_main_elo_ratings()
+    except Exception as e:
+        logger.error(f"Main ELO sync failed: {str(e)}")
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
     client.close()
+
+@app.on_event("shutdown")
+async def shutdown_cache_pool():
+    from cache import cache
+    await cache.aclose()
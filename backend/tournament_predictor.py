@@ -0,0 +1,283 @@
+"""
+Monte-Carlo tournament outcome predictor
+
+Simulates the remaining matches of an elimination bracket many times at once
+with NumPy, drawing each result from the ELO expected score of the two sides
+(`EloEngine.calculate_expected_score`). Completed matches keep their recorded
+winner, so the prediction follows the live bracket.
+
+The result is each participant's probability of reaching every round and of
+winning the tournament. It is stored in `tournament_predictions` and
+recomputed after each match result.
+"""
+
+import asyncio
+import os
+import re
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from cache import single_flight
+from database import db
+from elo_system import EloEngine, GameMode, elo_engine
+from monitoring import app_logger
+
+COLLECTION = "tournament_predictions"
+DEFAULT_SIMULATIONS = int(os.environ.get("TOURNAMENT_PREDICTION_SIMULATIONS", "100000"))
+DEFAULT_RATING = 1200
+MATCH_FIELDS = {"_id": 0, "id": 1, "round_number": 1, "match_number": 1, "player1_id": 1, "player2_id": 1, "winner_id": 1, "status": 1}
+
+_PLACEHOLDER = re.compile(r"^Winner of Match (\d+)$")
+
+# Slot sources: a participant index, the winner of another match, or a bye
+PLAYER, FEEDER, BYE = "player", "feeder", "bye"
+Slot = Tuple[str, int]
+
+
+class BracketSimulator:
+    """Vectorized simulation of an elimination bracket.
+
+    participants and ratings are aligned; matches are bracket match documents.
+    The last participant index is reserved for byes, which always lose.
+    """
+
+    def __init__(
+        self,
+        participants: List[str],
+        ratings: List[float],
+        matches: List[Dict[str, Any]],
+        engine: EloEngine = elo_engine
+    ):
+        self.participants = list(participants)
+        self.index = {participant_id: position for position, participant_id in enumerate(self.participants)}
+        self.ratings = list(ratings)
+        self.matches = sorted(matches, key=lambda match: (match["round_number"], match.get("match_number", 0)))
+        self.round_numbers = sorted({match["round_number"] for match in self.matches})
+        self.slots = self._resolve_slots()
+        self.expected = self._expected_scores(engine)
+
+    @property
+    def bye(self) -> int:
+        return len(self.participants)
+
+    def _participant(self, participant_id: str) -> int:
+        if participant_id not in self.index:
+            # Player placed in the bracket without being registered
+            self.index[participant_id] = len(self.participants)
+            self.participants.append(participant_id)
+            self.ratings.append(DEFAULT_RATING)
+        return self.index[participant_id]
+
+    def _resolve_slots(self) -> List[Tuple[Slot, Slot]]:
+        by_number = {}
+        for position, match in enumerate(self.matches):
+            by_number.setdefault(match.get("match_number"), position)
+
+        raw, consumed = [], set()
+        for match in self.matches:
+            sides = []
+            for field in ("player1_id", "player2_id"):
+                value = match.get(field)
+                placeholder = _PLACEHOLDER.match(value) if value else None
+                if value is None or (placeholder and int(placeholder.group(1)) not in by_number):
+                    sides.append(None)
+                elif value == "BYE":
+                    sides.append((BYE, 0))
+                elif placeholder:
+                    feeder = by_number[int(placeholder.group(1))]
+                    consumed.add(feeder)
+                    sides.append((FEEDER, feeder))
+                else:
+                    sides.append((PLAYER, self._participant(value)))
+            raw.append(sides)
+
+        # A winner already copied into the next round consumes its feeder match
+        for position, match in enumerate(self.matches):
+            winner = self.index.get(match.get("winner_id"))
+            if winner is not None and any(
+                side == (PLAYER, winner)
+                for other, sides in zip(self.matches, raw) if other["round_number"] > match["round_number"]
+                for side in sides
+            ):
+                consumed.add(position)
+
+        # Empty slots take the unclaimed matches of earlier rounds, in bracket order
+        slots = []
+        for position, (match, sides) in enumerate(zip(self.matches, raw)):
+            resolved = []
+            for side in sides:
+                if side is None:
+                    feeder = next(
+                        (earlier for earlier in range(position)
+                         if earlier not in consumed and self.matches[earlier]["round_number"] < match["round_number"]),
+                        None
+                    )
+                    if feeder is None:
+                        side = (BYE, 0)
+                    else:
+                        consumed.add(feeder)
+                        side = (FEEDER, feeder)
+                resolved.append(side)
+            slots.append(tuple(resolved))
+        return slots
+
+    def _expected_scores(self, engine: EloEngine) -> np.ndarray:
+        """Table of expected scores between every pair of participants, byes included"""
+        size = len(self.participants) + 1
+        expected = np.empty((size, size), dtype=np.float32)
+        for a in range(size - 1):
+            for b in range(size - 1):
+                expected[a, b] = engine.calculate_expected_score(self.ratings[a], self.ratings[b])
+        expected[:, size - 1] = 1.0  # Anyone beats a bye...
+        expected[size - 1, :] = 0.0
+        expected[size - 1, size - 1] = 1.0  # ...and two byes yield a bye
+        return expected
+
+    def _constant(self, slot: Slot) -> Optional[int]:
+        kind, value = slot
+        if kind == FEEDER:
+            return None
+        return value if kind == PLAYER else self.bye
+
+    def simulate(self, simulations: int = DEFAULT_SIMULATIONS, seed: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Run every simulation at once, one match (a row of draws) at a time.
+
+        Returns "reach" (rounds x participants, probability of playing in each
+        round, monotonic so byes count as reaching the round they skip) and
+        "win" (probability of winning a final-round match).
+        """
+        rng = np.random.default_rng(seed)
+        dtype = np.int16 if len(self.participants) < np.iinfo(np.int16).max else np.int32
+        size = len(self.participants) + 1
+        winners = np.empty((len(self.matches), simulations), dtype=dtype)
+        # Number of simulations won by each participant, per match
+        match_wins = np.zeros((len(self.matches), size), dtype=np.int64)
+        reach = np.zeros((len(self.round_numbers), size), dtype=np.int64)
+        round_position = {round_number: position for position, round_number in enumerate(self.round_numbers)}
+
+        for position, (match, slots) in enumerate(zip(self.matches, self.slots)):
+            first, second = (self._constant(slot) for slot in slots)
+            for slot, constant in zip(slots, (first, second)):
+                if constant is None:
+                    reach[round_position[match["round_number"]]] += match_wins[slot[1]]
+                else:
+                    reach[round_position[match["round_number"]], constant] += simulations
+
+            if match.get("status") == "completed" and match.get("winner_id") in self.index:
+                winners[position] = self.index[match["winner_id"]]
+                match_wins[position, self.index[match["winner_id"]]] = simulations
+                continue
+
+            # Known players need no gather: the expected score is a scalar or a table row
+            first_side = winners[slots[0][1]] if first is None else first
+            second_side = winners[slots[1][1]] if second is None else second
+            if first is not None and second is not None:
+                expected = self.expected[first, second]
+            elif first is not None:
+                expected = self.expected[first][second_side]
+            elif second is not None:
+                expected = self.expected[:, second][first_side]
+            else:
+                expected = self.expected[first_side, second_side]
+
+            draws = rng.random(simulations, dtype=np.float32) < expected
+            winners[position] = np.where(draws, first_side, second_side)
+            match_wins[position] = np.bincount(winners[position], minlength=size)
+
+        final = [position for position, match in enumerate(self.matches) if match["round_number"] == self.round_numbers[-1]]
+        wins = match_wins[final].sum(axis=0)
+        reach = np.maximum.accumulate(reach[::-1], axis=0)[::-1]
+        return {
+            "reach": reach[:, :-1] / simulations,
+            "win": wins[:-1] / simulations
+        }
+
+
+async def _participant_ratings(participant_ids: List[str], game: Optional[str]) -> Dict[str, float]:
+    """Current-season rating per participant; teams get the average of their members"""
+    query = {"season": elo_engine.CURRENT_SEASON}
+    if game:
+        query["game"] = game
+
+    async def user_ratings(user_ids: List[str]) -> Dict[str, float]:
+        ratings = {}
+        # Tournament ratings first, other modes only when a player has none
+        async for rating in db.elo_ratings.find(
+            {**query, "user_id": {"$in": user_ids}}, {"_id": 0, "user_id": 1, "mode": 1, "rating": 1}
+        ):
+            if rating["mode"] == GameMode.TOURNAMENT.value or rating["user_id"] not in ratings:
+                ratings[rating["user_id"]] = rating["rating"]
+        return ratings
+
+    ratings = await user_ratings(participant_ids)
+    unrated = [participant_id for participant_id in participant_ids if participant_id not in ratings]
+    if unrated:
+        teams = await db.teams.find({"id": {"$in": unrated}}, {"_id": 0, "id": 1, "members": 1}).to_list(None)
+        member_ratings = await user_ratings(list({member for team in teams for member in team.get("members", [])}))
+        for team in teams:
+            members = [member_ratings.get(member, DEFAULT_RATING) for member in team.get("members", [])]
+            if members:
+                ratings[team["id"]] = sum(members) / len(members)
+    return ratings
+
+
+async def predict_tournament(tournament_id: str, simulations: int = DEFAULT_SIMULATIONS) -> Optional[Dict[str, Any]]:
+    """Simulate a tournament bracket; None when the tournament has no bracket"""
+    tournament = await db.tournaments.find_one({"id": tournament_id}, {"_id": 0, "participants": 1, "game": 1})
+    matches = await db.matches.find({"tournament_id": tournament_id}, MATCH_FIELDS).to_list(None)
+    if not tournament or not matches:
+        return None
+
+    participants = list(dict.fromkeys(tournament.get("participants", [])))
+    ratings = await _participant_ratings(participants, tournament.get("game"))
+
+    started = time.perf_counter()
+    simulator = BracketSimulator(
+        participants, [ratings.get(participant_id, DEFAULT_RATING) for participant_id in participants], matches
+    )
+    # CPU-bound: keep the event loop free while NumPy works
+    outcome = await asyncio.to_thread(simulator.simulate, simulations)
+    duration_ms = round((time.perf_counter() - started) * 1000, 1)
+
+    predictions = [
+        {
+            "participant_id": participant_id,
+            "rating": round(simulator.ratings[position]),
+            "round_probabilities": [round(float(p), 4) for p in outcome["reach"][:, position]],
+            "win_probability": round(float(outcome["win"][position]), 4)
+        }
+        for position, participant_id in enumerate(simulator.participants)
+    ]
+    predictions.sort(key=lambda prediction: prediction["win_probability"], reverse=True)
+
+    return {
+        "tournament_id": tournament_id,
+        "simulations": simulations,
+        "rounds": simulator.round_numbers,
+        "participants": predictions,
+        "duration_ms": duration_ms,
+        "generated_at": datetime.utcnow()
+    }
+
+
+async def refresh_prediction(tournament_id: str) -> Optional[Dict[str, Any]]:
+    """Recompute and store a tournament prediction"""
+    try:
+        prediction = await predict_tournament(tournament_id)
+        if prediction:
+            await db[COLLECTION].replace_one({"_id": tournament_id}, prediction, upsert=True)
+        return prediction
+    except Exception as e:
+        app_logger.error(f"Error predicting tournament {tournament_id}: {str(e)}")
+        return None
+
+
+async def get_prediction(tournament_id: str) -> Optional[Dict[str, Any]]:
+    """Stored prediction, computed on first request (once for concurrent first requests)"""
+    prediction = await db[COLLECTION].find_one({"_id": tournament_id}, {"_id": 0})
+    return prediction or await single_flight.run(
+        f"prediction:{tournament_id}", lambda: refresh_prediction(tournament_id)
+    )
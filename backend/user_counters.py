@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Materialized per-user achievement counters
+
+One `user_counters` document per user holds the totals that badge criteria
+are based on: tournament participations and wins, coin transactions,
+marketplace purchases and comments. Routes update it with `$inc` when the
+event happens, so evaluating badges or their progress is a single document
+read instead of counting the history every time.
+
+Usage:
+    python user_counters.py --rebuild   # recompute every counter from history
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from pymongo import ReplaceOne, UpdateOne
+
+from database import db
+
+logger = logging.getLogger(__name__)
+
+COLLECTION = "user_counters"
+COUNTER_FIELDS = (
+    "tournaments_participated",
+    "cs2_tournaments",
+    "tournament_wins",
+    "holiday_tournament_wins",
+    "transactions_made",
+    "total_coins_earned",
+    "total_coins_spent",
+    "marketplace_purchases",
+    "unique_items_bought",
+    "comments_posted",
+)
+REBUILD_CHUNK_SIZE = 1000
+
+
+async def _increment(user_ids: Iterable[str], counts: Dict[str, int], add_to_set: Optional[Dict[str, Any]] = None):
+    counts = {field: count for field, count in counts.items() if count}
+    if not counts and not add_to_set:
+        return
+    update: Dict[str, Any] = {"$set": {"updated_at": datetime.utcnow()}}
+    if counts:
+        update["$inc"] = counts
+    if add_to_set:
+        update["$addToSet"] = add_to_set
+    operations = [UpdateOne({"user_id": user_id}, update, upsert=True) for user_id in dict.fromkeys(user_ids)]
+    if operations:
+        await db[COLLECTION].bulk_write(operations, ordered=False)
+
+
+async def record_coin_transaction(transaction: Dict[str, Any]):
+    """Insert a coin transaction and count it for its user"""
+    await db.coin_transactions.insert_one(transaction)
+
+    amount = transaction.get("amount", 0)
+    purchase = transaction.get("transaction_type") == "marketplace_purchase"
+    await _increment(
+        [transaction["user_id"]],
+        {
+            "transactions_made": 1,
+            "total_coins_earned": max(amount, 0),
+            "total_coins_spent": max(-amount, 0),
+            "marketplace_purchases": 1 if purchase else 0,
+        },
+        {"items_bought": transaction["reference_id"]} if purchase and transaction.get("reference_id") else None
+    )
+
+
+async def record_coin_transactions(transactions: List[Dict[str, Any]]):
+    """Bulk variant of record_coin_transaction for non-purchase transactions"""
+    if not transactions:
+        return
+    await db.coin_transactions.insert_many(transactions, ordered=False)
+
+    totals: Dict[str, Dict[str, int]] = {}
+    for transaction in transactions:
+        amount = transaction.get("amount", 0)
+        counts = totals.setdefault(
+            transaction["user_id"], {"transactions_made": 0, "total_coins_earned": 0, "total_coins_spent": 0}
+        )
+        counts["transactions_made"] += 1
+        counts["total_coins_earned"] += max(amount, 0)
+        counts["total_coins_spent"] += max(-amount, 0)
+
+    now = datetime.utcnow()
+    await db[COLLECTION].bulk_write([
+        UpdateOne(
+            {"user_id": user_id},
+            {"$inc": {field: count for field, count in counts.items() if count}, "$set": {"updated_at": now}},
+            upsert=True
+        )
+        for user_id, counts in totals.items()
+    ], ordered=False)
+
+
+async def record_comment(author_id: str, count: int = 1):
+    """Count a comment posted (or, with a negative count, deleted) by author_id"""
+    await _increment([author_id], {"comments_posted": count})
+
+
+async def participant_user_ids(participant_id: str) -> List[str]:
+    """Users behind a tournament participant: the user itself or a team's members"""
+    team = await db.teams.find_one({"id": participant_id}, {"_id": 0, "members": 1})
+    return team.get("members", []) if team else [participant_id]
+
+
+def registered_user_ids(tournament: Dict[str, Any], participant_id: str) -> Optional[List[str]]:
+    """Users counted when participant_id registered, as stored on the tournament"""
+    return (tournament.get("registered_members") or {}).get(participant_id)
+
+
+async def record_tournament_registration(
+    tournament: Dict[str, Any], participant_id: str, count: int = 1, members: Optional[List[str]] = None
+):
+    """Count a tournament registration (negative count to withdraw it).
+
+    members are the users counted, stored by the caller on the tournament under
+    `registered_members`; a withdrawal defaults to those, so a roster change in
+    between does not shift it onto other users (older registrations fall back
+    to the current members).
+    """
+    if members is None and count < 0:
+        members = registered_user_ids(tournament, participant_id)
+    if members is None:
+        members = await participant_user_ids(participant_id)
+    await _increment(
+        members,
+        {
+            "tournaments_participated": count,
+            "cs2_tournaments": count if tournament.get("game") == "cs2" else 0,
+        }
+    )
+
+
+async def withdraw_team_registrations(team_id: str) -> List[str]:
+    """Remove a team from every tournament it is registered in and withdraw each
+    registration from the counters. Returns the ids of the tournaments left."""
+    withdrawn = []
+    registered = await db.tournaments.find({"participants": team_id}, {"_id": 0, "id": 1}).to_list(None)
+    for tournament in registered:
+        # Only the request that actually pulls the team withdraws its registration
+        previous = await db.tournaments.find_one_and_update(
+            {"id": tournament["id"], "participants": team_id},
+            {"$pull": {"participants": team_id}, "$unset": {f"registered_members.{team_id}": ""}},
+            projection={"_id": 0, "id": 1, "game": 1, "registered_members": 1}
+        )
+        if previous:
+            await record_tournament_registration(previous, team_id, -1)
+            withdrawn.append(previous["id"])
+    return withdrawn
+
+
+async def _record_tournament_win(tournament: Dict[str, Any], winner_id: str, count: int):
+    await _increment(
+        await participant_user_ids(winner_id),
+        {
+            "tournament_wins": count,
+            "holiday_tournament_wins": count if tournament.get("tournament_type") == "holiday_special" else 0,
+        }
+    )
+
+
+async def sync_tournament_winner(previous: Optional[Dict[str, Any]], winner_id: Optional[str]):
+    """Apply a tournament winner change to the counters.
+
+    Same contract as community_leaderboard.sync_tournament_winner: previous is
+    the tournament before the write and winner_id the winner counted after it.
+    """
+    if not previous:
+        return
+    counted = previous.get("winner_id") if previous.get("status") == "completed" else None
+    if counted == winner_id:
+        return
+    if counted:
+        await _record_tournament_win(previous, counted, -1)
+    if winner_id:
+        await _record_tournament_win(previous, winner_id, 1)
+
+
+def _counters(document: Dict[str, Any]) -> Dict[str, int]:
+    counters = {field: document.get(field, 0) for field in COUNTER_FIELDS}
+    counters["unique_items_bought"] = len(document.get("items_bought", []))
+    return counters
+
+
+async def get_counters(user_id: str) -> Dict[str, int]:
+    """Every counter of a user (zero when never incremented)"""
+    return _counters(await db[COLLECTION].find_one({"user_id": user_id}, {"_id": 0}) or {})
+
+
+async def get_counters_many(user_ids: List[str]) -> Dict[str, Dict[str, int]]:
+    """get_counters for several users in one query"""
+    documents = {
+        document["user_id"]: document
+        async for document in db[COLLECTION].find({"user_id": {"$in": user_ids}}, {"_id": 0})
+    }
+    return {user_id: _counters(documents.get(user_id, {})) for user_id in user_ids}
+
+
+async def rebuild_counters() -> Dict[str, int]:
+    """Recompute every counter from tournaments, coin transactions and comments.
+
+    Team registrations count for the members stored when the team registered
+    (its current members for older registrations), wins for its current members.
+    """
+    tallies: Dict[str, Dict[str, Any]] = {}
+
+    def tally(user_id: str) -> Dict[str, Any]:
+        return tallies.setdefault(user_id, {field: 0 for field in COUNTER_FIELDS if field != "unique_items_bought"})
+
+    teams = {
+        team["id"]: team.get("members", [])
+        async for team in db.teams.find({}, {"_id": 0, "id": 1, "members": 1})
+    }
+
+    async for tournament in db.tournaments.find(
+        {},
+        {
+            "_id": 0, "participants": 1, "registered_members": 1,
+            "game": 1, "status": 1, "winner_id": 1, "tournament_type": 1
+        }
+    ):
+        for participant_id in tournament.get("participants", []):
+            members = registered_user_ids(tournament, participant_id)
+            for user_id in members if members is not None else teams.get(participant_id, [participant_id]):
+                tally(user_id)["tournaments_participated"] += 1
+                if tournament.get("game") == "cs2":
+                    tally(user_id)["cs2_tournaments"] += 1
+        if tournament.get("status") == "completed" and tournament.get("winner_id"):
+            for user_id in teams.get(tournament["winner_id"], [tournament["winner_id"]]):
+                tally(user_id)["tournament_wins"] += 1
+                if tournament.get("tournament_type") == "holiday_special":
+                    tally(user_id)["holiday_tournament_wins"] += 1
+
+    purchase = {"$eq": ["$transaction_type", "marketplace_purchase"]}
+    async for totals in db.coin_transactions.aggregate([
+        {"$group": {
+            "_id": "$user_id",
+            "transactions_made": {"$sum": 1},
+            "total_coins_earned": {"$sum": {"$cond": [{"$gt": ["$amount", 0]}, "$amount", 0]}},
+            "total_coins_spent": {"$sum": {"$cond": [{"$lt": ["$amount", 0]}, {"$abs": "$amount"}, 0]}},
+            "marketplace_purchases": {"$sum": {"$cond": [purchase, 1, 0]}},
+            "items_bought": {"$addToSet": {"$cond": [
+                {"$and": [purchase, {"$ne": [{"$ifNull": ["$reference_id", None]}, None]}]},
+                "$reference_id",
+                "$$REMOVE"
+            ]}},
+        }}
+    ]):
+        tally(totals.pop("_id")).update(totals)
+
+    for collection in (db.user_comments, db.team_comments):
+        async for totals in collection.aggregate([{"$group": {"_id": "$author_id", "count": {"$sum": 1}}}]):
+            tally(totals["_id"])["comments_posted"] += totals["count"]
+
+    now = datetime.utcnow()
+    operations = [
+        ReplaceOne({"user_id": user_id}, {"user_id": user_id, **counters, "updated_at": now}, upsert=True)
+        for user_id, counters in tallies.items() if user_id
+    ]
+    for start in range(0, len(operations), REBUILD_CHUNK_SIZE):
+        await db[COLLECTION].bulk_write(operations[start:start + REBUILD_CHUNK_SIZE], ordered=False)
+    removed = await db[COLLECTION].delete_many({"user_id": {"$nin": list(tallies)}})
+
+    logger.info(f"✅ User counters rebuilt: {len(operations)} users")
+    return {"users": len(operations), "removed": removed.deleted_count}
+
+
+async def ensure_counters():
+    """Backfill the counters on first start after deployment"""
+    if await db[COLLECTION].estimated_document_count() == 0:
+        await rebuild_counters()
+
+
+async def _main() -> int:
+    from database import client
+
+    try:
+        result = await rebuild_counters()
+        print(f"✅ {result['users']} users counted, {result['removed']} stale entries removed")
+        return 0
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    sys.path.append(str(Path(__file__).parent))
+    parser = argparse.ArgumentParser(description="User achievement counters maintenance")
+    parser.add_argument("--rebuild", action="store_true", help="recompute every counter from history")
+    args = parser.parse_args()
+    if not args.rebuild:
+        parser.print_help()
+        sys.exit(0)
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(asyncio.run(_main()))